@@ -4,17 +4,50 @@ Flask API Server for CVS Air Dashboard
 Integrates with rapor-api.py to serve data to the frontend
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+import time
+_IMPORT_STARTED = time.perf_counter()  # açılış süresi ölçümü (/api/health 'startup')
+
+from flask import Flask, Response, g, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
 import requests
-import pandas as pd
 import csv
 import os
+import json
 import re
-from datetime import datetime, timedelta
-import unicodedata
+import math
+import hashlib
+import mimetypes
+import itertools
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import logging
 
+from column_mapping import ColumnMappingResolver
+from csv_source import CsvOrderSource, file_signature
+import xlsx_ingest
+from order_cache import OrderCache
+from order_query import CATEGORY_FILTERS, OrderIndex, QueryError, parse_sort
+from snapshot_store import OrderSnapshotStore
+from order_summary import GROUP_COLUMNS, summarize_records
+from order_table import OrderTable, as_records
+from lazy_imports import lazy_module, load as lazy_load
+from fx_rates import FxError, FxRateTable, convert_table
+from report_cubes import MonthlyCubes, ReportCubeStore, monthly_report
+from report_exports import FORMATS as EXPORT_FORMATS, ExportError, ExportJobs, ExportQueueFull
+from shared_cache import open_shared_cache
+from remote_client import CircuitOpenError, client_from_env
+from response_encoding import (FastJSONProvider, choose_encoding, compress_bytes, compress_chunks, dumps,
+                               is_compressible, json_array_chunks, ndjson_chunks)
+from static_assets import StaticAssetCache, asset_etag
+from live_updates import OrderBroadcaster
+from request_metrics import MetricsRegistry, RequestProfiler, StageTimings
+from werkzeug.security import safe_join
+
+# pandas ilk veri işleminde (ya da warm_worker ile açılışta) yüklenir; /api/health ve statik dosyalar beklemez
+pd = lazy_module('pandas')
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,6 +56,7 @@ FRONTEND_ORIGIN = os.getenv('FRONTEND_ORIGIN', '').strip()
 API_TOKEN_ENV = os.getenv('API_TOKEN', '').strip()
 
 app = Flask(__name__, static_folder='.')
+app.json = FastJSONProvider(app)
 # CORS based on FRONTEND_ORIGIN env
 if FRONTEND_ORIGIN:
     CORS(app, resources={r"/api/*": {"origins": FRONTEND_ORIGIN}})
@@ -37,11 +71,68 @@ REMOTE_API_BASE = os.getenv('REMOTE_API_BASE', 'http://85.153.155.153:5047').str
 REMOTE_ORDERS_PATH = os.getenv('REMOTE_ORDERS_PATH', '/api/Listeler/listeSIPARISLERCVS').strip()
 REMOTE_BEARER_TOKEN = os.getenv('REMOTE_BEARER_TOKEN', '').strip()
 
-def get_siparisler(page_index=0, page_size=500, base_url=None):
-    """
-    Uzaktan API'den siparişleri getirir; paginasyon parametreleri ile.
-    Tanı amaçlı base_url geçici override'ını destekler (query: baseUrl).
-    """
+# İşlenmiş sipariş verisi için süreç içi önbellek (0 = kapalı)
+ORDERS_CACHE_TTL = float(os.getenv('ORDERS_CACHE_TTL', '60') or 0)
+ORDERS_CACHE_STALE_TTL = float(os.getenv('ORDERS_CACHE_STALE_TTL', '300') or 0)
+# Eksik (partial) sonuçlar önbelleğe yazılmaz: ne ilk yüklemede ne arka plan yenilemesinde
+orders_cache = OrderCache(ttl=ORDERS_CACHE_TTL, stale_ttl=ORDERS_CACHE_STALE_TTL,
+                          cacheable=lambda dataset: not dataset['fetch'].get('partial'))
+
+# Yanıt sıkıştırma (gzip/br) ve akış (?stream=ndjson|json) ayarları
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024') or 1024)
+STREAM_CHUNK_ROWS = int(os.getenv('STREAM_CHUNK_ROWS', '1000') or 1000)
+STREAM_FORMATS = {'ndjson': 'application/x-ndjson', 'json': 'application/json'}
+
+# Statik dosyalar: HTML/CSV/JSON her seferinde doğrulanır, diğerleri STATIC_MAX_AGE saniye önbellekte
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', '300') or 0)
+STATIC_REVALIDATE_EXTENSIONS = ('.html', '.csv', '.json')
+# Catch-all route serves only front-end assets from BASE_DIR; data/code files (.sqlite3, .arrow,
+# .py, .env, .xlsx, ...) are never served. orders.csv (client-side fallback of the report pages)
+# is public only while no API_TOKEN is configured, like /api/orders itself.
+STATIC_EXTENSIONS = ('.html', '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp',
+                     '.woff', '.woff2', '.ttf')
+STATIC_PUBLIC_DATA_FILES = ('orders.csv',)
+
+def static_file_allowed(filename):
+    parts = filename.replace('\\', '/').split('/')
+    if any(not part or part.startswith('.') for part in parts):
+        return False
+    if filename in STATIC_PUBLIC_DATA_FILES:
+        return not API_TOKEN_ENV
+    return os.path.splitext(filename)[1].lower() in STATIC_EXTENSIONS
+
+static_assets = StaticAssetCache()
+
+# Tüm sayfaları çekme modu (?all=1) ayarları
+ALL_PAGES_PAGE_SIZE = int(os.getenv('ALL_PAGES_PAGE_SIZE', '1000') or 1000)
+ALL_PAGES_WORKERS = int(os.getenv('ALL_PAGES_WORKERS', '4') or 4)
+ALL_PAGES_MAX_PAGES = int(os.getenv('ALL_PAGES_MAX_PAGES', '200') or 200)
+
+# Uzak alan adı -> dashboard kolonu eşlemesi; şema başına bir kez derlenir
+column_resolver = ColumnMappingResolver()
+
+# Paylaşılan uzak API istemcisi: keep-alive havuzu, retry/backoff ve devre kesici
+remote_client = client_from_env()
+
+# İstek zamanlaması (Server-Timing), /api/metrics ve opsiyonel cProfile (?profile=1)
+SERVER_TIMING = os.getenv('SERVER_TIMING', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', '0').strip().lower() in ('1', 'true', 'yes', 'on')
+PROFILE_DIR = os.getenv('PROFILE_DIR', '').strip() or os.path.join(tempfile.gettempdir(), 'cvsair-profiles')
+metrics = MetricsRegistry()
+timings = StageTimings(metrics.histogram(
+    'orders_stage_duration_seconds', 'Orders pipeline stage latency', ('stage',)))
+REQUEST_SECONDS = metrics.histogram(
+    'http_request_duration_seconds', 'Request handling latency (streamed bodies excluded)', ('route', 'method', 'status'))
+UPSTREAM_SECONDS = metrics.histogram(
+    'upstream_request_duration_seconds', 'ERP orders API call latency', ('outcome',))
+UPSTREAM_ERRORS = metrics.counter('upstream_errors_total', 'Failed ERP orders API calls', ('kind',))
+FALLBACKS = metrics.counter('orders_fallback_total', 'Responses built from offline data', ('source',))
+ROWS_SERVED = metrics.counter('orders_rows_served_total', 'Order rows returned to clients', ('route',))
+request_profiler = RequestProfiler(PROFILE_DIR)
+
+def normalize_page_args(page_index, page_size):
+    """Coerce pageIndex/pageSize to ints and clamp pageSize to (0, 1000]."""
     try:
         page_index = int(page_index or 0)
     except Exception:
@@ -56,29 +147,165 @@ def get_siparisler(page_index=0, page_size=500, base_url=None):
     if page_size > 1000:
         page_size = 1000
 
+    return page_index, page_size
+
+def get_siparisler(page_index=0, page_size=500, base_url=None):
+    """
+    Uzaktan API'den siparişleri getirir; paginasyon parametreleri ile.
+    Tanı amaçlı base_url geçici override'ını destekler (query: baseUrl).
+    """
+    page_index, page_size = normalize_page_args(page_index, page_size)
+
     base = (base_url or REMOTE_API_BASE)
     url = f"{base}{REMOTE_ORDERS_PATH}"
-    headers = {"Authorization": f"Bearer {REMOTE_BEARER_TOKEN}"} if REMOTE_BEARER_TOKEN else {}
     params = {"pageIndex": page_index, "pageSize": page_size}
     if not REMOTE_BEARER_TOKEN:
         logger.warning("REMOTE_BEARER_TOKEN not set; calling remote API without Authorization header")
 
+    t0 = time.perf_counter()
     try:
         logger.info(f"Attempting external API GET {url} params={params}")
-        resp = requests.get(url, headers=headers, params=params, timeout=30)
-        logger.info(f"External API response status: {resp.status_code}")
-        if resp.status_code == 404:
-            # Content could be HTML; avoid log flooding
-            logger.error(f"External API 404 Not Found: {resp.url}")
-        resp.raise_for_status()
-        return resp.json()
+        raw = remote_client.get_orders(params, base_url=base)
+    except CircuitOpenError as e:
+        # Upstream bilinen şekilde kapalı; beklemeden CSV fallback'e geç
+        logger.warning(str(e))
+        record_upstream_error(e, t0)
+        raise
     except requests.exceptions.HTTPError as e:
         # Log detailed HTTP error
         logger.error(f"HTTP error from external API: {e}")
+        record_upstream_error(e, t0)
         raise
     except requests.exceptions.RequestException as e:
         logger.error(f"API request failed: {e}")
+        record_upstream_error(e, t0)
         raise
+    UPSTREAM_SECONDS.observe(time.perf_counter() - t0, outcome='ok')
+    return raw
+
+def upstream_error_kind(error):
+    """Short label for a failed upstream call (circuit_open, timeout, connection, http_5xx, ...)."""
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None):
+        return f"http_{response.status_code // 100}xx"
+    name = type(error).__name__.lower()
+    for kind in ('timeout', 'connect'):
+        if kind in name:
+            return 'connection' if kind == 'connect' else kind
+    return 'other'
+
+def record_upstream_error(error, started):
+    """Count a failed upstream call and its latency (shared with the ASGI client)."""
+    kind = upstream_error_kind(error)
+    UPSTREAM_ERRORS.inc(kind=kind)
+    if kind != 'circuit_open':
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, outcome='error')
+
+def _unwrap_items(raw_data):
+    """Return the row list from common response containers (items/data/result...)."""
+    if isinstance(raw_data, dict):
+        # Yeni paginasyonlu endpoint için 'items' öncelikli
+        for key in ['items', 'data', 'Data', 'result', 'Result', 'results']:
+            if key in raw_data and isinstance(raw_data[key], (list, tuple)):
+                return list(raw_data[key])
+        return []
+    if isinstance(raw_data, (list, tuple)):
+        return list(raw_data)
+    return []
+
+
+def _extract_total(raw_data):
+    """Best-effort total row count from a paged response; None if not reported."""
+    if not isinstance(raw_data, dict):
+        return None
+    for key in ['totalCount', 'TotalCount', 'total', 'Total', 'totalRecords', 'recordsTotal', 'count', 'Count']:
+        val = raw_data.get(key)
+        if isinstance(val, (int, float)) and not isinstance(val, bool) and val >= 0:
+            return int(val)
+    return None
+
+
+def iter_siparis_pages(page_size=ALL_PAGES_PAGE_SIZE, base_url=None,
+                       max_workers=ALL_PAGES_WORKERS, max_pages=ALL_PAGES_MAX_PAGES, info=None):
+    """
+    Yield (page_index, rows) in page order as remote pages arrive.
+    Page 0 is fetched first to discover the total; remaining pages are fetched
+    concurrently on a bounded thread pool. If the upstream does not report a
+    total, pages are fetched in windows of max_workers until a short page.
+    rows is None for a page that failed (see remote_client retries); page 0 failures
+    propagate. The reported total is stored in info['total'] when given.
+    """
+    page_size = max(1, min(int(page_size or ALL_PAGES_PAGE_SIZE), 1000))
+    max_workers = max(1, int(max_workers or 1))
+    info = {} if info is None else info
+
+    first_raw = get_siparisler(page_index=0, page_size=page_size, base_url=base_url)
+    first_rows = _unwrap_items(first_raw)
+    total = info['total'] = _extract_total(first_raw)
+    yield 0, first_rows
+
+    def fetch(idx):
+        try:
+            # Yeniden denemeler remote_client'ta (tek çağrı süresi içinde)
+            return idx, _unwrap_items(get_siparisler(page_index=idx, page_size=page_size, base_url=base_url))
+        except Exception as e:
+            logger.warning(f"Page {idx} failed: {e}")
+            return idx, None
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='orders-page')
+    try:
+        if total is not None:
+            n_pages = min(max(math.ceil(total / page_size), 1), max_pages)
+            yield from pool.map(fetch, range(1, n_pages))
+        elif len(first_rows) >= page_size:
+            next_idx = 1
+            done = False
+            while not done and next_idx < max_pages:
+                window = range(next_idx, min(next_idx + max_workers, max_pages))
+                for idx, rows in pool.map(fetch, window):
+                    if done:
+                        break
+                    yield idx, rows
+                    if rows is not None and len(rows) < page_size:
+                        done = True
+                next_idx = window.stop
+            if not done:
+                logger.warning(f"All-pages fetch stopped at max_pages={max_pages}")
+    finally:
+        # Tüketici erken bırakırsa (istemci koptu) bekleyen sayfaları iptal et
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def get_all_siparisler(page_size=ALL_PAGES_PAGE_SIZE, base_url=None,
+                       max_workers=ALL_PAGES_WORKERS, max_pages=ALL_PAGES_MAX_PAGES):
+    """
+    Walk every remote page (see iter_siparis_pages) and merge the rows in page order.
+    Returns {'items', 'total', 'pages', 'failed_pages', 'partial'}.
+    Page 0 failures propagate (the caller falls back to CSV).
+    """
+    info = {}
+    pages = {}
+    failed = []
+    for idx, rows in iter_siparis_pages(page_size, base_url, max_workers, max_pages, info=info):
+        if rows is None:
+            failed.append(idx)
+        else:
+            pages[idx] = rows
+    total = info.get('total')
+
+    items = []
+    for idx in sorted(pages):
+        items.extend(pages[idx])
+    if failed:
+        logger.warning(f"All-pages fetch partial: failed pages {sorted(failed)}")
+    return {
+        'items': items,
+        'total': total,
+        'pages': len(pages),
+        'failed_pages': sorted(failed),
+        'partial': bool(failed),
+    }
 
 # CSV yardımcıları
 
@@ -112,11 +339,88 @@ def _parse_date_iso(date_str):
         return None
 
 
-def read_orders_from_csv(csv_path):
-    """Read orders from a CSV file and map to dashboard schema.
-    Expects headers like: SİPARİŞ TARİHİ, CARİ İSMİ, Sorumluluk Merkezi Adı, MİKTAR, TAMAMLANAN MİKTAR, TUTAR, NET TUTAR, DOVİZ CİNSİ, KALAN MİKTAR, KALAN SİPARİŞ NET TUTAR
-    Skips summary rows without a valid date.
+def _parse_any_date(s):
+    """Scalar date parser (dd.mm.yyyy first, then pandas inference); ISO string or None."""
+    iso = _parse_date_iso(s)
+    if iso:
+        return iso
+    try:
+        dt = pd.to_datetime(s, errors='coerce')
+        if pd.notna(dt):
+            return dt.date().isoformat()
+    except Exception:
+        pass
+    return None
+
+
+# Vektörel dönüşümler (process_data için): hücre başına apply yerine kolon bazında
+
+NUMERIC_COLUMNS = ['MİKTAR', 'TAMAMLANAN MİKTAR', 'KALAN MİKTAR', 'TUTAR', 'NET TUTAR', 'KALAN SİPARİŞ NET TUTAR']
+DATE_FORMATS = ['%d.%m.%Y', '%Y-%m-%dT%H:%M:%S']
+_NUMBER_JUNK = re.compile(r'^\s+|\s+$|[",]')
+
+
+def _to_number_series(col):
+    """Column-wise equivalent of _parse_number: strips quotes/thousands separators, bad values -> 0.0."""
+    # _parse_number(True) -> float('True') başarısız -> 0.0; bool'lar 1.0 olmasın
+    if pd.api.types.is_bool_dtype(col):
+        return pd.Series(0.0, index=col.index)
+    if pd.api.types.is_numeric_dtype(col):
+        return pd.to_numeric(col, errors='coerce').fillna(0.0).astype(float)
+    # Temiz değerler doğrudan dönüşür; yalnızca başarısız hücreler temizlenir ("46,565.11")
+    numbers = pd.to_numeric(col, errors='coerce')
+    ones = numbers.isin((0, 1))
+    if ones.any():
+        # to_numeric True/False'u 1/0 yapar; yalnızca 0/1 çıkan hücrelere bakılır
+        flags = col[ones].map(lambda v: isinstance(v, bool))
+        numbers.loc[flags.index[flags.to_numpy()]] = 0.0
+    bad = numbers.isna() & col.notna()
+    if bad.any():
+        cleaned = col[bad].astype(str).str.replace(_NUMBER_JUNK, '', regex=True)
+        numbers = numbers.astype(float)
+        numbers.loc[bad] = pd.to_numeric(cleaned, errors='coerce')
+    return numbers.fillna(0.0).astype(float)
+
+
+def _to_iso_date_series(col):
     """
+    Vectorized date normalization to 'YYYY-MM-DD' (None when unparseable).
+    Tries the known shapes (dd.mm.yyyy, ISO 2025-03-10T00:00:00) with explicit
+    formats in one pass each; only leftovers go through the scalar parser.
+    """
+    if pd.api.types.is_datetime64_any_dtype(col):
+        parsed = col
+    else:
+        text = col.astype(str).str.strip()
+        parsed = pd.Series(pd.NaT, index=col.index, dtype='datetime64[ns]')
+        pending = col.notna() & (text != '')
+        for fmt in DATE_FORMATS:
+            if not pending.any():
+                break
+            attempt = pd.to_datetime(text[pending], format=fmt, errors='coerce')
+            ok = attempt.notna()
+            parsed.loc[attempt.index[ok]] = attempt[ok]
+            pending.loc[attempt.index[ok]] = False
+        if pending.any():
+            # Nadir biçimler (saat dilimli ISO, yyyy-mm-dd vb.) için eski yol
+            leftovers = text[pending].map(_parse_any_date)
+            result = parsed.dt.strftime('%Y-%m-%d').astype(object)
+            result = result.where(parsed.notna(), None)
+            result.loc[leftovers.index] = leftovers
+            return result
+    result = parsed.dt.strftime('%Y-%m-%d').astype(object)
+    return result.where(parsed.notna(), None)
+
+
+def _frame_to_records(df):
+    """Faster DataFrame -> list[dict] than to_dict('records') (column tolist + zip)."""
+    cols = list(df.columns)
+    values = [df[c].tolist() for c in cols]
+    return [dict(zip(cols, row)) for row in zip(*values)]
+
+
+def _read_orders_csv_rows(csv_path):
+    """Row-by-row csv.DictReader parser (small files)."""
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV dosyası bulunamadı: {csv_path}")
 
@@ -160,104 +464,166 @@ def read_orders_from_csv(csv_path):
 
     return results
 
-def process_data(raw_data):
+CSV_TEXT_COLUMNS = ['SİPARİŞ TARİHİ', 'CARİ İSMİ', 'Sorumluluk Merkezi', 'Sorumluluk Merkezi Adı', 'DOVİZ CİNSİ']
+CSV_NUMBER_COLUMNS = ['MİKTAR', 'TAMAMLANAN MİKTAR', 'TUTAR', 'NET TUTAR', 'KALAN MİKTAR', 'KALAN SİPARİŞ NET TUTAR']
+# Bu boyutun üzerindeki dosyalar pandas read_csv ile vektörel okunur
+CSV_PANDAS_MIN_BYTES = int(os.getenv('CSV_PANDAS_MIN_BYTES', str(256 * 1024)) or 0)
+
+
+def _read_orders_csv_frame(csv_path):
+    df = pd.read_csv(
+        csv_path, encoding='utf-8-sig', thousands=',',
+        dtype={c: str for c in CSV_TEXT_COLUMNS}, keep_default_na=False,
+        na_values={c: [''] for c in CSV_NUMBER_COLUMNS},
+    )
+    return _normalize_order_sheet(df)
+
+
+def _read_orders_csv_pandas(csv_path):
+    """Vectorized equivalent of _read_orders_csv_rows (large exports)."""
+    return _frame_to_records(_read_orders_csv_frame(csv_path))
+
+
+def _normalize_order_sheet(df):
     """
-    Normalize remote API data to match dashboard expectations.
-    Handles alternate field names, type conversions, and date parsing.
+    Map an 'ALINAN SİPARİŞLER' sheet (CSV text or typed xlsx cells) to the
+    read_orders_from_csv() record schema; rows without a valid date are dropped.
     """
+    if df.empty or 'SİPARİŞ TARİHİ' not in df.columns:
+        return pd.DataFrame(columns=['SİPARİŞ TARİHİ', 'CARİ İSMİ', 'Sorumluluk Merkezi Adı', 'MİKTAR',
+                                     'KALAN SİPARİŞ NET TUTAR', 'DOVİZ CİNSİ', 'KALAN MİKTAR', 'date'])
+
+    def text(col):
+        return df[col].fillna('').astype(str).str.strip() if col in df.columns else pd.Series('', index=df.index)
+
+    def number(col):
+        if col not in df.columns:
+            return pd.Series(float('nan'), index=df.index)
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = _to_number_series(values).where(values.astype(str).str.strip() != '')
+        return values.astype(float)
+
+    if pd.api.types.is_datetime64_any_dtype(df['SİPARİŞ TARİHİ']):
+        # xlsx: hücreler zaten tarih; CSV ile aynı gösterim için dd.mm.yyyy üret
+        dates = df['SİPARİŞ TARİHİ']
+        sip_tarih = dates.dt.strftime('%d.%m.%Y').fillna('')
+    else:
+        sip_tarih = text('SİPARİŞ TARİHİ')
+        dates = pd.to_datetime(sip_tarih, format='%d.%m.%Y', errors='coerce')
+    keep = dates.notna()  # tarih yoksa veya toplam satırıysa atla
+
+    miktar = number('MİKTAR').fillna(0.0).round().astype(int)
+    tamamlanan = number('TAMAMLANAN MİKTAR').fillna(0.0).round().astype(int)
+    kalan_miktar = number('KALAN MİKTAR').fillna(0.0).round().astype(int)
+    derive = (kalan_miktar == 0) & ((miktar != 0) | (tamamlanan != 0))
+    kalan_miktar = kalan_miktar.where(~derive, (miktar - tamamlanan).clip(lower=0))
+
+    # Kalan Net Tutar bazı dosyalarda "NET TUTAR" olarak gelebilir
+    kalan_net_tutar = (number('KALAN SİPARİŞ NET TUTAR')
+                       .fillna(number('NET TUTAR'))
+                       .fillna(number('TUTAR'))
+                       .fillna(0.0))
+
+    out = pd.DataFrame({
+        'SİPARİŞ TARİHİ': sip_tarih,
+        'CARİ İSMİ': text('CARİ İSMİ'),
+        'Sorumluluk Merkezi Adı': text('Sorumluluk Merkezi Adı'),
+        'MİKTAR': miktar,
+        'KALAN SİPARİŞ NET TUTAR': kalan_net_tutar,
+        'DOVİZ CİNSİ': text('DOVİZ CİNSİ'),
+        'KALAN MİKTAR': kalan_miktar,
+        'date': dates.dt.strftime('%Y-%m-%d'),
+    })[keep]
+    return out.reset_index(drop=True)
+
+
+def _parse_orders_csv(csv_path):
+    if CSV_PANDAS_MIN_BYTES and os.path.getsize(csv_path) < CSV_PANDAS_MIN_BYTES:
+        return OrderTable.from_records(_read_orders_csv_rows(csv_path))
+    return OrderTable.from_frame(_read_orders_csv_frame(csv_path))
+
+
+_csv_sources = {}
+_csv_sources_lock = threading.Lock()
+
+def get_csv_source(csv_path):
+    """Process-wide CsvOrderSource per path (parsed records cached by mtime/size)."""
+    with _csv_sources_lock:
+        source = _csv_sources.get(csv_path)
+        if source is None:
+            source = CsvOrderSource(csv_path, _parse_orders_csv)
+            _csv_sources[csv_path] = source
+        return source
+
+
+def read_orders_from_csv(csv_path):
+    """Read orders from a CSV file and map to dashboard schema.
+    Expects headers like: SİPARİŞ TARİHİ, CARİ İSMİ, Sorumluluk Merkezi Adı, MİKTAR, TAMAMLANAN MİKTAR, TUTAR, NET TUTAR, DOVİZ CİNSİ, KALAN MİKTAR, KALAN SİPARİŞ NET TUTAR
+    Skips summary rows without a valid date.
+    Returns an OrderTable (sequence of read-only record views; to_records()
+    for plain dicts), cached and only re-read when the file's mtime/size changes.
+    """
+    return get_csv_source(csv_path).records()
+
+
+def _process_frame(raw_data):
+    """Normalized DataFrame for process_data()/process_table(), or None when empty."""
     # Unwrap common response containers
     data = raw_data
     if isinstance(raw_data, dict):
-        # Yeni paginasyonlu endpoint için 'items' öncelikli
-        for key in ['items', 'data', 'Data', 'result', 'Result', 'results']:
-            if key in raw_data and isinstance(raw_data[key], (list, tuple)):
-                data = raw_data[key]
-                break
+        data = _unwrap_items(raw_data)
 
     df = pd.DataFrame(data)
     if df.empty:
-        return []
-
-    # Helper: normalize keys for matching
-    def norm(s):
-        try:
-            s = unicodedata.normalize('NFKD', str(s))
-            s = s.encode('ascii', 'ignore').decode('ascii')
-        except Exception:
-            s = str(s)
-        return re.sub(r'[^a-z0-9]+', '', s.lower())
-
-    cols_norm = {norm(c): c for c in df.columns}
-
-    # Target fields and candidate names (normalized)
-    target_candidates = {
-        'SİPARİŞ TARİHİ': ['tarih','sip_tarih','siparistarihi','siparistarih','siparis_tarih','sip_tar'],
-        'CARİ İSMİ': ['cari','cari_unvan','cariunvan','cariismi','cari_isim','cariadi','cari_ad'],
-        'Sorumluluk Merkezi Adı': ['srmad','sormerk_adi','sorumlulukmerkeziadi','sorumlulukmerkezi','sip_stok_sormerk','sormerk'],
-        'Sorumluluk Merkezi Kodu': ['srmkod','sormerk_kod','sorumlulukmerkezikodu','sormerk'],
-        'MİKTAR': ['miktar','sip_miktar','adet','quantity'],
-        'TAMAMLANAN MİKTAR': ['teslim','sip_teslim_miktar','teslim_miktar','tamamlanan_miktar','teslimmiktar','delivered'],
-        'KALAN MİKTAR': ['kalanmik','kalan_miktar','kalansiparis','remaining'],
-        'TUTAR': ['tutar','sip_tutar','brut_tutar','bruttutar','gross'],
-        'NET TUTAR': ['nettutar','net_tutar','sip_net_tutar'],
-        'KALAN SİPARİŞ NET TUTAR': ['kalannet','kalan_net','kalansiparisnettutar','sip_net_tutar','net_tutar','nettutar','kalantutar'],
-        'DOVİZ CİNSİ': ['doviz','sip_cins','doviz_cinsi','currency'],
-        'PROJE': ['proje','project','proje_adi','projeadi'],
-        'DURUM': ['durum','status','siparis_durum','siparisdurum']
-    }
+        return None
 
-    # Build canonical dataframe
-    out = pd.DataFrame()
-    for target, cands in target_candidates.items():
-        found = None
-        for cand in cands:
-            if cand in cols_norm:
-                found = cols_norm[cand]
-                break
-        if found is None:
-            # If original (already canonical) exists, use it
-            if target in df.columns:
-                found = target
-        if found is not None:
-            out[target] = df[found]
-        else:
-            out[target] = ''
+    # Build canonical dataframe (mapping memoized per incoming column set)
+    mapping = column_resolver.resolve(df.columns)
+    columns = {target: (df[src] if src is not None else '') for target, src in mapping.items()}
+    out = pd.DataFrame(columns, index=df.index)
 
-    # Numeric conversions using existing helpers
-    for num_col in ['MİKTAR', 'TAMAMLANAN MİKTAR', 'KALAN MİKTAR', 'TUTAR', 'NET TUTAR', 'KALAN SİPARİŞ NET TUTAR']:
+    # Numeric conversions (vectorized _parse_number)
+    for num_col in NUMERIC_COLUMNS:
         if num_col in out.columns:
-            out[num_col] = out[num_col].apply(_parse_number)
+            out[num_col] = _to_number_series(out[num_col])
 
     # Derived column - only calculate if not already provided
     if 'KALAN MİKTAR' not in out.columns or out['KALAN MİKTAR'].isna().all():
         out['KALAN MİKTAR'] = out['MİKTAR'] - out['TAMAMLANAN MİKTAR']
 
     # Date normalization to ISO (server-side convenience)
-    def parse_any_date(s):
-        iso = _parse_date_iso(s)
-        if iso:
-            return iso
-        try:
-            dt = pd.to_datetime(s, errors='coerce')
-            if pd.notna(dt):
-                return dt.date().isoformat()
-        except Exception:
-            pass
-        return None
-
-    out['date'] = out['SİPARİŞ TARİHİ'].apply(parse_any_date)
+    out['date'] = _to_iso_date_series(out['SİPARİŞ TARİHİ'])
 
     # Drop rows without valid date if data clearly represents orders
     # Keep if there is currency summary without date (optional)
     filtered = out[(out['date'].notnull()) | ((out['DOVİZ CİNSİ'] != '') & (out['KALAN SİPARİŞ NET TUTAR'] > 0))]
 
-    records = filtered.to_dict('records')
-    if not records:
+    if filtered.empty:
         logger.warning('Processed data is empty after normalization; returning original rows as fallback.')
-        records = out.to_dict('records')
-    return records
+        return out
+    return filtered
+
+def process_data(raw_data):
+    """
+    Normalize remote API data to match dashboard expectations.
+    Handles alternate field names, type conversions, and date parsing.
+    """
+    frame = _process_frame(raw_data)
+    return _frame_to_records(frame) if frame is not None else []
+
+def process_table(raw_data):
+    """process_data() into the columnar OrderTable held by the cache (no per-row dicts)."""
+    frame = _process_frame(raw_data)
+    return OrderTable.from_frame(frame) if frame is not None else OrderTable.from_records([])
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Üretilen veri dosyaları (SQLite deposu, Arrow snapshot) web kökü BASE_DIR dışında tutulur
+DATA_DIR = os.getenv('DATA_DIR', '').strip() or os.path.join(tempfile.gettempdir(), 'cvsair-data')
+
+def resolve_data_path(p):
+    """Absolute path for a generated data file; relative paths live under DATA_DIR."""
+    return p if os.path.isabs(p) else os.path.join(DATA_DIR, p)
 CSV_PATH_ENV = os.getenv('CSV_PATH', '').strip()
 
 def resolve_csv_path():
@@ -266,6 +632,943 @@ def resolve_csv_path():
         p = os.path.join(BASE_DIR, p)
     return p
 
+# Opsiyonel: CSV değişikliklerini arka planda izle (saniye; 0 = kapalı); start_background_jobs() başlatır
+CSV_WATCH_INTERVAL = float(os.getenv('CSV_WATCH_INTERVAL', '0') or 0)
+
+# Excel -> Arrow snapshot (excel-to-csv.js yerine sunucu içi dönüştürme)
+XLSX_DIR = os.getenv('XLSX_DIR', '').strip() or BASE_DIR
+SNAPSHOT_PATH_ENV = os.getenv('ORDERS_SNAPSHOT_PATH', '').strip()
+_ingest_lock = threading.Lock()
+
+def resolve_snapshot_path():
+    return resolve_data_path(SNAPSHOT_PATH_ENV if SNAPSHOT_PATH_ENV else 'orders.arrow')
+
+def ingest_order_workbook(force=False):
+    """
+    Convert the newest ALINAN SİPARİŞ LER *.xlsx into the Arrow snapshot if the
+    workbook changed since the last ingest. Returns the snapshot path, or None
+    when there is no workbook or openpyxl/pyarrow are not installed.
+    """
+    if not xlsx_ingest.AVAILABLE:
+        return None
+    workbook = xlsx_ingest.find_order_workbook(XLSX_DIR)
+    if not workbook:
+        return None
+    snapshot_path = resolve_snapshot_path()
+    _, mtime_ns, size = file_signature(workbook)
+    source = {'workbook': os.path.basename(workbook), 'mtime_ns': mtime_ns, 'size': size}
+    with _ingest_lock:
+        if not force and xlsx_ingest.read_snapshot_source(snapshot_path) == source:
+            return snapshot_path
+        logger.info(f"Ingesting workbook {workbook}")
+        columns = xlsx_ingest.read_workbook_columns(workbook)
+        frame = _normalize_order_sheet(pd.DataFrame(columns))
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        xlsx_ingest.write_snapshot(frame, snapshot_path, source=source)
+    return snapshot_path
+
+# Kur tablosu (çevrimdışı güncellenen dosya): ?convert=TRY|USD|EUR dönüşümleri için
+FX_RATES_PATH_ENV = os.getenv('FX_RATES_PATH', '').strip()
+_fx_source = None
+
+def resolve_fx_rates_path():
+    p = FX_RATES_PATH_ENV if FX_RATES_PATH_ENV else 'fx_rates.csv'
+    if not os.path.isabs(p):
+        p = os.path.join(BASE_DIR, p)
+    return p
+
+def fx_rate_table():
+    """Current FxRateTable, reparsed only when the rate file changes. Raises FxError if unusable."""
+    global _fx_source
+    path = resolve_fx_rates_path()
+    if _fx_source is None or _fx_source.path != path:
+        _fx_source = CsvOrderSource(path, FxRateTable.from_file)
+    try:
+        return _fx_source.records()
+    except FxError:
+        raise
+    except Exception as e:
+        raise FxError(f"FX rates unavailable ({path}): {e}") from None
+
+def convert_target(args):
+    """Target currency of ?convert=, checked against the rate table; None when not requested."""
+    raw = (args.get('convert') or '').strip()
+    return fx_rate_table().check(raw) if raw else None
+
+def convert_records(records, currency):
+    """records with converted amount columns for currency (None = unchanged)."""
+    return convert_table(records, fx_rate_table(), currency) if currency else records
+
+_snapshot_source = None
+
+def read_fallback_orders(key=None):
+    """
+    Offline order records when the remote API is unavailable, in order of
+    preference: last synced ERP data from the local snapshot store (for key,
+    else the all-pages dataset), the memory-mapped xlsx snapshot (re-ingested
+    when the workbook changes), orders.csv. Returns (records, source_label).
+    """
+    with timings.span('fallback'):
+        records, label = _read_fallback_orders(key)
+    FALLBACKS.inc(source=label)
+    return records, label
+
+def _read_fallback_orders(key):
+    global _snapshot_source
+    for store_key in (key, orders_cache_key(all_pages=True)):
+        if store_key is None:
+            continue
+        dataset, _ = load_stored_dataset(store_key)
+        if dataset is not None:
+            return dataset['records'], 'Local snapshot'
+    try:
+        snapshot_path = ingest_order_workbook()
+        if snapshot_path:
+            if _snapshot_source is None or _snapshot_source.path != snapshot_path:
+                _snapshot_source = CsvOrderSource(
+                    snapshot_path, lambda path: OrderTable.from_frame(xlsx_ingest.read_snapshot_frame(path)))
+            return _snapshot_source.records(), 'xlsx snapshot'
+    except Exception as e:
+        logger.warning(f"Workbook snapshot unavailable, using CSV: {e}")
+    csv_path = resolve_csv_path()
+    logger.info(f"CSV fallback using path: {csv_path}")
+    return read_orders_from_csv(csv_path), 'CSV'
+
+def orders_cache_key(page_index=0, page_size=500, base_url=None, all_pages=False):
+    if all_pages:
+        return (base_url or REMOTE_API_BASE, 'all', ALL_PAGES_PAGE_SIZE)
+    return (base_url or REMOTE_API_BASE, page_index, page_size)
+
+def load_processed_orders(page_index=0, page_size=500, base_url=None, force_refresh=False, all_pages=False):
+    """
+    Fetch and normalize orders through the process-wide cache.
+    all_pages=True walks every remote page (page_index is ignored).
+    Returns (dataset, cache_meta); dataset = {'records': OrderTable, 'fetch': {...}}.
+    Complete all-pages results are also persisted to the local snapshot store
+    (in the background; see schedule_persist).
+    """
+    key = orders_cache_key(page_index, page_size, base_url, all_pages)
+
+    def fetch():
+        if all_pages:
+            with timings.span('upstream'):
+                merged = get_all_siparisler(base_url=base_url)
+            fetch_info = {k: v for k, v in merged.items() if k != 'items'}
+            with timings.span('normalize'):
+                dataset = {'records': process_table(merged['items']), 'fetch': fetch_info}
+            if not fetch_info.get('partial'):
+                schedule_persist(key, dataset)
+            return dataset
+        with timings.span('upstream'):
+            raw_data = get_siparisler(page_index=page_index, page_size=page_size, base_url=base_url)
+        with timings.span('normalize'):
+            return {'records': process_table(raw_data), 'fetch': {'pages': 1, 'partial': False}}
+
+    def loader():
+        if shared_cache is None:
+            return fetch()
+        return load_shared_dataset(key, fetch, force_refresh)
+
+    dataset, cache_meta = orders_cache.get(key, loader, force_refresh=force_refresh)
+    timings.note('cache', cache_meta['status'])
+    return dataset, cache_meta
+
+# Yerel kalıcı sipariş deposu (SQLite); boş ORDERS_DB_PATH = kapalı
+ORDERS_DB_PATH_ENV = os.getenv('ORDERS_DB_PATH', 'orders_snapshot.sqlite3').strip()
+ORDERS_SYNC_INTERVAL = float(os.getenv('ORDERS_SYNC_INTERVAL', '300') or 0)
+
+def _open_snapshot_store():
+    if not ORDERS_DB_PATH_ENV:
+        return None
+    path = resolve_data_path(ORDERS_DB_PATH_ENV)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return OrderSnapshotStore(path)
+    except Exception as e:
+        logger.warning(f"Snapshot store disabled ({path}): {e}")
+        return None
+
+snapshot_store = _open_snapshot_store()
+
+def _store_dataset_name(key):
+    return '|'.join(str(part) for part in key)
+
+def persist_dataset(key, dataset):
+    """Delta-sync a freshly loaded dataset into the snapshot store (best effort)."""
+    if snapshot_store is None:
+        return
+    try:
+        snapshot_store.save(_store_dataset_name(key), as_records(dataset['records']), meta=dataset.get('fetch'))
+    except Exception as e:
+        logger.warning(f"Snapshot store save failed: {e}")
+
+# Depo yazımı istek yolunda değil: tek thread'lik kuyruk, anahtar başına yalnızca en yeni veri yazılır
+_persist_lock = threading.Lock()
+_persist_pending = {}
+_persist_executor = None  # (pid, executor): fork sonrası thread'ler taşınmaz, yeniden kurulur
+
+def _persist_worker():
+    global _persist_executor
+    with _persist_lock:
+        if _persist_executor is None or _persist_executor[0] != os.getpid():
+            _persist_executor = (os.getpid(), ThreadPoolExecutor(max_workers=1, thread_name_prefix='orders-persist'))
+        return _persist_executor[1]
+
+def _run_persist(key):
+    with _persist_lock:
+        dataset = _persist_pending.pop(key, None)
+    if dataset is None:
+        return
+    # Bu thread'de istek zamanlayıcısı yok: süre yalnızca histogram'a gider
+    with timings.span('persist'):
+        persist_dataset(key, dataset)
+    # Aylık küpler de burada güncellenir (depodaki küpler çevrimdışı yanıt için taze kalsın);
+    # /api/reports/monthly önce gelirse küpü kendisi kurar
+    try:
+        with timings.span('report_cube'):
+            dataset_report_cube(key, dataset)
+    except Exception as e:
+        logger.warning(f"Report cube update failed: {e}")
+
+def schedule_persist(key, dataset):
+    """
+    Queue a background persist_dataset() + report cube update; a newer
+    dataset for the same key replaces a queued one.
+    """
+    if snapshot_store is None and report_cubes.store is None:
+        return
+    with _persist_lock:
+        queued = key in _persist_pending
+        _persist_pending[key] = dataset
+    if not queued:
+        _persist_worker().submit(_run_persist, key)
+
+# Aylık rapor küpleri; varsayılan olarak sipariş deposuyla aynı SQLite dosyası
+REPORT_CUBES_DB_PATH = os.getenv('REPORT_CUBES_DB_PATH', ORDERS_DB_PATH_ENV).strip()
+
+def _open_report_cube_store():
+    if not REPORT_CUBES_DB_PATH:
+        return None
+    path = resolve_data_path(REPORT_CUBES_DB_PATH)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return ReportCubeStore(path)
+    except Exception as e:
+        logger.warning(f"Report cube store disabled ({path}): {e}")
+        return None
+
+report_cubes = MonthlyCubes(store=_open_report_cube_store())
+
+def dataset_report_cube(key, dataset):
+    """
+    Monthly cube state for a dataset, once per dataset: for complete loads only
+    the months whose rows changed since the last materialization are
+    re-aggregated and persisted; partial loads get a throwaway cube.
+    """
+    if dataset['fetch'].get('partial'):
+        return _dataset_memo(dataset, 'report_cube', report_cubes.build)
+    return _dataset_memo(dataset, 'report_cube',
+                         lambda records: report_cubes.update(_store_dataset_name(key), records)[0])
+
+def load_stored_dataset(key):
+    """(dataset, age_seconds) from the snapshot store, or (None, None)."""
+    if snapshot_store is None:
+        return None, None
+    try:
+        records, info = snapshot_store.load(_store_dataset_name(key))
+    except Exception as e:
+        logger.warning(f"Snapshot store load failed: {e}")
+        return None, None
+    if records is None:
+        return None, None
+    fetch_info = dict(info.get('meta') or {}, source='store', synced_at=info['synced_at'])
+    return {'records': OrderTable.from_records(records), 'fetch': fetch_info}, max(time.time() - info['synced_at'], 0.0)
+
+# İşçiler arası ortak veri kopyası (gunicorn); boş SHARED_CACHE = kapalı, 'file' veya redis:// URL
+SHARED_CACHE = os.getenv('SHARED_CACHE', '').strip()
+SHARED_CACHE_DIR = os.getenv('SHARED_CACHE_DIR', '').strip() or os.path.join(tempfile.gettempdir(), 'cvsair-shared-cache')
+SHARED_CACHE_WAIT = float(os.getenv('SHARED_CACHE_WAIT', '90') or 0)
+
+def _open_shared_cache():
+    try:
+        return open_shared_cache(SHARED_CACHE, SHARED_CACHE_DIR)
+    except Exception as e:
+        logger.warning(f"Shared cache disabled ({SHARED_CACHE}): {e}")
+        return None
+
+shared_cache = _open_shared_cache()
+
+def read_shared_dataset(key, max_age=None):
+    """(dataset, age_seconds) some worker published for key, or (None, None) (also when older than max_age)."""
+    if shared_cache is None:
+        return None, None
+    shared = shared_cache.read(_store_dataset_name(key))
+    if shared is None:
+        return None, None
+    dataset, info = shared
+    age = max(time.time() - info['published_at'], 0.0)
+    if max_age is not None and age >= max_age:
+        return None, None
+    return dataset, age
+
+def publish_shared_dataset(key, dataset):
+    """
+    Publish a complete dataset (with its summary and etag) for the other
+    workers. Returns the shared copy carrying dataset's other memos, or
+    dataset itself when nothing was published.
+    """
+    if shared_cache is None or dataset['fetch'].get('partial'):
+        return dataset
+    try:
+        with timings.span('publish'):
+            shared, _ = shared_cache.publish(_store_dataset_name(key), dataset,
+                                             memos={'summary': dataset_summary(dataset), 'etag': dataset_etag(dataset)})
+    except Exception as e:
+        logger.warning(f"Shared cache publish failed: {e}")
+        return dataset
+    for name, value in dataset.items():
+        if name != '_memo_locks':
+            shared.setdefault(name, value)
+    return shared
+
+def load_shared_dataset(key, fetch, force_refresh=False):
+    """
+    Cache loader with a shared cache configured: a shared copy younger than
+    ORDERS_CACHE_TTL is used as is; otherwise the worker holding the refresh
+    lease calls fetch() and publishes the result, while workers waiting on
+    the lease pick that result up instead of calling the ERP again.
+    """
+    name = _store_dataset_name(key)
+    started = time.time()
+    if not force_refresh:
+        dataset, _ = read_shared_dataset(key, max_age=ORDERS_CACHE_TTL)
+        if dataset is not None:
+            timings.note('shared', 'hit')
+            return dataset
+    with shared_cache.lease(name, SHARED_CACHE_WAIT) as leader:
+        shared = shared_cache.read(name)
+        if shared is not None and shared[1]['published_at'] >= started:
+            # Beklerken başka bir işçi yeniledi
+            timings.note('shared', 'waited')
+            return shared[0]
+        if not leader:
+            logger.warning(f"Shared cache lease for {name} still held after {SHARED_CACHE_WAIT}s; loading anyway")
+        timings.note('shared', 'lead' if leader else 'timeout')
+        return publish_shared_dataset(key, fetch())
+
+def upstream_refresh_due(key, max_age):
+    """False when some worker published key to the shared cache less than max_age seconds ago."""
+    if shared_cache is None:
+        return True
+    age = shared_cache.age(_store_dataset_name(key))
+    return age is None or age >= max_age
+
+def adopt_shared_dataset(key):
+    """Put the shared copy of key into this worker's cache (back-dated to its publish time); returns it or None."""
+    dataset, age = read_shared_dataset(key)
+    if dataset is None:
+        return None
+    orders_cache.put(key, dataset, age=min(age, ORDERS_CACHE_TTL))
+    return dataset
+
+def warm_cache_from_store():
+    """
+    Seed the cache with the shared copy or the last persisted all-pages dataset
+    so a cold worker answers immediately; data older than the TTL is served
+    stale and refreshed.
+    """
+    key = orders_cache_key(all_pages=True)
+    if orders_cache.peek(key) is not None:
+        return False
+    dataset = adopt_shared_dataset(key)
+    if dataset is not None:
+        logger.info(f"Cache warmed from shared cache: {len(dataset['records'])} records")
+        return True
+    dataset, age = load_stored_dataset(key)
+    if dataset is None:
+        return False
+    orders_cache.put(key, dataset, age=min(age, ORDERS_CACHE_TTL))
+    logger.info(f"Cache warmed from snapshot store: {len(dataset['records'])} records, {age:.0f}s old")
+    return True
+
+def _store_sync_loop(interval):
+    key = orders_cache_key(all_pages=True)
+    while True:
+        time.sleep(interval)
+        try:
+            # Başka bir işçi az önce yenilediyse ERP yerine onun kopyası alınır
+            if upstream_refresh_due(key, interval / 2) or adopt_shared_dataset(key) is None:
+                load_processed_orders(all_pages=True, force_refresh=True)
+        except Exception as e:
+            logger.warning(f"Background order sync failed: {e}")
+
+_background_jobs_started = False
+_background_jobs_lock = threading.Lock()
+
+def start_background_jobs():
+    """
+    Start the periodic ERP -> snapshot store sync and the optional CSV watcher
+    (once per worker process; threads do not survive a gunicorn preload fork).
+    """
+    global _background_jobs_started
+    with _background_jobs_lock:
+        if _background_jobs_started:
+            return
+        _background_jobs_started = True
+    if snapshot_store is not None and ORDERS_SYNC_INTERVAL > 0:
+        threading.Thread(target=_store_sync_loop, args=(ORDERS_SYNC_INTERVAL,),
+                         name='orders-store-sync', daemon=True).start()
+    if CSV_WATCH_INTERVAL > 0:
+        get_csv_source(resolve_csv_path()).start_watcher(CSV_WATCH_INTERVAL)
+
+# Açılış ısınması: pandas importu, kolon eşlemesi ve son veri ilk istekten önce hazır olsun
+WARMUP_SAMPLE_PATH = os.getenv('WARMUP_SAMPLE_PATH', '').strip() or os.path.join(BASE_DIR, 'response_1762507572202.json')
+WARMUP_EXEMPT_PATHS = ('/api/health', '/api/metrics')
+_startup = {'import_seconds': None, 'imported_by': os.getpid(), 'warmups': []}
+_warmed_pid = None
+_warm_lock = threading.Lock()
+
+def warm_worker(mode='first_request'):
+    """
+    Pre-request warm-up, once per process: import the pandas stack, compile
+    the column mapping for the ERP schema (by normalizing the bundled sample
+    response) and seed the cache from the shared copy or the snapshot store.
+    Called by gunicorn.conf.py (in the master with preload_app, then in each
+    worker after fork), the ASGI lifespan, or else the first request.
+    Stage timings are reported under 'startup' in /api/health.
+    """
+    global _warmed_pid
+    with _warm_lock:
+        if _warmed_pid == os.getpid():
+            return None
+        _warmed_pid = os.getpid()
+        started = time.perf_counter()
+        stages = {}
+        t0 = time.perf_counter()
+        lazy_load(pd)
+        stages['imports'] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        try:
+            with open(WARMUP_SAMPLE_PATH, 'rb') as f:
+                process_table(json.loads(f.read()))
+        except (OSError, ValueError) as e:
+            logger.info(f"Warm-up sample skipped ({WARMUP_SAMPLE_PATH}): {e}")
+        stages['column_mapping'] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        if ORDERS_CACHE_TTL > 0:
+            try:
+                warm_cache_from_store()
+            except Exception as e:
+                logger.warning(f"Cache warm-up failed: {e}")
+        stages['cache'] = time.perf_counter() - t0
+        record = {
+            'mode': mode,
+            'pid': os.getpid(),
+            'seconds': round(time.perf_counter() - started, 4),
+            'stages': {k: round(v, 4) for k, v in stages.items()},
+            'cached_rows': (cached_table_stats() or {}).get('rows'),
+            'ready_after': round(time.perf_counter() - _IMPORT_STARTED, 4),
+            'finished_at': datetime.now().isoformat(),
+        }
+        _startup['warmups'].append(record)
+    logger.info(f"Warm-up ({mode}, pid {record['pid']}) finished in {record['seconds']}s: {record['stages']}")
+    return record
+
+def startup_stats():
+    """/api/health 'startup' block: import time, warm-ups (master and worker) and uptime."""
+    return {
+        'pid': os.getpid(),
+        'preloaded': _startup['imported_by'] != os.getpid(),
+        'import_seconds': _startup['import_seconds'],
+        'warmups': list(_startup['warmups']),
+        'uptime_seconds': round(time.perf_counter() - _IMPORT_STARTED, 1),
+    }
+
+@app.before_request
+def _start_request_timing():
+    g.request_timer, g.request_timer_token = timings.begin()
+    g.profile = request_profiler.start() if PROFILE_REQUESTS and _flag('profile') else None
+
+@app.after_request
+def _finish_request_timing(response):
+    """Latency histogram, Server-Timing header and the optional profile dump (runs after compression)."""
+    timer = g.get('request_timer')
+    if timer is None:
+        return response
+    profile = g.pop('profile', None)
+    if profile is not None:
+        response.headers['X-Profile-File'] = os.path.basename(request_profiler.stop(profile, request.path))
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    REQUEST_SECONDS.observe(timer.elapsed(), route=route, method=request.method, status=response.status_code)
+    if SERVER_TIMING and request.path.startswith('/api/'):
+        response.headers['Server-Timing'] = timer.server_timing()
+    return response
+
+@app.teardown_request
+def _end_request_timing(error=None):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.disable()  # hata nedeniyle after_request çalışmadı
+    token = g.pop('request_timer_token', None)
+    if token is not None:
+        timings.end(token)
+
+@app.before_request
+def _ensure_background_jobs():
+    # Isınma hook'larla yapılmadıysa ilk veri isteği öder (health/metrics beklemez)
+    if _warmed_pid != os.getpid() and request.path.startswith('/api/') and request.path not in WARMUP_EXEMPT_PATHS:
+        warm_worker()
+    if not _background_jobs_started:
+        start_background_jobs()
+
+@app.after_request
+def _compress_response(response):
+    """gzip/br-compress buffered JSON/text responses (streams compress themselves)."""
+    if (not RESPONSE_COMPRESSION or response.direct_passthrough or response.is_streamed
+            or not 200 <= response.status_code < 300 or response.status_code == 204
+            or 'Content-Encoding' in response.headers or not is_compressible(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None or response.content_length is None or response.content_length < COMPRESS_MIN_BYTES:
+        return response
+    with timings.span('compress'):
+        response.set_data(compress_bytes(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+_memo_locks_guard = threading.Lock()
+
+def _dataset_memo(dataset, name, builder):
+    """
+    Compute a derived structure once per cached dataset and keep it next to the records.
+    Builds are serialized per (dataset, name) only: other memos and other datasets never
+    wait behind a slow build.
+    """
+    value = dataset.get(name)
+    if value is not None:
+        return value
+    with _memo_locks_guard:
+        # Kilit sözlüğü veri kümesinin içinde; veri kümesiyle birlikte silinir
+        lock = dataset.setdefault('_memo_locks', {}).setdefault(name, threading.Lock())
+    with lock:
+        value = dataset.get(name)
+        if value is None:
+            value = builder(dataset['records'])
+            dataset[name] = value
+    return value
+
+# /api/orders/summary grup başına varsayılan satır sınırı (0 = sınırsız)
+SUMMARY_LIMIT = int(os.getenv('SUMMARY_LIMIT', '25') or 0)
+
+def dataset_summary(dataset):
+    """Unfiltered all-groups summary (top SUMMARY_LIMIT rows per group), computed once per cached dataset."""
+    return _dataset_memo(dataset, 'summary',
+                         lambda records: summarize_records(records, limit=SUMMARY_LIMIT or None,
+                                                           currency=dataset.get('currency')))
+
+def converted_dataset(dataset, currency):
+    """
+    Dataset view with amounts converted to currency (None = dataset itself).
+    Memoized per (currency, rate table version), so the as-of rate lookup runs
+    once per loaded dataset; the view has its own summary/index/etag memos.
+    """
+    if not currency:
+        return dataset
+    fx = fx_rate_table()
+    return _dataset_memo(dataset, ('fx', currency, fx.version),
+                         lambda records: {'records': convert_table(records, fx, currency),
+                                          'fetch': dataset['fetch'], 'currency': currency})
+
+def dataset_etag(dataset):
+    """Content hash of the processed records, computed once per cached dataset."""
+    return _dataset_memo(dataset, 'etag',
+                         lambda records: records.digest() if isinstance(records, OrderTable)
+                         else hashlib.blake2b(dumps(records), digest_size=16).hexdigest())
+
+def orders_etag(req, dataset):
+    """
+    Weak ETag for an /api/orders response: dataset content plus every request
+    parameter that shapes the body. Weak because the 'cache' block (age/status)
+    differs between otherwise identical responses.
+    """
+    params = {k: req[k] for k in ('page_index', 'page_size', 'bas_tar', 'bit_tar', 'all_pages', 'query', 'convert')}
+    dataset = converted_dataset(dataset, req['convert'])
+    digest = hashlib.blake2b(dataset_etag(dataset).encode('ascii') + dumps(params), digest_size=16)
+    return digest.hexdigest()
+
+def dataset_index(dataset):
+    """OrderIndex (sorted dates, categorical codes, sort ranks) for a cached dataset."""
+    return _dataset_memo(dataset, 'index', OrderIndex)
+
+# Canlı güncellemeler (SSE): abone varken tek arka plan yenileyici, her aralıkta bir upstream çağrısı
+LIVE_REFRESH_INTERVAL = float(os.getenv('LIVE_REFRESH_INTERVAL', '60') or 60)
+LIVE_HEARTBEAT = float(os.getenv('LIVE_HEARTBEAT', '15') or 15)
+live_updates = OrderBroadcaster(max_subscribers=int(os.getenv('LIVE_MAX_SUBSCRIBERS', '50') or 50))
+# Flask/gthread: her SSE istemcisi bağlantı boyunca bir işçi thread'i tutar; bu kadarı diğer isteklere kalır
+LIVE_RESERVED_THREADS = int(os.getenv('LIVE_RESERVED_THREADS', '2') or 0)
+_live_wakeup = threading.Event()
+_live_refresher_started = False
+_live_refresher_lock = threading.Lock()
+
+def live_refresh_once():
+    """Load the all-pages dataset and publish it to SSE subscribers (skips partial loads)."""
+    # İlk yayında önbellekteki veri yeterli; sonrasında her turda upstream'den taze çekilir
+    # (başka bir işçi bu aralıkta yenilediyse onun ortak kopyası)
+    key = orders_cache_key(all_pages=True)
+    dataset = None
+    if live_updates.version > 0 and not upstream_refresh_due(key, LIVE_REFRESH_INTERVAL / 2):
+        dataset = adopt_shared_dataset(key)
+    if dataset is None:
+        dataset, _ = load_processed_orders(all_pages=True, force_refresh=live_updates.version > 0)
+    if dataset['fetch'].get('partial'):
+        logger.warning(f"Live refresh skipped: partial load {dataset['fetch'].get('failed_pages')}")
+        return None
+    summary = dataset_summary(dataset)
+    return live_updates.publish(as_records(dataset['records']),
+                                {'totals': summary['totals'], 'by_currency': summary['by_currency']})
+
+def _live_refresh_loop(interval):
+    while True:
+        _live_wakeup.clear()
+        if live_updates.subscriber_count():
+            try:
+                live_refresh_once()
+            except Exception as e:
+                logger.warning(f"Live refresh failed: {e}")
+                live_updates.publish_error(e)
+        _live_wakeup.wait(interval)
+
+def limit_live_subscribers(threads):
+    """
+    Cap SSE subscribers at threads - LIVE_RESERVED_THREADS for a threaded
+    worker (gunicorn post_fork), so open dashboards can't take every thread
+    and hang /api/* and static requests. 0 disables the stream (503).
+    """
+    cap = max(0, int(threads) - LIVE_RESERVED_THREADS)
+    if cap < live_updates.max_subscribers:
+        live_updates.max_subscribers = cap
+        logger.info(f"Live subscribers capped at {cap} ({threads} worker threads)")
+    return live_updates.max_subscribers
+
+def ensure_live_refresher():
+    """Start the SSE refresher thread once per worker; wake it if nothing was published yet."""
+    global _live_refresher_started
+    with _live_refresher_lock:
+        if not _live_refresher_started:
+            _live_refresher_started = True
+            # İlk tur hemen yeniler; ayrıca uyandırmaya gerek yok
+            threading.Thread(target=_live_refresh_loop, args=(LIVE_REFRESH_INTERVAL,),
+                             name='orders-live-refresh', daemon=True).start()
+            return
+    if live_updates.version == 0:
+        _live_wakeup.set()
+
+def _arg_int(args, name, default=None):
+    """Integer query arg; default when missing or not an int (like Flask's type=int)."""
+    val = args.get(name)
+    if val is None:
+        return default
+    try:
+        return int(val)
+    except (TypeError, ValueError):
+        return default
+
+def _arg_float(args, name, default=None):
+    """Float query arg; default when missing or not a number."""
+    val = args.get(name)
+    if val is None or not str(val).strip():
+        return default
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return default
+
+def _arg_flag(args, name, default=False):
+    val = args.get(name)
+    if val is None:
+        return default
+    return val.lower() in ('1', 'true', 'yes')
+
+def _parse_order_query(args):
+    """
+    Read filter/sort/paging query parameters for /api/orders.
+    q: text search on customer/project; currency/status/center: comma lists;
+    minAmount: minimum remaining net amount;
+    sort: comma list of fields, '-' prefix for descending (e.g. -date,customer);
+    offset/limit: paging. Returns {} when none are given; QueryError on bad sort fields.
+    """
+    query = {}
+    bas_tar = args.get('startDate')
+    bit_tar = args.get('endDate')
+    if bas_tar or bit_tar:
+        query['start'] = bas_tar
+        query['end'] = bit_tar
+    search = args.get('q')
+    if search:
+        query['search'] = search
+    filters = {}
+    for name in CATEGORY_FILTERS:
+        raw = args.get(name)
+        if raw:
+            filters[name] = [v.strip() for v in raw.split(',') if v.strip()]
+    if filters:
+        query['filters'] = filters
+    min_amount = _arg_float(args, 'minAmount')
+    if min_amount:
+        query['min_amount'] = min_amount
+    sort = args.get('sort')
+    if sort:
+        query['sort'] = [f.strip() for f in sort.split(',') if f.strip()]
+        parse_sort(query['sort'])
+    offset = _arg_int(args, 'offset')
+    limit = _arg_int(args, 'limit')
+    if offset:
+        query['offset'] = offset
+    if limit is not None and limit > 0:
+        query['limit'] = limit
+    return query
+
+# /api/orders/summary: sıralama/sayfalama olmadan aynı filtreler
+SUMMARY_QUERY_KEYS = ('start', 'end', 'search', 'filters', 'min_amount')
+
+def _parse_summary_query(args):
+    """The /api/orders filters (dates, q, currency/status/center, minAmount) without sort or paging."""
+    return {k: v for k, v in _parse_order_query(args).items() if k in SUMMARY_QUERY_KEYS}
+
+def run_order_query(records, query, index=None):
+    """Apply a parsed query; returns (total_matches, records_page)."""
+    if not query:
+        return len(records), records
+    with timings.span('filter'):
+        index = index or OrderIndex(records)
+        return index.query(**query)
+
+def _check_api_token():
+    """Optional API token guard; returns an error response or None."""
+    if API_TOKEN_ENV:
+        provided = request.headers.get('X-API-Token') or request.args.get('api_token')
+        if provided != API_TOKEN_ENV:
+            return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    return None
+
+def _selected_base_url(args=None):
+    args = request.args if args is None else args
+    base_url_override = args.get('baseUrl')
+    allowed_bases = { REMOTE_API_BASE, 'http://85.153.155.153:5047' }  # sadece izin verilenler
+    return base_url_override if base_url_override in allowed_bases else None
+
+def _flag(name, default=False):
+    return _arg_flag(request.args, name, default)
+
+def _stream_format(args):
+    fmt = (args.get('stream') or '').strip().lower()
+    if fmt in ('1', 'true', 'yes'):
+        fmt = 'json'
+    return fmt if fmt in STREAM_FORMATS else None
+
+def parse_orders_request(args):
+    """
+    Framework-neutral parsing of /api/orders query args (Flask request.args or
+    Starlette query_params). Raises QueryError on invalid sort fields, FxError
+    on a ?convert= currency the rate table cannot convert into.
+    """
+    query = _parse_order_query(args)
+    return {
+        'page_index': _arg_int(args, 'pageIndex', 0),
+        'page_size': _arg_int(args, 'pageSize', 500),
+        'bas_tar': args.get('startDate'),
+        'bit_tar': args.get('endDate'),
+        'selected_base': _selected_base_url(args),
+        'force_refresh': _arg_flag(args, 'refresh'),
+        'all_pages': _arg_flag(args, 'all'),
+        'stream': _stream_format(args),
+        'convert': convert_target(args),
+        'query': query,
+        'paging': {'offset': query.get('offset', 0), 'limit': query.get('limit')},
+    }
+
+def orders_payload(req, dataset, cache_meta):
+    """/api/orders response body for a loaded dataset."""
+    dataset = converted_dataset(dataset, req['convert'])
+    fetch_info = dataset['fetch']
+    query = req['query']
+    # Opsiyonel filtre/sıralama/sayfalama: önbellekteki indeks üzerinde çalışır
+    total, processed_data = run_order_query(
+        dataset['records'], query,
+        index=dataset_index(dataset) if query else None
+    )
+    logger.info(f"Successfully processed {len(processed_data)} orders from API")
+    ROWS_SERVED.inc(len(processed_data), route='orders')
+    return {
+        'success': True,
+        'data': as_records(processed_data),
+        'count': len(processed_data),
+        'total': total,
+        'date_range': {
+            'start': req['bas_tar'],
+            'end': req['bit_tar']
+        },
+        'page': {
+            'index': req['page_index'],
+            'size': req['page_size'],
+            **req['paging'],
+            'all': req['all_pages'],
+            'fetched': fetch_info.get('pages', 1),
+            'failed': fetch_info.get('failed_pages', [])
+        },
+        'partial': fetch_info.get('partial', False),
+        'cache': cache_meta
+    }
+
+def fallback_orders_payload(req):
+    """/api/orders response body when the remote API is unavailable."""
+    logger.info("Falling back to offline data (snapshot store, xlsx, CSV)...")
+    try:
+        fallback_records, fallback_label = read_fallback_orders(
+            orders_cache_key(req['page_index'], req['page_size'], req['selected_base'], req['all_pages']))
+        total, csv_data = run_order_query(convert_records(fallback_records, req['convert']), req['query'])
+        logger.info(f"Returning {len(csv_data)} orders from {fallback_label} fallback")
+        ROWS_SERVED.inc(len(csv_data), route='orders')
+        return {
+            'success': True,
+            'data': as_records(csv_data),
+            'count': len(csv_data),
+            'total': total,
+            'note': f'{fallback_label} fallback - Original API unavailable',
+            'date_range': {
+                'start': req['bas_tar'],
+                'end': req['bit_tar']
+            },
+            'page': {
+                'index': req['page_index'],
+                'size': req['page_size'],
+                **req['paging']
+            }
+        }
+    except Exception as csv_error:
+        logger.error(f"CSV fallback failed: {csv_error}")
+        return {
+            'success': True,
+            'data': [],
+            'count': 0,
+            'note': 'No data: API and CSV unavailable',
+            'date_range': {
+                'start': req['bas_tar'],
+                'end': req['bit_tar']
+            },
+            'page': {
+                'index': req['page_index'],
+                'size': req['page_size']
+            }
+        }
+
+def _batched(records, size=None):
+    size = max(1, int(size or STREAM_CHUNK_ROWS))
+    for i in range(0, len(records), size):
+        yield as_records(records[i:i + size])
+
+def iter_order_batches(req, state):
+    """
+    Processed record batches for a streamed /api/orders response.
+    Cached datasets and filtered/sorted/paged queries (which need the whole
+    set) are served from the loaded dataset; otherwise each upstream page is
+    normalized and yielded as it arrives, so the full result is never held in
+    memory (and the streamed result is not cached). state collects total,
+    failed_pages and cache for the trailer.
+    """
+    key = orders_cache_key(req['page_index'], req['page_size'], req['selected_base'], req['all_pages'])
+    cached = None if req['force_refresh'] else orders_cache.lookup(key)[0]
+    if req['query'] or req['convert'] or cached is not None:
+        dataset, cache_meta = load_processed_orders(
+            page_index=req['page_index'], page_size=req['page_size'],
+            base_url=req['selected_base'], force_refresh=req['force_refresh'],
+            all_pages=req['all_pages'])
+        dataset = converted_dataset(dataset, req['convert'])
+        total, records = run_order_query(dataset['records'], req['query'],
+                                         index=dataset_index(dataset) if req['query'] else None)
+        state.update(total=total, cache=cache_meta,
+                     failed_pages=list(dataset['fetch'].get('failed_pages', [])))
+        yield from _batched(records)
+        return
+
+    state['cache'] = {'status': 'stream', 'age': 0.0}
+    if not req['all_pages']:
+        yield process_data(get_siparisler(req['page_index'], req['page_size'], req['selected_base']))
+        return
+    info = {}
+    for idx, rows in iter_siparis_pages(base_url=req['selected_base'], info=info):
+        state['total'] = info.get('total')
+        if rows is None:
+            state['failed_pages'].append(idx)
+        elif rows:
+            yield process_data(rows)
+
+def stream_order_chunks(req, accept_encoding=None):
+    """
+    Chunked /api/orders body (?stream=ndjson or ?stream=json) as
+    (chunks, mimetype, headers); shared by the Flask and ASGI apps.
+    ndjson: one record per line, then a final {"_meta": {...}} line.
+    json: {"data": [...], "count": ..., ...} written incrementally; counts and
+    partial-failure details follow the rows because they are only known at the end.
+    The first batch is produced before the response starts so an unreachable
+    upstream still falls back to offline data instead of a broken stream.
+    """
+    state = {'count': 0, 'total': None, 'failed_pages': [], 'cache': None, 'note': None}
+    batches = iter_order_batches(req, state)
+    try:
+        first = next(batches, [])
+    except Exception as api_error:
+        logger.warning(f"API request failed for stream: {api_error}")
+        try:
+            fallback_records, fallback_label = read_fallback_orders(
+                orders_cache_key(req['page_index'], req['page_size'], req['selected_base'], req['all_pages']))
+            state['total'], rows = run_order_query(convert_records(fallback_records, req['convert']),
+                                                   req['query'])
+            state['note'] = f'{fallback_label} fallback - Original API unavailable'
+        except Exception as csv_error:
+            logger.error(f"CSV fallback failed for stream: {csv_error}")
+            rows = []
+            state['note'] = 'No data: API and CSV unavailable'
+        first, batches = [], _batched(rows)
+
+    def counted():
+        for batch in itertools.chain([first], batches):
+            state['count'] += len(batch)
+            ROWS_SERVED.inc(len(batch), route='orders_stream')
+            yield batch
+
+    def trailer():
+        meta = {
+            'success': True,
+            'count': state['count'],
+            'total': state['total'] if state['total'] is not None else state['count'],
+            'date_range': {'start': req['bas_tar'], 'end': req['bit_tar']},
+            'page': {'index': req['page_index'], 'size': req['page_size'], **req['paging'],
+                     'all': req['all_pages'], 'failed': sorted(state['failed_pages'])},
+            'partial': bool(state['failed_pages']),
+            'cache': state['cache'],
+        }
+        if state['note']:
+            meta['note'] = state['note']
+        return meta
+
+    fmt = req['stream']
+    if fmt == 'ndjson':
+        chunks = ndjson_chunks(counted(), trailer=lambda: {'_meta': trailer()})
+    else:
+        chunks = json_array_chunks(counted(), trailer=trailer)
+    headers = {'X-Accel-Buffering': 'no', 'Vary': 'Accept-Encoding'}
+    encoding = choose_encoding(accept_encoding) if RESPONSE_COMPRESSION else None
+    if encoding:
+        chunks = compress_chunks(chunks, encoding)
+        headers['Content-Encoding'] = encoding
+    return chunks, STREAM_FORMATS[fmt], headers
+
+def stream_orders_response(req):
+    chunks, mimetype, headers = stream_order_chunks(req, request.headers.get('Accept-Encoding'))
+    return Response(chunks, mimetype=mimetype, headers=headers)
+
 @app.route('/api/orders', methods=['GET'])
 def get_orders():
     """
@@ -273,99 +1576,43 @@ def get_orders():
     Supports optional date range parameters
     Falls back to CSV data if API is unavailable
     """
-    # Optional API token guard
-    if API_TOKEN_ENV:
-        provided = request.headers.get('X-API-Token') or request.args.get('api_token')
-        if provided != API_TOKEN_ENV:
-            return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    unauthorized = _check_api_token()
+    if unauthorized:
+        return unauthorized
     try:
-        # Paginasyon ve opsiyonel tarih aralığı parametreleri
-        page_index = request.args.get('pageIndex', default=0, type=int)
-        page_size = request.args.get('pageSize', default=500, type=int)
-        bas_tar = request.args.get('startDate')
-        bit_tar = request.args.get('endDate')
-        base_url_override = request.args.get('baseUrl')
-        allowed_bases = { REMOTE_API_BASE, 'http://85.153.155.153:5047' }  # sadece izin verilenler
-        selected_base = base_url_override if base_url_override in allowed_bases else None
+        # Paginasyon, tarih aralığı ve filtre/sıralama parametreleri
+        try:
+            req = parse_orders_request(request.args)
+        except (QueryError, FxError) as e:
+            return jsonify({'success': False, 'error': str(e), 'data': []}), 400
+
+        if req['stream']:
+            return stream_orders_response(req)
 
         try:
-            # Try to fetch raw data from the API
-            raw_data = get_siparisler(page_index=page_index, page_size=page_size, base_url=selected_base)
-
-            # Process and transform the data
-            processed_data = process_data(raw_data)
-
-            # Opsiyonel: start/end tarihleri verilmişse sunucu tarafında filtre uygula
-            if bas_tar or bit_tar:
-                def within_range(rec):
-                    d = rec.get('date')
-                    if not d:
-                        return False
-                    try:
-                        if bas_tar and d < bas_tar:
-                            return False
-                        if bit_tar and d > bit_tar:
-                            return False
-                        return True
-                    except Exception:
-                        return True
-                processed_data = [r for r in processed_data if within_range(r)]
-
-            logger.info(f"Successfully processed {len(processed_data)} orders from API")
-
-            return jsonify({
-                'success': True,
-                'data': processed_data,
-                'count': len(processed_data),
-                'date_range': {
-                    'start': bas_tar,
-                    'end': bit_tar
-                },
-                'page': {
-                    'index': page_index,
-                    'size': page_size
-                }
-            })
+            # Fetch + process via cache (fresh hit, stale-while-revalidate or single-flight miss)
+            dataset, cache_meta = load_processed_orders(
+                page_index=req['page_index'], page_size=req['page_size'],
+                base_url=req['selected_base'], force_refresh=req['force_refresh'],
+                all_pages=req['all_pages']
+            )
+            # Değişmemiş veri için gövdesiz 304 (If-None-Match)
+            etag = orders_etag(req, dataset)
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                payload = orders_payload(req, dataset, cache_meta)
+                with timings.span('serialize'):
+                    response = jsonify(payload)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
 
         except Exception as api_error:
             logger.warning(f"API request failed: {str(api_error)}")
-            logger.info("Falling back to CSV data...")
-
-            try:
-                csv_path = resolve_csv_path()
-                logger.info(f"CSV fallback using path: {csv_path}")
-                csv_data = read_orders_from_csv(csv_path)
-                logger.info(f"Returning {len(csv_data)} orders from CSV fallback")
-                return jsonify({
-                    'success': True,
-                    'data': csv_data,
-                    'count': len(csv_data),
-                    'note': 'CSV fallback - Original API unavailable',
-                    'date_range': {
-                        'start': bas_tar,
-                        'end': bit_tar
-                    },
-                    'page': {
-                        'index': page_index,
-                        'size': page_size
-                    }
-                })
-            except Exception as csv_error:
-                logger.error(f"CSV fallback failed: {csv_error}")
-                return jsonify({
-                    'success': True,
-                    'data': [],
-                    'count': 0,
-                    'note': 'No data: API and CSV unavailable',
-                    'date_range': {
-                        'start': bas_tar,
-                        'end': bit_tar
-                    },
-                    'page': {
-                        'index': page_index,
-                        'size': page_size
-                    }
-                })
+            payload = fallback_orders_payload(req)
+            with timings.span('serialize'):
+                return jsonify(payload)
 
     except Exception as e:
         logger.error(f"Error fetching orders: {e}")
@@ -375,49 +1622,342 @@ def get_orders():
             'data': []
         }), 500
 
+@app.route('/api/orders/stream', methods=['GET'])
+def stream_order_updates():
+    """
+    Server-Sent Events: a 'snapshot' event with every row ({id, row}) and the
+    summary totals, then 'diff' events (added/changed/removed rows + totals)
+    whenever the shared refresher sees a change, 'upstream_error' when a
+    refresh fails. Reconnects send Last-Event-ID and skip the snapshot if
+    nothing changed. ?rows=0 sends the same events with the summary and row
+    counts only (for dashboards that render /api/orders/summary).
+    EventSource can't set headers, so ?api_token= works here.
+    Each client holds a worker thread; see limit_live_subscribers().
+    """
+    unauthorized = _check_api_token()
+    if unauthorized:
+        return unauthorized
+    sub = live_updates.subscribe(rows=_flag('rows', default=True))
+    if sub is None:
+        return jsonify({'success': False, 'error': 'Too many live subscribers'}), 503
+    ensure_live_refresher()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    return Response(live_updates.events(sub, last_event_id, heartbeat=LIVE_HEARTBEAT),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/orders/summary', methods=['GET'])
+def get_orders_summary():
+    """
+    Grouped aggregates (by currency, customer, center, project, status, day, month)
+    so dashboards don't need to download and reduce every order row.
+    Query: the /api/orders filters (startDate, endDate, q, currency, status, center, minAmount),
+    groups=customer,month,... (none = totals and by_currency only), all=0|1 (default 1),
+    limit=N rows per group (default SUMMARY_LIMIT; 0 = every row, see group_rows),
+    convert=TRY|USD|EUR (single-currency totals and groups via the FX rate table).
+    Unfiltered full summaries are cached alongside the processed dataset.
+    """
+    unauthorized = _check_api_token()
+    if unauthorized:
+        return unauthorized
+    try:
+        currency = convert_target(request.args)
+        query = _parse_summary_query(request.args)
+    except (QueryError, FxError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    bas_tar = request.args.get('startDate')
+    bit_tar = request.args.get('endDate')
+    groups_arg = request.args.get('groups', '')
+    groups = [g.strip() for g in groups_arg.split(',') if g.strip() in GROUP_COLUMNS] or None
+    if groups_arg.strip().lower() == 'none':
+        groups = []
+    limit = max(_arg_int(request.args, 'limit', SUMMARY_LIMIT), 0)
+    all_pages = _flag('all', default=True)
+    response = {'success': True, 'date_range': {'start': bas_tar, 'end': bit_tar}}
+
+    try:
+        dataset, cache_meta = load_processed_orders(
+            page_index=request.args.get('pageIndex', default=0, type=int),
+            page_size=request.args.get('pageSize', default=500, type=int),
+            base_url=_selected_base_url(), force_refresh=_flag('refresh'),
+            all_pages=all_pages
+        )
+        dataset = converted_dataset(dataset, currency)
+        if query or groups is not None or limit != SUMMARY_LIMIT:
+            _, records = run_order_query(dataset['records'], query,
+                                         index=dataset_index(dataset) if query else None)
+            with timings.span('aggregate'):
+                summary = summarize_records(records, groups=groups, limit=limit or None, currency=currency)
+        else:
+            with timings.span('aggregate'):
+                summary = dataset_summary(dataset)
+        response.update({'summary': summary, 'partial': dataset['fetch'].get('partial', False),
+                         'cache': cache_meta})
+    except Exception as api_error:
+        logger.warning(f"API request failed for summary: {api_error}; falling back to CSV")
+        try:
+            fallback_records, fallback_label = read_fallback_orders()
+            _, records = run_order_query(convert_records(fallback_records, currency), query)
+            response.update({'summary': summarize_records(records, groups=groups, limit=limit or None,
+                                                          currency=currency),
+                             'note': f'{fallback_label} fallback - Original API unavailable'})
+        except Exception as csv_error:
+            logger.error(f"CSV fallback failed for summary: {csv_error}")
+            response.update({'summary': summarize_records([], groups=groups, limit=limit or None, currency=currency),
+                             'note': 'No data: API and CSV unavailable'})
+    with timings.span('serialize'):
+        return jsonify(response)
+
+MONTH_PATTERN = re.compile(r'\d{4}-(0[1-9]|1[0-2])')
+
+@app.route('/api/reports/monthly', methods=['GET'])
+def get_monthly_report():
+    """
+    Monthly report for aylik-rapor.html from the precomputed cubes: by_month
+    (month × currency), cells (month × customer × project × currency) and the
+    latest day vs the previous day per currency.
+    Query: from=YYYY-MM, to=YYYY-MM (inclusive), cells=0|1 (default 1), refresh=1.
+    When the ERP is unreachable the cubes persisted on disk are served.
+    """
+    unauthorized = _check_api_token()
+    if unauthorized:
+        return unauthorized
+    start = request.args.get('from') or None
+    end = request.args.get('to') or None
+    for value in (start, end):
+        if value and not MONTH_PATTERN.fullmatch(value):
+            return jsonify({'success': False, 'error': f"Invalid month '{value}' (expected YYYY-MM)"}), 400
+    cells = _flag('cells', default=True)
+    base_url = _selected_base_url()
+    key = orders_cache_key(base_url=base_url, all_pages=True)
+    response = {'success': True, 'range': {'from': start, 'to': end}}
+
+    try:
+        dataset, cache_meta = load_processed_orders(base_url=base_url, force_refresh=_flag('refresh'),
+                                                    all_pages=True)
+        state = dataset_report_cube(key, dataset)
+        response.update(monthly_report(state, start, end, cells=cells))
+        response.update({'partial': dataset['fetch'].get('partial', False), 'cache': cache_meta})
+    except Exception as api_error:
+        logger.warning(f"API request failed for monthly report: {api_error}; using stored cubes")
+        state, label = report_cubes.get(_store_dataset_name(key)), 'Stored report cube'
+        if state is None:
+            try:
+                fallback_records, label = read_fallback_orders(key)
+                state = report_cubes.build(fallback_records)
+            except Exception as csv_error:
+                logger.error(f"CSV fallback failed for monthly report: {csv_error}")
+                state, label = report_cubes.build([]), None
+        response.update(monthly_report(state, start, end, cells=cells))
+        response['note'] = (f'{label} fallback - Original API unavailable' if label
+                            else 'No data: API and CSV unavailable')
+    with timings.span('serialize'):
+        return jsonify(response)
+
+EXPORT_DIR = os.getenv('EXPORT_DIR', '').strip() or os.path.join(tempfile.gettempdir(), 'cvsair-exports')
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2') or 1)
+EXPORT_TTL = float(os.getenv('EXPORT_TTL', '3600') or 0)
+EXPORT_MAX_PENDING = int(os.getenv('EXPORT_MAX_PENDING', '10') or 10)
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', '5000') or 5000)
+
+# İş durumu EXPORT_DIR'de: her gunicorn işçisi durum/indirme sorusunu yanıtlayabilir
+export_jobs = ExportJobs(EXPORT_DIR, workers=EXPORT_WORKERS, ttl=EXPORT_TTL, max_pending=EXPORT_MAX_PENDING,
+                         chunk_rows=EXPORT_CHUNK_ROWS)
+
+def export_records(req):
+    """Rows for an export job: the filtered (and converted) dataset, or the offline fallback."""
+    try:
+        dataset, _ = load_processed_orders(
+            page_index=req['page_index'], page_size=req['page_size'],
+            base_url=req['selected_base'], force_refresh=req['force_refresh'],
+            all_pages=req['all_pages']
+        )
+        dataset = converted_dataset(dataset, req['convert'])
+        _, records = run_order_query(dataset['records'], req['query'],
+                                     index=dataset_index(dataset) if req['query'] else None)
+    except Exception as api_error:
+        logger.warning(f"API request failed for export: {api_error}; using offline data")
+        fallback_records, fallback_label = read_fallback_orders(
+            orders_cache_key(req['page_index'], req['page_size'], req['selected_base'], req['all_pages']))
+        logger.info(f"Exporting from {fallback_label} fallback")
+        _, records = run_order_query(convert_records(fallback_records, req['convert']), req['query'])
+    ROWS_SERVED.inc(len(records), route='export')
+    return records
+
+def export_job_view(job):
+    """Public job fields plus status/download URLs."""
+    view = {k: v for k, v in job.items() if k != 'pid'}
+    view['status_url'] = f"/api/exports/{job['id']}"
+    view['download_url'] = f"/api/exports/{job['id']}/download" if job['status'] == 'done' else None
+    return view
+
+@app.route('/api/exports', methods=['POST'])
+def create_export():
+    """
+    Queue a report export and return 202 with the job; poll status_url until
+    status is 'done', then fetch download_url.
+    Query/form: format=xlsx|csv|parquet (default xlsx) plus the /api/orders
+    filter, sort and convert parameters; all=0 exports one page (default all).
+    """
+    unauthorized = _check_api_token()
+    if unauthorized:
+        return unauthorized
+    args = request.values
+    fmt = (args.get('format') or 'xlsx').strip().lower()
+    try:
+        req = parse_orders_request(args)
+    except (QueryError, FxError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    req['all_pages'] = _arg_flag(args, 'all', default=True)
+    params = {k: v for k, v in args.items() if k != 'api_token'}
+    try:
+        job = export_jobs.submit(fmt, lambda: export_records(req), params=params)
+    except ExportError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429 if isinstance(e, ExportQueueFull) else 400
+    logger.info(f"Queued export {job['id']} ({fmt}, params={params})")
+    response = jsonify({'success': True, 'job': export_job_view(job)})
+    response.status_code = 202
+    response.headers['Location'] = f"/api/exports/{job['id']}"
+    return response
+
+@app.route('/api/exports', methods=['GET'])
+def list_exports():
+    """Recent export jobs (newest first), from every worker on this host."""
+    unauthorized = _check_api_token()
+    if unauthorized:
+        return unauthorized
+    limit = request.args.get('limit', default=50, type=int)
+    return jsonify({'success': True, 'jobs': [export_job_view(j) for j in export_jobs.list(limit=limit)]})
+
+@app.route('/api/exports/<job_id>', methods=['GET'])
+def get_export(job_id):
+    """Export job status: queued, running (rows_written of rows), done or failed."""
+    unauthorized = _check_api_token()
+    if unauthorized:
+        return unauthorized
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown export job'}), 404
+    return jsonify({'success': True, 'job': export_job_view(job)})
+
+@app.route('/api/exports/<job_id>/download', methods=['GET'])
+def download_export(job_id):
+    """The finished export file (409 while the job is still running)."""
+    unauthorized = _check_api_token()
+    if unauthorized:
+        return unauthorized
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown export job'}), 404
+    if job['status'] != 'done':
+        return jsonify({'success': False, 'error': f"Export is {job['status']}", 'job': export_job_view(job)}), 409
+    path = export_jobs.output_path(job)
+    if not os.path.exists(path):
+        return jsonify({'success': False, 'error': 'Export file expired'}), 410
+    return send_file(path, mimetype=EXPORT_FORMATS[job['format']][0], as_attachment=True,
+                     download_name=job['filename'], max_age=0)
+
+def _cache_lookup_counts():
+    stats = orders_cache.stats()
+    return {('hit',): stats['hits'], ('stale',): stats['stale_hits'], ('miss',): stats['misses']}
+
+metrics.callback('orders_cache_lookups_total', 'Orders cache lookups by result', _cache_lookup_counts,
+                 ('result',), kind='counter')
+metrics.callback('orders_cache_hit_ratio', 'Share of cache lookups answered from memory (fresh or stale)',
+                 lambda: orders_cache.stats()['hit_ratio'])
+metrics.callback('orders_cached_rows', 'Rows in the cached all-pages dataset',
+                 lambda: (cached_table_stats() or {}).get('rows'))
+metrics.callback('upstream_circuit_open', '1 while the ERP circuit breaker is open',
+                 lambda: int(remote_client.breaker.snapshot()['state'] == 'open'))
+metrics.callback('live_update_subscribers', 'Connected /api/orders/stream clients', live_updates.subscriber_count)
+metrics.callback('export_jobs_active', 'Queued or running export jobs in this worker',
+                 lambda: export_jobs.stats()['active'])
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Prometheus text format: request and pipeline stage latency histograms,
+    upstream latency/error counters, cache lookups and hit ratio, row counts.
+    """
+    unauthorized = _check_api_token()
+    if unauthorized:
+        return unauthorized
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint
     """
-    return jsonify({
+    return jsonify(health_payload())
+
+def cached_table_stats():
+    """Row count / memory / column encodings of the cached all-pages OrderTable, if any."""
+    dataset = orders_cache.peek(orders_cache_key(all_pages=True))
+    if dataset is None or not isinstance(dataset['records'], OrderTable):
+        return None
+    return dataset['records'].stats()
+
+def health_payload():
+    """Health/diagnostics body shared by the Flask and ASGI apps."""
+    return {
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'remote_base': REMOTE_API_BASE,
         'remote_orders_path': REMOTE_ORDERS_PATH,
         'remote_url': f"{REMOTE_API_BASE}{REMOTE_ORDERS_PATH}",
         'csv_path': resolve_csv_path(),
+        'csv_source': get_csv_source(resolve_csv_path()).stats(),
+        'store': snapshot_store.stats() if snapshot_store is not None else None,
+        'snapshot': {
+            'path': resolve_snapshot_path(),
+            'available': xlsx_ingest.AVAILABLE,
+            'source': xlsx_ingest.read_snapshot_source(resolve_snapshot_path()),
+        },
         'frontend_origin': FRONTEND_ORIGIN,
-        'auth_required': bool(API_TOKEN_ENV)
-    })
+        'auth_required': bool(API_TOKEN_ENV),
+        'remote_client': remote_client.status(),
+        'cache': orders_cache.stats(),
+        'orders_table': cached_table_stats(),
+        'static_assets': static_assets.stats(),
+        'fx_rates': _fx_source.stats() if _fx_source is not None else None,
+        'report_cubes': report_cubes.stats(),
+        'shared_cache': shared_cache.stats() if shared_cache is not None else None,
+        'live_updates': live_updates.stats(),
+        'exports': export_jobs.stats(),
+        'startup': startup_stats(),
+        'column_mapping': column_resolver.stats()
+    }
+
+SAMPLE_ORDERS = [
+    {
+        'SİPARİŞ TARİHİ': '18.08.2025',
+        'CARİ İSMİ': 'DFN MALATYA 1262',
+        'Sorumluluk Merkezi Adı': 'DFN MALATYA 1262',
+        'MİKTAR': 45000,
+        'KALAN SİPARİŞ NET TUTAR': 45000,
+        'DOVİZ CİNSİ': 'TL',
+        'KALAN MİKTAR': 45000,
+        'date': '2025-08-18'
+    },
+    {
+        'SİPARİŞ TARİHİ': '19.08.2025',
+        'CARİ İSMİ': 'DFN MALATYA 700',
+        'Sorumluluk Merkezi Adı': 'DFN MALATYA 700',
+        'MİKTAR': 23000,
+        'KALAN SİPARİŞ NET TUTAR': 23000,
+        'DOVİZ CİNSİ': 'TL',
+        'KALAN MİKTAR': 23000,
+        'date': '2025-08-19'
+    }
+]
 
 @app.route('/api/sample-data', methods=['GET'])
 def get_sample_data():
     """Get sample data for testing"""
     try:
-        sample_data = [
-            {
-                'SİPARİŞ TARİHİ': '18.08.2025',
-                'CARİ İSMİ': 'DFN MALATYA 1262',
-                'Sorumluluk Merkezi Adı': 'DFN MALATYA 1262',
-                'MİKTAR': 45000,
-                'KALAN SİPARİŞ NET TUTAR': 45000,
-                'DOVİZ CİNSİ': 'TL',
-                'KALAN MİKTAR': 45000,
-                'date': '2025-08-18'
-            },
-            {
-                'SİPARİŞ TARİHİ': '19.08.2025',
-                'CARİ İSMİ': 'DFN MALATYA 700',
-                'Sorumluluk Merkezi Adı': 'DFN MALATYA 700',
-                'MİKTAR': 23000,
-                'KALAN SİPARİŞ NET TUTAR': 23000,
-                'DOVİZ CİNSİ': 'TL',
-                'KALAN MİKTAR': 23000,
-                'date': '2025-08-19'
-            }
-        ]
-        
+        sample_data = SAMPLE_ORDERS
+
         return jsonify({
             'success': True,
             'data': sample_data,
@@ -431,11 +1971,50 @@ def get_sample_data():
             'error': str(e)
         }), 500
 
+def _apply_static_cache_policy(response, filename):
+    if STATIC_MAX_AGE > 0 and not filename.lower().endswith(STATIC_REVALIDATE_EXTENSIONS):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+def send_static_asset(filename):
+    """
+    Serve a file from BASE_DIR with ETag/Last-Modified validators and the
+    cache policy above. Compressible files are served from precompressed
+    br/gzip variants when the client accepts them; If-None-Match and
+    If-Modified-Since yield 304 for every variant.
+    """
+    encoding = choose_encoding(request.headers.get('Accept-Encoding')) if RESPONSE_COMPRESSION else None
+    path = safe_join(BASE_DIR, filename)
+    variant = None
+    if encoding and path and os.path.isfile(path):
+        variant = static_assets.variant(path, encoding)
+    if variant is None:
+        response = send_from_directory(BASE_DIR, filename)
+        if is_compressible(response.mimetype):
+            response.vary.add('Accept-Encoding')
+        return _apply_static_cache_policy(response, filename)
+
+    body, signature = variant
+    response = app.response_class(body, mimetype=mimetypes.guess_type(path)[0])
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{asset_etag(signature)}-{encoding}")
+    response.last_modified = datetime.fromtimestamp(signature[1] // 1_000_000_000, tz=timezone.utc)
+    _apply_static_cache_policy(response, filename)
+    return response.make_conditional(request)
+
 @app.route('/<path:filename>')
 def serve_static_files(filename):
     """Serve static files (HTML, CSS, JS, etc.)"""
+    if not static_file_allowed(filename):
+        logger.warning(f"Refused static request for {filename}")
+        return jsonify({'success': False, 'error': f'File not found: {filename}'}), 404
     try:
-        return send_from_directory('.', filename)
+        return send_static_asset(filename)
     except Exception as e:
         logger.error(f"Error serving file {filename}: {str(e)}")
         return jsonify({
@@ -447,7 +2026,7 @@ def serve_static_files(filename):
 def serve_index():
     """Serve the main dashboard"""
     try:
-        return send_from_directory('.', 'deneme.html')
+        return send_static_asset('deneme.html')
     except Exception as e:
         logger.error(f"Error serving index: {str(e)}")
         return jsonify({
@@ -455,14 +2034,24 @@ def serve_index():
             'error': 'Index file not found'
         }), 404
 
+_startup['import_seconds'] = round(time.perf_counter() - _IMPORT_STARTED, 4)
+
 if __name__ == '__main__':
     print("Starting CVS Air API Server...")
     print(f"Remote API: {REMOTE_API_BASE}{REMOTE_ORDERS_PATH}")
+    if shared_cache is not None:
+        print(f"Shared cache: {shared_cache.kind} ({SHARED_CACHE_DIR if shared_cache.kind == 'file' else SHARED_CACHE})")
     print("Available endpoints:")
-    print("  GET /api/orders - Get orders data")
+    print("  GET /api/orders - Get orders data (cached; ?refresh=1 to bypass, ?all=1 for every page, ?stream=ndjson|json to stream)")
+    print("  GET /api/orders/stream - Server-Sent Events: snapshot, then added/changed/removed rows")
+    print("  GET /api/orders/summary - Grouped totals (currency, customer, center, project, status, day, month; ?convert=TRY for one currency)")
+    print("  GET /api/reports/monthly - Monthly report cubes (?from=YYYY-MM&to=YYYY-MM, ?cells=0 for totals only)")
+    print("  POST /api/exports - Queue an xlsx/CSV/Parquet export (?format=, /api/orders filters); GET /api/exports/<id>[/download]")
+    print("  GET /api/metrics - Prometheus metrics (latency histograms, upstream errors, cache hit ratio)")
     print("  GET /api/health - Health check")
     print("  GET /api/sample-data - Sample data for testing")
     
+    warm_worker(mode='startup')
     # Bind to PORT from environment for Render; default 8000 for local dev
     port = int(os.getenv('PORT', '8000'))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
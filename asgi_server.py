@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+ASGI (async) serving mode for the CVS Air orders API.
+
+Same contract as the Flask app for /api/orders (including ?stream=),
+/api/orders/stream, /api/health, /api/metrics and /api/sample-data (plus
+static files), but upstream ERP calls are non-blocking (httpx.AsyncClient
+with a pooled connection limit) and process_table() runs on a worker pool,
+so slow ERP calls don't stall /api/health or static files. The summary,
+monthly report and export routes are Flask-only (404 here).
+
+    uvicorn asgi_server:app --host 0.0.0.0 --port $PORT --workers 2
+
+Shares cache, circuit breaker, snapshot store and fallbacks with api_server.
+ASGI_PROCESS_WORKERS > 0 runs process_table() in a process pool instead of
+threads (avoids GIL contention for very large pages).
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.datastructures import MutableHeaders
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from werkzeug.http import parse_etags
+
+import api_server
+from api_server import (
+    ALL_PAGES_MAX_PAGES, ALL_PAGES_PAGE_SIZE, ALL_PAGES_WORKERS, API_TOKEN_ENV, BASE_DIR,
+    COMPRESS_MIN_BYTES, FRONTEND_ORIGIN, FxError, QueryError, RESPONSE_COMPRESSION, SAMPLE_ORDERS,
+    orders_cache, orders_cache_key, parse_orders_request, timings,
+)
+from remote_client import AsyncRemoteClient
+from response_encoding import dumps
+
+logger = logging.getLogger(__name__)
+
+ASGI_PROCESS_WORKERS = int(os.getenv('ASGI_PROCESS_WORKERS', '0') or 0)
+ASGI_THREAD_WORKERS = int(os.getenv('ASGI_THREAD_WORKERS', '4') or 4)
+
+_state = {'client': None, 'executor': None}
+
+
+class FastJSONResponse(JSONResponse):
+    """Starlette JSONResponse rendered with response_encoding.dumps (orjson when available)."""
+
+    def render(self, content):
+        return dumps(content)
+
+_inflight = {}
+UNCOMPRESSED_PATHS = frozenset(['/api/orders/stream'])
+
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves SSE untouched (gzip would buffer events)."""
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] in UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+class RequestTimingMiddleware:
+    """Per-request api_server.timings timer, Server-Timing header on /api/* and the latency histogram."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        timer, token = timings.begin()
+        path = scope['path']
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                if api_server.SERVER_TIMING and path.startswith('/api/'):
+                    MutableHeaders(scope=message).append('Server-Timing', timer.server_timing())
+                api_server.REQUEST_SECONDS.observe(timer.elapsed(), route=path if path.startswith('/api/') else 'static',
+                                                   method=scope['method'], status=message['status'])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timings.end(token)
+
+
+def _client():
+    if _state['client'] is None:
+        _state['client'] = AsyncRemoteClient(api_server.remote_client)
+    return _state['client']
+
+
+def _executor():
+    if _state['executor'] is None:
+        if ASGI_PROCESS_WORKERS > 0:
+            _state['executor'] = ProcessPoolExecutor(max_workers=ASGI_PROCESS_WORKERS)
+        else:
+            _state['executor'] = ThreadPoolExecutor(max_workers=ASGI_THREAD_WORKERS,
+                                                    thread_name_prefix='process-data')
+    return _state['executor']
+
+
+async def fetch_page(page_index, page_size, base_url=None):
+    page_index, page_size = api_server.normalize_page_args(page_index, page_size)
+    params = {"pageIndex": page_index, "pageSize": page_size}
+    t0 = time.perf_counter()
+    try:
+        raw = await _client().get_orders(params, base_url=base_url or api_server.REMOTE_API_BASE)
+    except Exception as e:
+        api_server.record_upstream_error(e, t0)
+        raise
+    api_server.UPSTREAM_SECONDS.observe(time.perf_counter() - t0, outcome='ok')
+    return raw
+
+
+async def fetch_all_pages(page_size=ALL_PAGES_PAGE_SIZE, base_url=None,
+                          max_concurrency=ALL_PAGES_WORKERS, max_pages=ALL_PAGES_MAX_PAGES):
+    """Async counterpart of api_server.get_all_siparisler() (same result shape)."""
+    page_size = max(1, min(int(page_size or ALL_PAGES_PAGE_SIZE), 1000))
+    first_raw = await fetch_page(0, page_size, base_url)
+    pages = {0: api_server._unwrap_items(first_raw)}
+    total = api_server._extract_total(first_raw)
+    failed = []
+    sem = asyncio.Semaphore(max(1, int(max_concurrency or 1)))
+
+    async def fetch(idx):
+        async with sem:
+            try:
+                return idx, api_server._unwrap_items(await fetch_page(idx, page_size, base_url))
+            except Exception as e:
+                logger.warning(f"Page {idx} failed: {e}")
+                return idx, None
+
+    if total is not None:
+        n_pages = min(max(-(-total // page_size), 1), max_pages)
+        results = await asyncio.gather(*(fetch(i) for i in range(1, n_pages)))
+        for idx, rows in results:
+            if rows is None:
+                failed.append(idx)
+            else:
+                pages[idx] = rows
+    elif len(pages[0]) >= page_size:
+        next_idx, done = 1, False
+        window_size = max(1, int(max_concurrency or 1))
+        while not done and next_idx < max_pages:
+            window = range(next_idx, min(next_idx + window_size, max_pages))
+            for idx, rows in await asyncio.gather(*(fetch(i) for i in window)):
+                if done:
+                    break
+                if rows is None:
+                    failed.append(idx)
+                    continue
+                pages[idx] = rows
+                if len(rows) < page_size:
+                    done = True
+            next_idx = window.stop
+
+    items = []
+    for idx in sorted(pages):
+        items.extend(pages[idx])
+    return {'items': items, 'total': total, 'pages': len(pages),
+            'failed_pages': sorted(failed), 'partial': bool(failed)}
+
+
+async def _fetch_dataset(key, page_index, page_size, base_url, all_pages):
+    """Upstream fetch + normalize without blocking the loop; complete results are published and persisted."""
+    loop = asyncio.get_running_loop()
+    with timings.span('upstream'):
+        if all_pages:
+            merged = await fetch_all_pages(base_url=base_url)
+            items = merged.pop('items')
+            fetch_info = merged
+        else:
+            items = await fetch_page(page_index, page_size, base_url)
+            fetch_info = {'pages': 1, 'partial': False}
+    # CPU işi olay döngüsünü bloklamasın
+    with timings.span('normalize'):
+        records = await loop.run_in_executor(_executor(), api_server.process_table, items)
+    dataset = {'records': records, 'fetch': fetch_info}
+    if not fetch_info.get('partial'):
+        if all_pages:
+            api_server.schedule_persist(key, dataset)
+        dataset = await run_in_threadpool(api_server.publish_shared_dataset, key, dataset)
+    return dataset
+
+
+async def _load_shared_dataset(key, args, force_refresh=False):
+    """
+    Async equivalent of api_server.load_shared_dataset(): only the worker
+    holding the refresh lease calls the ERP; the others wait for it (in the
+    threadpool, not on the loop) and adopt what it published.
+    Returns (dataset, age) where age back-dates an adopted shared copy.
+    """
+    shared_cache = api_server.shared_cache
+    name = api_server._store_dataset_name(key)
+    started = time.time()
+    if not force_refresh:
+        # Başka bir işçinin (uvicorn --workers) yayımladığı taze kopya
+        dataset, age = await run_in_threadpool(api_server.read_shared_dataset, key, api_server.ORDERS_CACHE_TTL)
+        if dataset is not None:
+            timings.note('shared', 'hit')
+            return dataset, age
+    lease = shared_cache.lease(name, api_server.SHARED_CACHE_WAIT)
+    leader = await run_in_threadpool(lease.__enter__)
+    try:
+        shared = await run_in_threadpool(shared_cache.read, name)
+        if shared is not None and shared[1]['published_at'] >= started:
+            # Beklerken başka bir işçi yeniledi
+            timings.note('shared', 'waited')
+            return shared[0], max(time.time() - shared[1]['published_at'], 0.0)
+        if not leader:
+            logger.warning(f"Shared cache lease for {name} still held after "
+                           f"{api_server.SHARED_CACHE_WAIT}s; loading anyway")
+        timings.note('shared', 'lead' if leader else 'timeout')
+        return await _fetch_dataset(key, *args), 0.0
+    finally:
+        await run_in_threadpool(lease.__exit__, None, None, None)
+
+
+async def _load_dataset(key, page_index, page_size, base_url, all_pages, force_refresh=False):
+    args = (page_index, page_size, base_url, all_pages)
+    if api_server.shared_cache is None:
+        dataset, age = await _fetch_dataset(key, *args), 0.0
+    else:
+        dataset, age = await _load_shared_dataset(key, args, force_refresh)
+    # ORDERS_CACHE_TTL=0: önbellek kapalı, veri bellekte tutulmaz; kısmi sonuç hiç saklanmaz
+    if orders_cache.enabled and not dataset['fetch'].get('partial'):
+        # Paylaşılan kopya yayın zamanına geri tarihlenir: TTL ilk yüklenişten sayılır
+        orders_cache.put(key, dataset, age=min(age, api_server.ORDERS_CACHE_TTL))
+    return dataset
+
+
+def _start_load(key, *args, force_refresh=False):
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_load_dataset(key, *args, force_refresh=force_refresh))
+        _inflight[key] = task
+
+        def done(t):
+            _inflight.pop(key, None)
+            if not t.cancelled() and t.exception() is not None:
+                logger.warning(f"Order load failed for {key}: {t.exception()}")
+
+        task.add_done_callback(done)
+    return task
+
+
+async def load_processed_orders(page_index=0, page_size=500, base_url=None, force_refresh=False, all_pages=False):
+    """
+    Async equivalent of api_server.load_processed_orders(): fresh hits return
+    immediately, stale entries are returned while one background task refreshes
+    them, and concurrent misses await the same task (single-flight).
+    """
+    key = orders_cache_key(page_index, page_size, base_url, all_pages)
+    args = (page_index, page_size, base_url, all_pages)
+    if not force_refresh:
+        dataset, meta = orders_cache.lookup(key)
+        timings.note('cache', meta['status'])
+        if dataset is not None:
+            if meta['status'] == 'stale':
+                _start_load(key, *args)
+            return dataset, meta
+        if meta['status'] == 'bypass':
+            return await _load_dataset(key, *args), meta
+    timings.note('cache', 'miss')
+    dataset = await asyncio.shield(_start_load(key, *args, force_refresh=force_refresh))
+    return dataset, {'status': 'miss', 'age': 0.0}
+
+
+def _unauthorized(request):
+    if API_TOKEN_ENV:
+        provided = request.headers.get('X-API-Token') or request.query_params.get('api_token')
+        if provided != API_TOKEN_ENV:
+            return FastJSONResponse({'success': False, 'error': 'Unauthorized'}, status_code=401)
+    return None
+
+
+async def get_orders(request):
+    unauthorized = _unauthorized(request)
+    if unauthorized:
+        return unauthorized
+    try:
+        try:
+            req = parse_orders_request(request.query_params)
+        except (QueryError, FxError) as e:
+            return FastJSONResponse({'success': False, 'error': str(e), 'data': []}, status_code=400)
+        if req['stream']:
+            # İlk parti (ve gerekirse çevrimdışı yedek) yanıt başlamadan thread'de hazırlanır;
+            # kalan partiler StreamingResponse tarafından threadpool'da üretilir.
+            # Sıkıştırmayı GZip middleware yapar.
+            chunks, mimetype, headers = await run_in_threadpool(api_server.stream_order_chunks, req)
+            return StreamingResponse(chunks, media_type=mimetype, headers=headers)
+        try:
+            dataset, cache_meta = await load_processed_orders(
+                page_index=req['page_index'], page_size=req['page_size'],
+                base_url=req['selected_base'], force_refresh=req['force_refresh'],
+                all_pages=req['all_pages'])
+            etag = await run_in_threadpool(api_server.orders_etag, req, dataset)
+            headers = {'ETag': f'W/"{etag}"', 'Cache-Control': 'private, no-cache'}
+            if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+                return Response(status_code=304, headers=headers)
+            payload = await run_in_threadpool(api_server.orders_payload, req, dataset, cache_meta)
+            with timings.span('serialize'):
+                return FastJSONResponse(payload, headers=headers)
+        except Exception as api_error:
+            logger.warning(f"API request failed: {api_error}")
+            payload = await run_in_threadpool(api_server.fallback_orders_payload, req)
+        with timings.span('serialize'):
+            return FastJSONResponse(payload)
+    except Exception as e:
+        logger.error(f"Error fetching orders: {e}")
+        return FastJSONResponse({'success': False, 'error': str(e), 'data': []}, status_code=500)
+
+
+async def stream_order_updates(request):
+    """
+    SSE live updates (see api_server.stream_order_updates). The publisher
+    thread wakes this coroutine via call_soon_threadsafe, so an idle client
+    holds no thread (the threadpool stays free for /api/orders and /health).
+    """
+    unauthorized = _unauthorized(request)
+    if unauthorized:
+        return unauthorized
+    live = api_server.live_updates
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+
+    def notify():
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            pass  # döngü kapandı
+
+    sub = live.subscribe(notify=notify, rows=api_server._arg_flag(request.query_params, 'rows', True))
+    if sub is None:
+        return FastJSONResponse({'success': False, 'error': 'Too many live subscribers'}, status_code=503)
+    api_server.ensure_live_refresher()
+    last_event_id = request.headers.get('last-event-id') or request.query_params.get('lastEventId')
+
+    async def body():
+        try:
+            # Anlık görüntü büyük olabilir: JSON üretimi thread'de
+            for chunk in await run_in_threadpool(live.opening, sub, last_event_id):
+                yield chunk
+            while True:
+                wakeup.clear()
+                chunks = (await run_in_threadpool(live.pending, sub) if sub.needs_resync
+                          else live.pending(sub))
+                for chunk in chunks:
+                    yield chunk
+                if chunks:
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=api_server.LIVE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
+        finally:
+            live.unsubscribe(sub)
+
+    return StreamingResponse(body(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def health_check(request):
+    payload = await run_in_threadpool(api_server.health_payload)
+    payload['server'] = {'mode': 'asgi', 'inflight_loads': len(_inflight),
+                         'process_workers': ASGI_PROCESS_WORKERS}
+    return FastJSONResponse(payload)
+
+
+async def get_metrics(request):
+    unauthorized = _unauthorized(request)
+    if unauthorized:
+        return unauthorized
+    body = await run_in_threadpool(api_server.metrics.render)
+    return PlainTextResponse(body, media_type='text/plain; version=0.0.4')
+
+
+async def get_sample_data(request):
+    return FastJSONResponse({'success': True, 'data': SAMPLE_ORDERS, 'count': len(SAMPLE_ORDERS)})
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles limited to the front-end asset allowlist of api_server.static_file_allowed."""
+
+    async def get_response(self, path, scope):
+        if not api_server.static_file_allowed(path):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+
+async def serve_index(request):
+    return FileResponse(os.path.join(BASE_DIR, 'deneme.html'))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # uvicorn isteği kabul etmeden önce ısınma biter
+    await run_in_threadpool(api_server.warm_worker, 'asgi')
+    api_server.start_background_jobs()
+    yield
+    if _state['client'] is not None:
+        await _state['client'].aclose()
+    if _state['executor'] is not None:
+        _state['executor'].shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/orders', get_orders, methods=['GET']),
+        Route('/api/orders/stream', stream_order_updates, methods=['GET']),
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/metrics', get_metrics, methods=['GET']),
+        Route('/api/sample-data', get_sample_data, methods=['GET']),
+        Route('/', serve_index),
+        Mount('/', app=AssetFiles(directory=BASE_DIR), name='static'),
+    ],
+    middleware=[Middleware(RequestTimingMiddleware),
+                Middleware(CORSMiddleware, allow_origins=[FRONTEND_ORIGIN] if FRONTEND_ORIGIN else ['*'],
+                           allow_methods=['GET'], allow_headers=['*'])]
+    + ([Middleware(StreamAwareGZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)] if RESPONSE_COMPRESSION else []),
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi_server:app', host='0.0.0.0', port=int(os.getenv('PORT', '8000')))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: list-of-dicts records vs the columnar OrderTable.
+
+For each size, normalizes synthetic API rows with process_data() (list of
+dicts) and process_table() (OrderTable) and reports the memory each result
+retains (tracemalloc, temporaries excluded), build time, and the cost of
+materializing dicts again at the JSON boundary (to_records()).
+
+    python benchmarks/bench_memory.py            # 10k / 100k
+    python benchmarks/bench_memory.py 50000
+"""
+
+import gc
+import os
+import sys
+import time
+import logging
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+logging.disable(logging.WARNING)
+
+from api_server import process_data, process_table  # noqa: E402
+from bench_process_data import make_api_rows  # noqa: E402
+
+
+def retained(build):
+    """(result, bytes still allocated after build() returns, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()  # pandas ara nesnelerindeki döngüler sayılmasın
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    build()
+    return result, size, time.perf_counter() - t0
+
+
+def main(sizes):
+    print(f"{'rows':>9}{'dicts MB':>10}{'table MB':>10}{'ratio':>8}{'dicts s':>9}{'table s':>9}{'to_records s':>14}")
+    for n in sizes:
+        raw = {'data': make_api_rows(n)}
+        records, dict_bytes, dict_secs = retained(lambda: process_data(raw))
+        table, table_bytes, table_secs = retained(lambda: process_table(raw))
+        t0 = time.perf_counter()
+        assert table.to_records() == records
+        back_secs = time.perf_counter() - t0
+        print(f"{n:>9}{dict_bytes / 1e6:>10.2f}{table_bytes / 1e6:>10.2f}{dict_bytes / table_bytes:>8.1f}"
+              f"{dict_secs:>9.3f}{table_secs:>9.3f}{back_secs:>14.3f}")
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 100000]
+    main(sizes)
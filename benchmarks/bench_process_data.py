@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for api_server.process_data().
+
+Generates synthetic rows shaped like response_1762507572202.json (ISO
+`tarih`) and like the CSV export (dd.mm.yyyy dates, "46,565.11" amounts)
+and reports rows/s per size.
+
+    python benchmarks/bench_process_data.py            # 1k / 10k / 100k
+    python benchmarks/bench_process_data.py 5000 50000
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.WARNING)
+
+from api_server import process_data  # noqa: E402
+
+CURRENCIES = ['USD', 'EUR', 'TL']
+
+
+def make_api_rows(n, seed=42):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        miktar = rnd.randint(1, 900)
+        teslim = rnd.randint(0, miktar)
+        net = round(rnd.uniform(50, 200000), 2)
+        rows.append({
+            'tarih': f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T00:00:00",
+            'cari': f"CARI {i % 400}",
+            'srmkod': '',
+            'srmad': 'TANIMSIZ',
+            'miktar': miktar,
+            'teslim': teslim,
+            'tutar': net * 1.05,
+            'nettutar': net,
+            'doviz': rnd.choice(CURRENCIES),
+            'kalanmik': miktar - teslim,
+            'kalannet': net * (miktar - teslim) / miktar,
+            'proje': f"PROJE {i % 150}",
+            'durum': 'Açık',
+        })
+    return rows
+
+
+def make_csv_rows(n, seed=7):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        miktar = rnd.randint(1, 900)
+        net = rnd.uniform(50, 200000)
+        rows.append({
+            'SİPARİŞ TARİHİ': f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.2025",
+            'CARİ İSMİ': f"CARI {i % 400}",
+            'Sorumluluk Merkezi Adı': f"MERKEZ {i % 40}",
+            'MİKTAR': f"{miktar:.2f}",
+            'TAMAMLANAN MİKTAR': '0.00',
+            'NET TUTAR': f"{net:,.2f}",
+            'DOVİZ CİNSİ': rnd.choice(CURRENCIES),
+            'KALAN MİKTAR': f"{miktar:.2f}",
+            'KALAN SİPARİŞ NET TUTAR': f"{net:,.2f}",
+        })
+    return rows
+
+
+def bench(rows, repeat=3):
+    best = float('inf')
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = process_data({'data': rows})
+        best = min(best, time.perf_counter() - t0)
+    return best, len(out)
+
+
+def main(sizes):
+    print(f"{'shape':<6}{'rows':>10}{'best s':>12}{'rows/s':>14}")
+    for shape, make in (('api', make_api_rows), ('csv', make_csv_rows)):
+        for n in sizes:
+            rows = make(n)
+            repeat = 3 if n <= 10000 else 1
+            secs, count = bench(rows, repeat=repeat)
+            assert count == n, (count, n)
+            print(f"{shape:<6}{n:>10}{secs:>12.4f}{n / secs:>14,.0f}")
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    main(sizes)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for /api/orders response encoding.
+
+1. JSON encoder: stdlib json (Flask's default provider) vs response_encoding.dumps.
+2. Compression of the encoded payload: gzip vs brotli (size and time).
+3. End to end against benchmarks/mock_erp.py (?all=1, cache off): buffered
+   jsonify vs ?stream=ndjson / ?stream=json -- time to first byte, total
+   time and tracemalloc peak.
+
+    python benchmarks/bench_response.py                 # 10k / 100k rows, 50k end to end
+    python benchmarks/bench_response.py --rows 20000 --latency 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+logging.disable(logging.WARNING)
+
+from mock_erp import start_mock_erp  # noqa: E402
+
+
+def _best(fn, repeat=3):
+    best = float('inf')
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def bench_encoders(sizes):
+    import response_encoding
+    from api_server import process_data
+    from bench_process_data import make_api_rows
+
+    print(f"{'encoder':<10}{'rows':>9}{'best s':>10}{'MB':>8}")
+    for n in sizes:
+        records = process_data({'data': make_api_rows(n)})
+        payload = {'success': True, 'data': records, 'count': n}
+        for name, fn in (
+            ('json', lambda: json.dumps(payload, sort_keys=True).encode('utf-8')),
+            ('fast', lambda: response_encoding.dumps(payload)),
+        ):
+            secs, body = _best(fn, repeat=3 if n <= 10000 else 1)
+            print(f"{name:<10}{n:>9}{secs:>10.4f}{len(body) / 1e6:>8.2f}")
+    return payload
+
+
+def bench_compression(payload):
+    import response_encoding
+
+    body = response_encoding.dumps(payload)
+    print(f"\n{'encoding':<10}{'ms':>9}{'ratio':>8}")
+    encodings = ['gzip'] + (['br'] if response_encoding.brotli is not None else [])
+    for enc in encodings:
+        secs, out = _best(lambda: response_encoding.compress_bytes(body, enc))
+        print(f"{enc:<10}{secs * 1000:>9.1f}{len(body) / len(out):>8.1f}")
+
+
+def _fetch(client, url):
+    """(ttfb_s, total_s, bytes) for one request, consuming the body chunk by chunk."""
+    t0 = time.perf_counter()
+    resp = client.get(url, buffered=False)
+    ttfb = None
+    size = 0
+    for chunk in resp.response:
+        if ttfb is None:
+            ttfb = time.perf_counter() - t0
+        size += len(chunk)
+    resp.close()
+    return ttfb, time.perf_counter() - t0, size
+
+
+def bench_end_to_end(rows, latency, page_size):
+    server, _, base = start_mock_erp(rows=rows, latency=latency)
+    os.environ.update(REMOTE_API_BASE=base, ORDERS_CACHE_TTL='0', ORDERS_DB_PATH='',
+                      ORDERS_SYNC_INTERVAL='0', ALL_PAGES_PAGE_SIZE=str(page_size))
+    import api_server
+    client = api_server.app.test_client()
+
+    print(f"\nend to end: {rows} rows, {page_size}/page, {latency}s per upstream page")
+    print(f"{'mode':<10}{'ttfb s':>9}{'total s':>9}{'MB':>8}{'peak MB':>9}")
+    for mode, url in (('buffered', '/api/orders?all=1'),
+                      ('ndjson', '/api/orders?all=1&stream=ndjson'),
+                      ('json', '/api/orders?all=1&stream=json')):
+        ttfb, total, size = _fetch(client, url)
+        tracemalloc.start()
+        _fetch(client, url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{mode:<10}{ttfb:>9.3f}{total:>9.3f}{size / 1e6:>8.2f}{peak / 1e6:>9.1f}")
+    server.shutdown()
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Response encoding / streaming benchmarks')
+    ap.add_argument('--sizes', default='10000,100000', help='encoder benchmark sizes')
+    ap.add_argument('--rows', type=int, default=50000, help='end-to-end row count')
+    ap.add_argument('--latency', type=float, default=0.02, help='mock ERP latency per page (s)')
+    ap.add_argument('--page-size', type=int, default=1000)
+    args = ap.parse_args()
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    # api_server ortamı import anında okur: önce uç uca test (ortamı ayarlar)
+    if args.rows:
+        bench_end_to_end(args.rows, args.latency, args.page_size)
+    if sizes:
+        payload = bench_encoders(sizes)
+        bench_compression(payload)
+
+
+if __name__ == '__main__':
+    main()
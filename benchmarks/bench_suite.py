@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark suite (no real ERP needed).
+
+Starts benchmarks/mock_erp.py (deterministic synthetic rows, configurable
+row count / latency / error rate), points the server at it and measures:
+
+- get_orders_page / get_orders_all: GET /api/orders (one page, ?all=1)
+  through the Flask app end to end, cache off (every call goes upstream),
+- process_data: normalization of API-shaped rows,
+- read_orders_from_csv: CSV export parse (cold: file cache dropped per run),
+- parse_number: _parse_number over CSV-style number strings.
+
+For each case: items per run, throughput (items/s at the median run),
+p50/p99 run latency and tracemalloc peak of one extra run. Results go to a
+JSON file; --compare flags cases that got slower than a previous file.
+
+    python benchmarks/bench_suite.py                              # -> bench-results.json
+    python benchmarks/bench_suite.py --rows 20000 --latency 0.05 --output new.json
+    python benchmarks/bench_suite.py --compare bench-results.json --threshold 0.15
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import logging
+import tracemalloc
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from mock_erp import make_row, start_mock_erp  # noqa: E402
+
+SUITE_VERSION = 1
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def measure(fn, items, iterations, warmup=1):
+    """Run fn() warmup + iterations times; returns the result dict for one case."""
+    for _ in range(warmup):
+        fn()
+    runs = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    # Bellek ölçümü ayrı bir koşuda: tracemalloc süreleri bozmasın
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    p50 = _percentile(runs, 50)
+    return {
+        'items': items,
+        'iterations': iterations,
+        'throughput': round(items / p50, 1) if p50 > 0 else None,
+        'p50_ms': round(p50 * 1000, 3),
+        'p99_ms': round(_percentile(runs, 99) * 1000, 3),
+        'min_ms': round(min(runs) * 1000, 3),
+        'peak_mb': round(peak / 1e6, 2),
+    }
+
+
+def write_csv_export(path, rows):
+    """CSV export shaped like the ERP 'ALINAN SİPARİŞLER' sheet (dd.mm.yyyy, '46,565.11')."""
+    header = ['SİPARİŞ TARİHİ', 'CARİ İSMİ', 'Sorumluluk Merkezi Adı', 'MİKTAR', 'TAMAMLANAN MİKTAR',
+              'TUTAR', 'NET TUTAR', 'DOVİZ CİNSİ', 'KALAN MİKTAR', 'KALAN SİPARİŞ NET TUTAR']
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i in range(rows):
+            r = make_row(i)
+            y, m, d = r['tarih'][:10].split('-')
+            writer.writerow([f"{d}.{m}.{y}", r['cari'], f"MERKEZ {i % 40}", f"{r['miktar']:.2f}",
+                             f"{r['teslim']:.2f}", f"{r['tutar']:,.2f}", f"{r['nettutar']:,.2f}", r['doviz'],
+                             f"{r['kalanmik']:.2f}", f"{r['kalannet']:,.2f}"])
+
+
+def number_strings(n):
+    samples = ['46,565.11', '"1,234.50"', '0.00', '', '  12  ', '1,000,000.25', 'abc', None]
+    return [samples[i % len(samples)] if i % 3 else f"{make_row(i)['nettutar']:,.2f}" for i in range(n)]
+
+
+def run_suite(args, workdir):
+    mock, mock_config, mock_base = start_mock_erp(rows=args.rows, latency=args.latency,
+                                                  error_rate=args.error_rate)
+    # api_server ortamı import sırasında okur
+    os.environ.update(
+        REMOTE_API_BASE=mock_base,
+        ORDERS_CACHE_TTL='0',
+        ORDERS_SYNC_INTERVAL='0',
+        CSV_WATCH_INTERVAL='0',
+        ORDERS_DB_PATH=os.path.join(workdir, 'bench.sqlite3'),
+        BREAKER_FAILURE_THRESHOLD='1000000',
+        SERVER_TIMING='0',
+    )
+    logging.disable(logging.WARNING)
+    import api_server
+
+    client = api_server.app.test_client()
+    errors = {'get_orders_page': 0, 'get_orders_all': 0}
+
+    def orders(case, url):
+        def call():
+            response = client.get(url)
+            if response.status_code != 200:
+                errors[case] += 1
+            response.get_data()
+        return call
+
+    results = {}
+    try:
+        results['get_orders_page'] = measure(orders('get_orders_page', f'/api/orders?pageSize={args.page_size}'),
+                                             min(args.page_size, args.rows), args.iterations)
+        results['get_orders_all'] = measure(orders('get_orders_all', '/api/orders?all=1'),
+                                            args.rows, args.iterations)
+        for case in errors:
+            results[case]['errors'] = errors[case]
+
+        raw = {'data': [make_row(i) for i in range(args.rows)]}
+        results['process_data'] = measure(lambda: api_server.process_data(raw), args.rows, args.iterations)
+
+        csv_path = os.path.join(workdir, 'orders.csv')
+        write_csv_export(csv_path, args.rows)
+
+        def read_csv_cold():
+            api_server._csv_sources.pop(csv_path, None)
+            return api_server.read_orders_from_csv(csv_path)
+
+        results['read_orders_from_csv'] = measure(read_csv_cold, args.rows, args.iterations)
+        results['read_orders_from_csv']['bytes'] = os.path.getsize(csv_path)
+
+        values = number_strings(args.numbers)
+        parse = api_server._parse_number
+        results['parse_number'] = measure(lambda: [parse(v) for v in values], len(values), args.iterations)
+    finally:
+        mock.shutdown()
+    results['get_orders_all']['upstream_requests'] = mock_config.requests
+    return results
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                             text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Rows of (case, metric, old, new, change, regressed) for cases present in both files."""
+    rows = []
+    for case, new in current['results'].items():
+        old = baseline.get('results', {}).get(case)
+        if not old:
+            continue
+        for metric, lower_is_better in (('p50_ms', True), ('p99_ms', True), ('throughput', False),
+                                        ('peak_mb', True)):
+            a, b = old.get(metric), new.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            worse = change > threshold if lower_is_better else change < -threshold
+            rows.append((case, metric, a, b, change, worse))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark suite against a local mock ERP')
+    ap.add_argument('--rows', type=int, default=10000, help='rows served by the mock ERP / used by micro cases')
+    ap.add_argument('--latency', type=float, default=0.0, help='mock ERP latency per request (s)')
+    ap.add_argument('--error-rate', type=float, default=0.0, help='fraction of mock requests answered with 503')
+    ap.add_argument('--page-size', type=int, default=500)
+    ap.add_argument('--numbers', type=int, default=100000, help='values per parse_number run')
+    ap.add_argument('--iterations', type=int, default=10)
+    ap.add_argument('--output', default='bench-results.json')
+    ap.add_argument('--compare', help='previous results JSON to compare against')
+    ap.add_argument('--threshold', type=float, default=0.15, help='relative change counted as a regression')
+    args = ap.parse_args()
+
+    baseline = None
+    if args.compare:
+        # Çıktı aynı dosyaya yazılabilir; karşılaştırma önce okunur
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_suite(args, workdir)
+    report = {
+        'suite_version': SUITE_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {k: getattr(args, k) for k in ('rows', 'latency', 'error_rate', 'page_size', 'numbers',
+                                                 'iterations')},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"{'case':<22}{'items':>9}{'items/s':>14}{'p50 ms':>11}{'p99 ms':>11}{'peak MB':>10}")
+    for case, r in results.items():
+        print(f"{case:<22}{r['items']:>9}{r['throughput'] or 0:>14,.0f}{r['p50_ms']:>11.2f}{r['p99_ms']:>11.2f}"
+              f"{r['peak_mb']:>10.2f}")
+    print(f"results written to {args.output}")
+
+    if baseline is None:
+        return 0
+    if baseline.get('config') != report['config']:
+        print(f"warning: baseline config differs: {baseline.get('config')}")
+    regressions = 0
+    print(f"\n{'case':<22}{'metric':<12}{'before':>14}{'after':>14}{'change':>9}")
+    for case, metric, a, b, change, worse in compare(report, baseline, args.threshold):
+        regressions += worse
+        print(f"{case:<22}{metric:<12}{a:>14,.2f}{b:>14,.2f}{change:>+9.1%}{'  REGRESSION' if worse else ''}")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Concurrent-request load test: sync Flask (gunicorn) vs ASGI (uvicorn).
+
+Starts benchmarks/mock_erp.py with a fixed upstream latency, boots each
+server against it with the cache disabled (every /api/orders call goes
+upstream), then fires N concurrent /api/orders requests while probing
+/api/health. Reports throughput and latency percentiles for both.
+
+    python benchmarks/load_test.py --concurrency 32 --duration 10 --latency 0.5
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_erp import start_mock_erp  # noqa: E402
+
+SERVERS = {
+    'flask': [sys.executable, '-m', 'gunicorn', '-w', '{workers}', '-b', '127.0.0.1:{port}', 'api_server:app'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi_server:app', '--host', '127.0.0.1', '--port', '{port}',
+             '--workers', '{workers}', '--log-level', 'warning'],
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def _wait_ready(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def start_server(kind, mock_base, workers, workdir):
+    port = _free_port()
+    cmd = [part.format(port=port, workers=workers) for part in SERVERS[kind]]
+    env = dict(os.environ,
+               REMOTE_API_BASE=mock_base,
+               ORDERS_CACHE_TTL='0',  # her istek upstream'e gitsin
+               ORDERS_SYNC_INTERVAL='0',
+               CSV_WATCH_INTERVAL='0',
+               ORDERS_DB_PATH=os.path.join(workdir, f'{kind}.sqlite3'),
+               BREAKER_FAILURE_THRESHOLD='1000')
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    if not _wait_ready(f"{base}/api/health"):
+        proc.kill()
+        raise RuntimeError(f"{kind} server did not start: {' '.join(cmd)}")
+    return proc, base
+
+
+def run_load(base, concurrency, duration, page_size):
+    orders_url = f"{base}/api/orders?pageSize={page_size}"
+    latencies, health = [], []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def worker():
+        session = requests.Session()
+        while time.time() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                ok = session.get(orders_url, timeout=60).status_code == 200
+            except requests.RequestException:
+                ok = False
+            dt = time.perf_counter() - t0
+            with lock:
+                if ok:
+                    latencies.append(dt)
+                else:
+                    errors[0] += 1
+
+    def probe():
+        session = requests.Session()
+        while time.time() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                session.get(f"{base}/api/health", timeout=60)
+                health.append(time.perf_counter() - t0)
+            except requests.RequestException:
+                pass
+            time.sleep(0.1)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency + 1) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)] + [pool.submit(probe)]
+        for f in futures:
+            f.result()
+    elapsed = time.perf_counter() - started
+    ms = lambda v: round(v * 1000, 1) if v is not None else None  # noqa: E731
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 2),
+        'p50_ms': ms(_percentile(latencies, 50)),
+        'p99_ms': ms(_percentile(latencies, 99)),
+        'health_p50_ms': ms(_percentile(health, 50)),
+        'health_p99_ms': ms(_percentile(health, 99)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Flask vs ASGI concurrent /api/orders throughput')
+    ap.add_argument('--servers', default='flask,asgi')
+    ap.add_argument('--workers', type=int, default=2)
+    ap.add_argument('--concurrency', type=int, default=32)
+    ap.add_argument('--duration', type=float, default=10.0)
+    ap.add_argument('--latency', type=float, default=0.5, help='mock ERP latency per request (s)')
+    ap.add_argument('--rows', type=int, default=5000)
+    ap.add_argument('--page-size', type=int, default=500)
+    args = ap.parse_args()
+
+    mock, mock_config, mock_base = start_mock_erp(rows=args.rows, latency=args.latency)
+    print(f"mock ERP {mock_base} latency={args.latency}s; concurrency={args.concurrency} "
+          f"workers={args.workers} duration={args.duration}s")
+    header = f"{'server':<8}{'req':>7}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'health p50':>12}{'health p99':>12}"
+    print(header)
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in [s.strip() for s in args.servers.split(',') if s.strip()]:
+            proc, base = start_server(kind, mock_base, args.workers, workdir)
+            try:
+                r = run_load(base, args.concurrency, args.duration, args.page_size)
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+            print(f"{kind:<8}{r['requests']:>7}{r['errors']:>6}{r['rps']:>9}{r['p50_ms']!s:>10}{r['p99_ms']!s:>10}"
+                  f"{r['health_p50_ms']!s:>12}{r['health_p99_ms']!s:>12}")
+    mock.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ERP /api/Listeler/listeSIPARISLERCVS endpoint.
+
+Serves synthetic, deterministic, paginated rows shaped like
+response_1762507572202.json with configurable latency and error rate, so the
+server can be measured without the real ERP.
+
+    python benchmarks/mock_erp.py --rows 5000 --latency 0.3 --port 8099
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ORDERS_PATH = '/api/Listeler/listeSIPARISLERCVS'
+CURRENCIES = ('USD', 'EUR', 'TL')
+
+
+def make_row(i):
+    """Row i of the synthetic dataset (same fields/types as the real ERP)."""
+    rnd = random.Random(i)
+    miktar = rnd.randint(1, 900)
+    teslim = rnd.randint(0, miktar)
+    net = round(rnd.uniform(50, 200000), 2)
+    return {
+        'tarih': f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T00:00:00",
+        'cari': f"CARI {i % 400}",
+        'srmkod': '',
+        'srmad': 'TANIMSIZ',
+        'miktar': miktar,
+        'teslim': teslim,
+        'tutar': round(net * 1.05, 2),
+        'nettutar': net,
+        'doviz': CURRENCIES[i % len(CURRENCIES)],
+        'kalanmik': miktar - teslim,
+        'kalannet': net * (miktar - teslim) / miktar,
+        'proje': f"PROJE {i % 150}",
+        'durum': 'Açık',
+    }
+
+
+class MockErpConfig:
+    def __init__(self, rows=1000, latency=0.0, error_rate=0.0, report_total=True, seed=0):
+        self.rows = int(rows)
+        self.latency = float(latency)
+        self.error_rate = float(error_rate)
+        self.report_total = bool(report_total)
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def _handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, fmt, *args):  # sessiz
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != ORDERS_PATH:
+                self._send(404, {'message': 'not found'})
+                return
+            with config.lock:
+                config.requests += 1
+                fail = config.random.random() < config.error_rate
+            if config.latency:
+                time.sleep(config.latency)
+            if fail:
+                self._send(503, {'message': 'mock failure'})
+                return
+            qs = parse_qs(url.query)
+            page_index = int((qs.get('pageIndex') or ['0'])[0])
+            page_size = int((qs.get('pageSize') or ['500'])[0])
+            start = page_index * page_size
+            stop = min(start + page_size, config.rows)
+            body = {
+                'data': [make_row(i) for i in range(start, stop)],
+                'filter': 'nofilter',
+                'messageCode': 1,
+                'message': '',
+            }
+            if config.report_total:
+                body['totalCount'] = config.rows
+            self._send(200, body)
+
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def start_mock_erp(rows=1000, latency=0.0, error_rate=0.0, report_total=True, host='127.0.0.1', port=0):
+    """Start the mock in a daemon thread; returns (server, config, base_url)."""
+    config = MockErpConfig(rows=rows, latency=latency, error_rate=error_rate, report_total=report_total)
+    server = ThreadingHTTPServer((host, port), _handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-erp', daemon=True).start()
+    return server, config, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--rows', type=int, default=1000)
+    ap.add_argument('--latency', type=float, default=0.0, help='seconds per request')
+    ap.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    ap.add_argument('--no-total', action='store_true', help='omit totalCount from responses')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8099)
+    args = ap.parse_args()
+    server, _, base = start_mock_erp(args.rows, args.latency, args.error_rate, not args.no_total,
+                                     args.host, args.port)
+    print(f"Mock ERP on {base}{ORDERS_PATH} ({args.rows} rows, {args.latency}s latency)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Column-mapping resolver for remote order payloads.
+
+Maps the remote field names (`tarih`, `kalannet`, `srmad`, ...) to the
+dashboard schema used by process_data(). The compiled mapping is cached per
+set of incoming column names (LRU-bounded), so steady-state requests with an
+unchanged upstream schema skip normalization and candidate scanning.
+"""
+
+import re
+import threading
+import unicodedata
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Target fields and candidate names (normalized)
+TARGET_CANDIDATES = {
+    'SİPARİŞ TARİHİ': ['tarih','sip_tarih','siparistarihi','siparistarih','siparis_tarih','sip_tar'],
+    'CARİ İSMİ': ['cari','cari_unvan','cariunvan','cariismi','cari_isim','cariadi','cari_ad'],
+    'Sorumluluk Merkezi Adı': ['srmad','sormerk_adi','sorumlulukmerkeziadi','sorumlulukmerkezi','sip_stok_sormerk','sormerk'],
+    'Sorumluluk Merkezi Kodu': ['srmkod','sormerk_kod','sorumlulukmerkezikodu','sormerk'],
+    'MİKTAR': ['miktar','sip_miktar','adet','quantity'],
+    'TAMAMLANAN MİKTAR': ['teslim','sip_teslim_miktar','teslim_miktar','tamamlanan_miktar','teslimmiktar','delivered'],
+    'KALAN MİKTAR': ['kalanmik','kalan_miktar','kalansiparis','remaining'],
+    'TUTAR': ['tutar','sip_tutar','brut_tutar','bruttutar','gross'],
+    'NET TUTAR': ['nettutar','net_tutar','sip_net_tutar'],
+    'KALAN SİPARİŞ NET TUTAR': ['kalannet','kalan_net','kalansiparisnettutar','sip_net_tutar','net_tutar','nettutar','kalantutar'],
+    'DOVİZ CİNSİ': ['doviz','sip_cins','doviz_cinsi','currency'],
+    'PROJE': ['proje','project','proje_adi','projeadi'],
+    'DURUM': ['durum','status','siparis_durum','siparisdurum']
+}
+
+
+@lru_cache(maxsize=1024)
+def norm(s):
+    """Normalize a column name for matching (ASCII-fold, lowercase, alnum only)."""
+    try:
+        s = unicodedata.normalize('NFKD', str(s))
+        s = s.encode('ascii', 'ignore').decode('ascii')
+    except Exception:
+        s = str(s)
+    return re.sub(r'[^a-z0-9]+', '', s.lower())
+
+
+def compile_mapping(columns, target_candidates=TARGET_CANDIDATES):
+    """Return {target: source column or None} for the given incoming columns."""
+    columns = list(columns)
+    cols_norm = {norm(c): c for c in columns}
+    present = set(columns)
+    mapping = {}
+    for target, cands in target_candidates.items():
+        found = None
+        for cand in cands:
+            if cand in cols_norm:
+                found = cols_norm[cand]
+                break
+        if found is None:
+            # If original (already canonical) exists, use it
+            if target in present:
+                found = target
+        mapping[target] = found
+    return mapping
+
+
+class ColumnMappingResolver:
+    """LRU cache of compiled mappings keyed by frozenset(column names)."""
+
+    def __init__(self, target_candidates=TARGET_CANDIDATES, max_schemas=16):
+        self.target_candidates = target_candidates
+        self.max_schemas = int(max_schemas)
+        self._lock = threading.Lock()
+        self._mappings = OrderedDict()
+        self._last_schema = None
+        self._hits = 0
+        self._misses = 0
+        self._schema_changes = 0
+
+    def resolve(self, columns):
+        columns = list(columns)
+        key = frozenset(columns)
+        with self._lock:
+            mapping = self._mappings.get(key)
+            if mapping is not None:
+                self._mappings.move_to_end(key)
+                self._hits += 1
+                self._last_schema = key
+                return mapping
+
+        mapping = compile_mapping(columns, self.target_candidates)
+        with self._lock:
+            self._misses += 1
+            if self._last_schema is not None and key != self._last_schema:
+                self._schema_changes += 1
+                added = sorted(map(str, key - self._last_schema))
+                removed = sorted(map(str, self._last_schema - key))
+                logger.info(f"Upstream schema changed: added={added} removed={removed}")
+            unmapped = [t for t, src in mapping.items() if src is None]
+            if unmapped:
+                logger.info(f"Column mapping compiled; unmapped targets: {unmapped}")
+            self._mappings[key] = mapping
+            self._mappings.move_to_end(key)
+            while len(self._mappings) > self.max_schemas:
+                self._mappings.popitem(last=False)
+            self._last_schema = key
+        return mapping
+
+    def stats(self):
+        with self._lock:
+            return {
+                'schemas': len(self._mappings),
+                'hits': self._hits,
+                'misses': self._misses,
+                'schema_changes': self._schema_changes,
+            }
@@ -0,0 +1,137 @@
+"""
+Cached, change-aware loader for the orders.csv fallback.
+
+The parsed records are cached under the file's (path, mtime_ns, size)
+signature and reparsed only when that signature changes. A file that fails
+to parse is remembered by its signature too, so a broken file is not
+reparsed on every request; the previous records (or the same error) are
+returned until it changes again. An optional polling watcher thread
+reloads the file in the background as soon as file-watcher.js (or
+anything else) rewrites it, so request threads never pay the parse cost.
+"""
+
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(path):
+    """(path, mtime_ns, size) for path; raises FileNotFoundError if missing."""
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+class CsvOrderSource:
+    """
+    Parse-once cache for a single CSV file.
+    parse(path) -> records is only called when the file signature changes.
+    """
+
+    def __init__(self, path, parse):
+        self.path = path
+        self._parse = parse
+        self._lock = threading.Lock()
+        self._signature = None
+        self._records = None
+        self._loaded_at = None
+        self._parse_seconds = None
+        self._hits = 0
+        self._reloads = 0
+        self._errors = 0
+        self._failed = None  # (imza, hata): bu imzalı dosya ayrıştırılamadı
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def records(self):
+        """Current records; reparses if the file changed since the last load (or failed parse)."""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"CSV dosyası bulunamadı: {self.path}")
+        sig = file_signature(self.path)
+        if sig == self._signature and self._records is not None:
+            self._hits += 1
+            return self._records
+        with self._lock:
+            if sig == self._signature and self._records is not None:
+                self._hits += 1
+                return self._records
+            if self._failed is not None and self._failed[0] == sig:
+                return self._last_good(self._failed[1])
+            return self._reload(sig)
+
+    def _last_good(self, error):
+        # Called with self._lock held
+        if self._records is None:
+            raise error.with_traceback(None)  # aynı hata nesnesinde traceback birikmesin
+        self._hits += 1
+        return self._records
+
+    def _reload(self, sig):
+        # Called with self._lock held
+        t0 = time.perf_counter()
+        try:
+            records = self._parse(self.path)
+        except Exception as e:
+            self._errors += 1
+            # Yarım yazılmış dosya vb.: dosya yeniden değişene kadar tekrar ayrıştırma
+            self._failed = (sig, e)
+            if self._records is not None:
+                logger.warning(f"CSV reparse failed for {self.path} (mtime_ns={sig[1]}, size={sig[2]}): {e}; "
+                               f"serving previous {len(self._records)} records until it changes")
+            else:
+                logger.warning(f"CSV parse failed for {self.path} (mtime_ns={sig[1]}, size={sig[2]}): {e}")
+            return self._last_good(e)
+        self._failed = None
+        self._parse_seconds = round(time.perf_counter() - t0, 4)
+        # Dosya okunurken değiştiyse imzayı kaydetme; sonraki çağrı yeniden okur
+        try:
+            after = file_signature(self.path)
+        except OSError:
+            after = None
+        self._signature = sig if after == sig else None
+        self._records = records
+        self._loaded_at = time.time()
+        self._reloads += 1
+        logger.info(f"CSV loaded: {len(records)} records from {self.path} in {self._parse_seconds}s")
+        return records
+
+    def start_watcher(self, interval=5.0):
+        """Poll the file every `interval` seconds and reload it when it changes."""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    if not os.path.exists(self.path):
+                        continue
+                    sig = file_signature(self.path)
+                    if sig != self._signature and (self._failed is None or sig != self._failed[0]):
+                        self.records()
+                except Exception as e:
+                    logger.warning(f"CSV watcher reload failed: {e}")
+
+        self._watcher = threading.Thread(target=loop, name='csv-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'loaded': self._records is not None,
+            'records': len(self._records) if self._records is not None else 0,
+            'mtime_ns': self._signature[1] if self._signature else None,
+            'size': self._signature[2] if self._signature else None,
+            'loaded_at': self._loaded_at,
+            'parse_seconds': self._parse_seconds,
+            'hits': self._hits,
+            'reloads': self._reloads,
+            'errors': self._errors,
+            'failed_mtime_ns': self._failed[0][1] if self._failed else None,
+            'last_error': str(self._failed[1]) if self._failed else None,
+            'watching': self._watcher is not None,
+        }
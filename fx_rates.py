@@ -0,0 +1,200 @@
+"""
+Date-indexed FX rate table for currency-normalized reporting.
+
+Rates come from a local file refreshed offline (e.g. a daily export of
+central bank rates); nothing is fetched at request time. Two CSV layouts are
+accepted, with ISO or dd.mm.YYYY dates and '.' or ',' decimals:
+
+    date,currency,rate          date,USD,EUR,GBP
+    2025-09-01,USD,41.12        2025-09-01,41.12,48.05,55.40
+    2025-09-01,EUR,48.05
+
+rate = units of BASE_CURRENCY (TRY) per 1 unit of currency. Each order is
+converted with the last rate on or before its date (as-of join); undated
+rows use the latest rate, rows dated before the first rate stay unconverted
+(NaN). Lookups run once per distinct (currency, date) pair, not per row.
+"""
+
+import hashlib
+import logging
+
+from lazy_imports import lazy_module
+from order_table import OrderTable
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = 'TRY'
+CURRENCY_ALIASES = {'TL': 'TRY', 'YTL': 'TRY', 'TRL': 'TRY', 'EURO': 'EUR', '€': 'EUR', '$': 'USD', '£': 'GBP'}
+
+# Dönüştürülen tutar kolonları
+AMOUNT_COLUMNS = ['TUTAR', 'NET TUTAR', 'KALAN SİPARİŞ NET TUTAR']
+CURRENCY_COLUMN = 'DOVİZ CİNSİ'
+
+
+class FxError(ValueError):
+    """Unknown target currency or unusable rate file (reported as HTTP 400)."""
+
+
+def normalize_currency(code):
+    """Upper-cased ISO-ish code with local aliases folded ('TL' -> 'TRY'); '' for missing."""
+    if code is None or (isinstance(code, float) and np.isnan(code)):
+        return ''
+    code = str(code).strip().upper()
+    return CURRENCY_ALIASES.get(code, code)
+
+
+def converted_column(column, currency):
+    """Name of the converted copy of an amount column, e.g. 'NET TUTAR (EUR)'."""
+    return f"{column} ({currency})"
+
+
+def rate_column(currency):
+    return f"KUR ({currency})"
+
+
+def _parse_rate_dates(values):
+    dates = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    missing = dates.isna()
+    if missing.any():
+        dates = dates.where(~missing, pd.to_datetime(values, format='%d.%m.%Y', errors='coerce'))
+    return dates
+
+
+def _parse_rates(values):
+    if values.dtype == object:
+        values = values.astype(str).str.strip().str.replace(',', '.', regex=False)
+    return pd.to_numeric(values, errors='coerce')
+
+
+class FxRateTable:
+    """Sorted (date, currency, rate) rows with vectorized as-of lookups."""
+
+    def __init__(self, rates, base=BASE_CURRENCY):
+        self.base = base
+        rates = rates.dropna(subset=['date', 'currency', 'rate'])
+        rates = rates[(rates['rate'] > 0) & (rates['currency'] != base)]
+        rates = rates.drop_duplicates(['date', 'currency'], keep='last')
+        self._rates = rates.sort_values('date', kind='stable').reset_index(drop=True)
+        self.currencies = sorted(set(self._rates['currency']) | {base})
+        self.version = hashlib.blake2b(
+            pd.util.hash_pandas_object(self._rates, index=False).to_numpy().tobytes(), digest_size=8).hexdigest()
+
+    @classmethod
+    def from_file(cls, path, base=BASE_CURRENCY):
+        df = pd.read_csv(path, dtype=str, skipinitialspace=True)
+        df.columns = [str(c).strip() for c in df.columns]
+        lower = {c.lower(): c for c in df.columns}
+        if 'date' not in lower:
+            raise FxError(f"FX rate file has no 'date' column: {path}")
+        if 'currency' in lower and 'rate' in lower:
+            long = df.rename(columns={lower['date']: 'date', lower['currency']: 'currency', lower['rate']: 'rate'})
+        else:
+            # Geniş format: her para birimi bir kolon
+            long = df.melt(id_vars=[lower['date']], var_name='currency', value_name='rate')
+            long = long.rename(columns={lower['date']: 'date'})
+        rates = pd.DataFrame({
+            'date': _parse_rate_dates(long['date']),
+            'currency': long['currency'].map(normalize_currency),
+            'rate': _parse_rates(long['rate']),
+        })
+        return cls(rates, base=base)
+
+    def __len__(self):
+        return len(self._rates)
+
+    def check(self, currency):
+        """Normalized currency code; FxError if the table cannot convert into it."""
+        code = normalize_currency(currency)
+        if code not in self.currencies:
+            raise FxError(f"No FX rates for '{currency}' (available: {', '.join(self.currencies)})")
+        return code
+
+    def _base_rates(self, dates, currencies):
+        """BASE_CURRENCY per unit for each (date, currency) pair; NaN where no rate applies."""
+        out = np.full(len(dates), np.nan)
+        is_base = currencies == self.base
+        out[is_base] = 1.0
+        todo = np.flatnonzero(~is_base)
+        if not len(todo) or not len(self._rates):
+            return out
+        when = dates[todo]
+        # Tarihsiz satırlar için en güncel kur
+        when = np.where(np.isnat(when), self._rates['date'].iloc[-1].to_datetime64(), when)
+        left = pd.DataFrame({'date': when.astype('datetime64[ns]'), 'currency': currencies[todo], 'pos': todo})
+        joined = pd.merge_asof(left.sort_values('date', kind='stable'), self._rates,
+                               on='date', by='currency', direction='backward')
+        out[joined['pos'].to_numpy()] = joined['rate'].to_numpy()
+        return out
+
+    def factors(self, dates, currencies, target):
+        """
+        Multipliers converting amounts in currencies (at dates) into target.
+        dates: datetime64 array (NaT allowed); currencies: normalized codes.
+        """
+        target = self.check(target)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        currencies = np.asarray(currencies, dtype=object)
+        source = self._base_rates(dates, currencies)
+        if target == self.base:
+            return source
+        return source / self._base_rates(dates, np.full(len(dates), target, dtype=object))
+
+    def stats(self):
+        if not len(self._rates):
+            return {'rows': 0, 'currencies': self.currencies, 'version': self.version}
+        return {
+            'rows': len(self._rates),
+            'currencies': self.currencies,
+            'from': self._rates['date'].iloc[0].date().isoformat(),
+            'to': self._rates['date'].iloc[-1].date().isoformat(),
+            'version': self.version,
+        }
+
+
+def _distinct(values):
+    """(codes, uniques) with missing values mapped to their own code."""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+    return codes, np.asarray(uniques, dtype=object)
+
+
+def convert_table(records, fx, target):
+    """
+    Copy of records (OrderTable or list of dicts) with 'KUR (target)' and one
+    converted column per amount, e.g. 'KALAN SİPARİŞ NET TUTAR (EUR)'.
+    """
+    table = OrderTable.from_records(records)
+    target = fx.check(target)
+    n = len(table)
+    if not n:
+        return table
+    encoded = table.codes(CURRENCY_COLUMN) if CURRENCY_COLUMN in table.columns else None
+    if encoded is None:
+        raw = table.column(CURRENCY_COLUMN) if CURRENCY_COLUMN in table.columns else np.full(n, None, dtype=object)
+        cur_codes, cur_values = _distinct(raw)
+    else:
+        # Sözlük kodlu kolon: sadece farklı değerler normalize edilir
+        cur_codes, cur_values = encoded
+    cur_values = np.array([normalize_currency(v) for v in cur_values], dtype=object)
+    date_codes, date_values = _distinct(table.column('date') if 'date' in table.columns
+                                        else np.full(n, None, dtype=object))
+    date_values = pd.to_datetime(pd.Series(date_values), errors='coerce').to_numpy('datetime64[D]')
+
+    # Kur araması satır başına değil, farklı (para birimi, tarih) çiftleri için yapılır
+    pairs = cur_codes.astype(np.int64) * (len(date_values) + 1) + date_codes
+    unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+    pair_factors = fx.factors(date_values[unique_pairs % (len(date_values) + 1)],
+                              cur_values[unique_pairs // (len(date_values) + 1)], target)
+    factors = pair_factors[inverse]
+
+    columns = {rate_column(target): factors}
+    for col in AMOUNT_COLUMNS:
+        if col in table.columns:
+            amounts = pd.to_numeric(pd.Series(table.column(col)), errors='coerce').to_numpy(dtype=float)
+            columns[converted_column(col, target)] = amounts * factors
+    unconverted = int(np.isnan(factors).sum())
+    if unconverted:
+        logger.info(f"FX conversion to {target}: {unconverted}/{n} rows without a rate")
+    return table.with_columns(columns)
@@ -0,0 +1,32 @@
+"""
+Gunicorn settings, read automatically from the working directory (command
+line flags such as render.yaml's -w/-k/--threads/-b still apply on top).
+
+preload_app imports api_server once in the master and when_ready warms it
+there (pandas stack, column mapping, last snapshot from the shared cache or
+SQLite store), so forked workers start with all of it already in
+copy-on-write memory instead of paying for it on the first request after a
+spin-up. post_fork finishes the warm-up per worker (cheap when the master
+already did it), starts the per-worker background threads and caps SSE
+subscribers below the worker's thread count (--threads).
+
+GUNICORN_PRELOAD=0 imports the app in each worker instead (e.g. with --reload).
+"""
+
+import os
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def when_ready(server):
+    if preload_app:
+        import api_server
+        api_server.warm_worker(mode='preload')
+
+
+def post_fork(server, worker):
+    import api_server
+    # SSE akışları thread tutar: birkaç thread normal isteklere ayrılır
+    api_server.limit_live_subscribers(server.cfg.threads)
+    api_server.warm_worker(mode='post_fork')
+    api_server.start_background_jobs()
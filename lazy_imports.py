@@ -0,0 +1,65 @@
+"""
+Deferred imports for the heavy data stack (pandas, numpy, pyarrow, openpyxl).
+
+    pd = lazy_module('pandas')
+
+returns a stand-in module that imports the real one on first attribute
+access and delegates to it from then on. Importing api_server therefore does
+not pay the pandas/numpy/pyarrow import (~0.5-1 s, more on small instances):
+/api/health and static files never trigger it, and warm_worker()
+(gunicorn.conf.py) triggers it before the first data request.
+"""
+
+import sys
+import types
+import importlib
+import importlib.util
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder; the target is imported by the first attribute lookup."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_target'] = name
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            # importlib kendi kilidini tutar; eşzamanlı ilk erişimler aynı modülü alır
+            module = importlib.import_module(self.__dict__['_lazy_target'])
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__dict__['_lazy_target']!r} ({state})>"
+
+
+def lazy_module(name):
+    """The real module if it is already imported, else a LazyModule for it."""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def is_installed(name):
+    """True if a top-level package can be imported (checked without importing it)."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def load(*modules):
+    """Force the import of lazy modules (warm-up); returns them."""
+    for module in modules:
+        if isinstance(module, LazyModule):
+            module._load()
+    return modules
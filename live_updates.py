@@ -0,0 +1,241 @@
+"""
+Server-Sent Events fan-out for live order updates (/api/orders/stream).
+
+A single refresher owned by the server publishes each newly loaded record
+set. OrderBroadcaster diffs it against the previous set by order identity
+(snapshot_store.order_identity) and pushes only added/changed/removed rows
+plus the summary totals to every subscriber. New subscribers (and
+reconnects whose Last-Event-ID is not current) start with a full snapshot.
+A subscriber whose queue fills up is resynced with a snapshot instead of
+blocking the publisher. Subscribers that only show aggregates (rows=False)
+get the same events with the summary and row counts but no rows.
+"""
+
+import time
+import queue
+import hashlib
+import threading
+import logging
+
+from response_encoding import dumps
+from snapshot_store import order_identity
+
+logger = logging.getLogger(__name__)
+
+RETRY_MS = 5000
+
+
+def format_event(event, data, event_id=None):
+    """One SSE message; data is JSON-encoded on a single line."""
+    head = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{head}event: {event}\ndata: ".encode('utf-8') + dumps(data) + b'\n\n'
+
+
+def _row_digest(record):
+    return hashlib.blake2b(dumps(record), digest_size=12).hexdigest()
+
+
+def _without_rows(data):
+    # Yalnızca özet isteyen istemci: satır listeleri yerine sayıları
+    out = {k: v for k, v in data.items() if k not in ('rows', 'added', 'changed')}
+    for name in ('added', 'changed'):
+        if name in data:
+            out[name] = len(data[name])
+    if 'removed' in data:
+        out['removed'] = len(data['removed'])
+    return out
+
+
+class Subscription:
+    """
+    Per-client bounded event queue; notify() (if given) runs after every put,
+    e.g. to wake an event loop. rows=False: events carry no row data.
+    """
+
+    def __init__(self, queue_size, notify=None, rows=True):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.needs_resync = False
+        self.notify = notify
+        self.rows = rows
+
+    def format(self, event, data, event_id=None):
+        if not self.rows and event in ('snapshot', 'diff'):
+            data = _without_rows(data)
+        return format_event(event, data, event_id)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Yavaş istemci: kuyruğu boşalt, bir sonraki okumada tam anlık görüntü gönder
+            self.needs_resync = True
+        if self.notify is not None:
+            self.notify()
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_nowait(self):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class OrderBroadcaster:
+    """Keeps the last published record set and fans out diffs to subscribers."""
+
+    def __init__(self, queue_size=16, max_subscribers=50, clock=time.time):
+        self.queue_size = int(queue_size)
+        self.max_subscribers = int(max_subscribers)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._rows = {}  # order key -> (row digest, record), in record order
+        self._summary = None
+        self.version = 0
+        self._published_at = None
+        self._last_diff = None
+        self._last_error = None
+        self._publishes = 0
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self, notify=None, rows=True):
+        """Register a subscriber; returns None when max_subscribers is reached."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            sub = Subscription(self.queue_size, notify, rows)
+            self._subscribers.add(sub)
+            return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def _snapshot_locked(self, rows=True):
+        return {
+            'version': self.version,
+            'rows': [{'id': k, 'row': rec} for k, (_, rec) in self._rows.items()] if rows else [],
+            'removed': [],
+            'summary': self._summary,
+            'count': len(self._rows),
+            'at': self._published_at,
+        }
+
+    def _broadcast_locked(self, event):
+        for sub in self._subscribers:
+            sub.put(event)
+
+    def publish(self, records, summary=None):
+        """
+        Diff records against the previous set and push a 'diff' event if
+        anything changed. Returns {'added','changed','removed'} counts.
+        """
+        keys = order_identity(records)
+        new_rows = {k: (_row_digest(rec), rec) for k, rec in zip(keys, records)}
+        with self._lock:
+            old_rows = self._rows
+            added = [{'id': k, 'row': rec} for k, (h, rec) in new_rows.items() if k not in old_rows]
+            changed = [{'id': k, 'row': rec} for k, (h, rec) in new_rows.items()
+                       if k in old_rows and old_rows[k][0] != h]
+            removed = [k for k in old_rows if k not in new_rows]
+            summary_changed = summary != self._summary
+            self._rows = new_rows
+            self._summary = summary
+            self._published_at = self._clock()
+            self._publishes += 1
+            self._last_error = None
+            counts = {'added': len(added), 'changed': len(changed), 'removed': len(removed)}
+            if added or changed or removed or summary_changed:
+                self.version += 1
+                self._last_diff = {'version': self.version, 'at': self._published_at, **counts}
+                self._broadcast_locked(('diff', self.version, {
+                    'version': self.version,
+                    'added': added,
+                    'changed': changed,
+                    'removed': removed,
+                    'summary': summary,
+                    'count': len(new_rows),
+                    'at': self._published_at,
+                }))
+        if added or changed or removed:
+            logger.info(f"Live update v{self.version}: {counts}")
+        return counts
+
+    def publish_error(self, error):
+        """Tell subscribers the last refresh failed (their data is now stale)."""
+        with self._lock:
+            self._last_error = str(error)
+            self._broadcast_locked(('upstream_error', None, {'error': str(error), 'version': self.version,
+                                                             'at': self._clock()}))
+
+    def opening(self, sub, last_event_id=None):
+        """First chunks of a stream: the retry hint and a snapshot unless last_event_id is current."""
+        chunks = [f"retry: {RETRY_MS}\n\n".encode('utf-8')]
+        with self._lock:
+            current = str(self.version) == str(last_event_id or '')
+            snapshot = self._snapshot_locked(sub.rows) if self.version and not current else None
+        if snapshot is not None:
+            chunks.append(sub.format('snapshot', snapshot, snapshot['version']))
+        return chunks
+
+    def pending(self, sub):
+        """Chunks ready for sub without blocking: a resync snapshot if it fell behind, then queued events."""
+        chunks = []
+        if sub.needs_resync:
+            with self._lock:
+                sub.drain()
+                sub.needs_resync = False
+                snapshot = self._snapshot_locked(sub.rows)
+            chunks.append(sub.format('snapshot', snapshot, snapshot['version']))
+        while True:
+            event = sub.get_nowait()
+            if event is None:
+                return chunks
+            name, event_id, data = event
+            chunks.append(sub.format(name, data, event_id))
+
+    def events(self, sub, last_event_id=None, heartbeat=15.0):
+        """
+        Blocking SSE byte stream for sub (one thread per client): opening(),
+        then pending() events as they are published, with comment heartbeats
+        in between. Unsubscribes when the client goes away.
+        """
+        try:
+            yield from self.opening(sub, last_event_id)
+            while True:
+                yield from self.pending(sub)
+                event = sub.get(timeout=heartbeat)
+                if event is None:
+                    yield b': keepalive\n\n'
+                    continue
+                name, event_id, data = event
+                yield sub.format(name, data, event_id)
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'version': self.version,
+                'rows': len(self._rows),
+                'published_at': self._published_at,
+                'publishes': self._publishes,
+                'last_diff': self._last_diff,
+                'last_error': self._last_error,
+            }
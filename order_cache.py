@@ -0,0 +1,171 @@
+"""
+In-process TTL cache for processed order data.
+
+Entries are fresh for `ttl` seconds; after that they are served stale for up
+to `stale_ttl` more seconds while a background thread refreshes them
+(stale-while-revalidate). Concurrent misses for the same key share a single
+loader call (single-flight). Values rejected by the optional cacheable()
+predicate (e.g. partial fetches) are returned to the caller but never
+stored, whether they were loaded on a miss or by a background refresh.
+"""
+
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at')
+
+    def __init__(self, value, stored_at):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class OrderCache:
+    """Thread-safe TTL + stale-while-revalidate cache with single-flight loads."""
+
+    def __init__(self, ttl=60, stale_ttl=300, max_entries=32, clock=time.monotonic, cacheable=None):
+        self.ttl = float(ttl)
+        self.stale_ttl = float(stale_ttl)
+        self.max_entries = int(max_entries)
+        self._clock = clock
+        self._cacheable = cacheable
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0, 'uncacheable': 0}
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, key, loader, force_refresh=False):
+        """
+        Return (value, meta) for key, calling loader() when needed.
+        meta: {'status': 'hit'|'stale'|'miss'|'bypass', 'age': seconds}
+        Loader exceptions propagate to the caller on a miss.
+        """
+        if not self.enabled:
+            return loader(), {'status': 'bypass', 'age': 0.0}
+
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not force_refresh:
+                age = now - entry.stored_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry.value, {'status': 'hit', 'age': round(age, 3)}
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['stale_hits'] += 1
+                    if key not in self._inflight:
+                        self._start_background_refresh(key, loader)
+                    return entry.value, {'status': 'stale', 'age': round(age, 3)}
+            self._stats['misses'] += 1
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if owner:
+            self._load(key, loader, future)
+        # Aynı anahtar için bekleyen istekler tek upstream çağrısını paylaşır
+        return future.result(), {'status': 'miss', 'age': 0.0}
+
+    def lookup(self, key):
+        """
+        Non-loading lookup for callers that manage their own loads (asyncio).
+        Returns (value, meta); value is None on a miss. Counts stats like get().
+        """
+        if not self.enabled:
+            return None, {'status': 'bypass', 'age': 0.0}
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.stored_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry.value, {'status': 'hit', 'age': round(age, 3)}
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['stale_hits'] += 1
+                    return entry.value, {'status': 'stale', 'age': round(age, 3)}
+            self._stats['misses'] += 1
+            return None, {'status': 'miss', 'age': 0.0}
+
+    def _start_background_refresh(self, key, loader):
+        # Called with self._lock held
+        future = Future()
+        self._inflight[key] = future
+        self._stats['refreshes'] += 1
+        t = threading.Thread(target=self._load, args=(key, loader, future),
+                             name='order-cache-refresh', daemon=True)
+        t.start()
+
+    def _load(self, key, loader, future):
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                self._inflight.pop(key, None)
+            logger.warning(f"Order cache load failed for {key}: {e}")
+            future.set_exception(e)
+            return
+        if self._cacheable is None or self._cacheable(value):
+            self.put(key, value)
+        else:
+            # Önceki (varsa bayat) kayıt kalır; bir sonraki istek yeniden dener
+            logger.warning(f"Order cache: not storing uncacheable result for {key}")
+            with self._lock:
+                self._stats['uncacheable'] += 1
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def put(self, key, value, age=0.0):
+        """Store value; age > 0 back-dates it (e.g. data restored from disk)."""
+        with self._lock:
+            self._entries[key] = _Entry(value, self._clock() - max(float(age), 0.0))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def peek(self, key):
+        """Cached value for key regardless of age (no stats, no refresh), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        now = self._clock()
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['stale_hits'] + self._stats['misses']
+            served = self._stats['hits'] + self._stats['stale_hits']
+            return {
+                'enabled': self.enabled,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'entries': len(self._entries),
+                'inflight': len(self._inflight),
+                'hit_ratio': round(served / lookups, 4) if lookups else None,
+                'oldest_age': round(max((now - e.stored_at for e in self._entries.values()), default=0.0), 3),
+                **self._stats,
+            }
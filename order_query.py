@@ -0,0 +1,170 @@
+"""
+Filtering, sorting and paging over normalized order records.
+
+OrderIndex is built once per cached dataset and keeps precomputed lookup
+structures next to the original records:
+  - a sorted date column for range queries by bisection,
+  - categorical codes for currency / status / responsibility center
+    (currency aliases folded, a blank currency counts as the base currency),
+  - a casefolded customer+project text column for search,
+  - per-field sort ranks for multi-key sorting with numpy.lexsort.
+Queries return positions into the original record list, so the records are
+never copied or re-serialized.
+"""
+
+from fx_rates import BASE_CURRENCY, normalize_currency
+from lazy_imports import lazy_module
+from order_table import OrderTable
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+# Sorgu parametresi / sıralama alanı -> kayıt kolonu
+FIELD_ALIASES = {
+    'date': 'date',
+    'customer': 'CARİ İSMİ',
+    'project': 'PROJE',
+    'currency': 'DOVİZ CİNSİ',
+    'status': 'DURUM',
+    'center': 'Sorumluluk Merkezi Adı',
+    'quantity': 'MİKTAR',
+    'delivered': 'TAMAMLANAN MİKTAR',
+    'remaining': 'KALAN MİKTAR',
+    'amount': 'NET TUTAR',
+    'remaining_amount': 'KALAN SİPARİŞ NET TUTAR',
+}
+
+CATEGORY_FILTERS = ('currency', 'status', 'center')
+NUMERIC_FIELDS = ('MİKTAR', 'TAMAMLANAN MİKTAR', 'KALAN MİKTAR', 'TUTAR', 'NET TUTAR', 'KALAN SİPARİŞ NET TUTAR')
+SORTABLE_COLUMNS = frozenset(FIELD_ALIASES.values()) | frozenset(NUMERIC_FIELDS)
+
+
+class QueryError(ValueError):
+    """Invalid query parameter (unknown sort field etc.)."""
+
+
+def parse_sort(fields):
+    """['-date', 'customer'] -> [('date', True), ('CARİ İSMİ', False)]; QueryError on unknown fields."""
+    parsed = []
+    for field in fields or []:
+        desc = field.startswith('-')
+        name = field.lstrip('-+').strip()
+        col = FIELD_ALIASES.get(name, name)
+        if col not in SORTABLE_COLUMNS:
+            raise QueryError(f"Unknown sort field: {name}")
+        parsed.append((col, desc))
+    return parsed
+
+
+def _currency_key(value):
+    # Ekranlar boş dövizi TL gösterir: filtrede de 'TL' = 'TRY' = boş
+    return (normalize_currency(value) or BASE_CURRENCY).casefold()
+
+
+# Filtre değerlerinin karşılaştırma anahtarı
+CATEGORY_KEYS = {'currency': _currency_key}
+
+
+def _text_column(df, col):
+    if col not in df.columns:
+        return pd.Series([''] * len(df), index=df.index, dtype=object)
+    return df[col].fillna('').astype(str).str.strip()
+
+
+class OrderIndex:
+    """Precomputed query structures over a list of order records."""
+
+    def __init__(self, records):
+        self.records = records
+        n = len(records)
+        self.size = n
+        if isinstance(records, OrderTable):
+            df = records.to_frame()
+        else:
+            df = pd.DataFrame.from_records(records) if records else pd.DataFrame(index=pd.RangeIndex(0))
+
+        # Tarih: boş olmayanlar sıralı tutulur, aralık sorgusu searchsorted ile
+        dates = df['date'] if 'date' in df.columns else pd.Series([None] * n, dtype=object)
+        dates = dates.where(dates.notna() & (dates.astype(str) != ''), None)
+        has_date = dates.notna().to_numpy()
+        dated_pos = np.flatnonzero(has_date)
+        dated_vals = dates.to_numpy(dtype=object)[dated_pos].astype(str)
+        order = np.argsort(dated_vals, kind='stable')
+        self._date_positions = dated_pos[order]
+        self._date_sorted = dated_vals[order]
+
+        # Kategorik kolonlar: filtre anahtarı -> kodlar, satır başına int kod dizisi
+        self._categories = {}
+        for name in CATEGORY_FILTERS:
+            cat = pd.Categorical(_text_column(df, FIELD_ALIASES[name]))
+            key = CATEGORY_KEYS.get(name, str.casefold)
+            lookup = {}
+            for i, v in enumerate(cat.categories):
+                lookup.setdefault(key(v), []).append(i)
+            self._categories[name] = (key, lookup, np.asarray(cat.codes))
+
+        # Arama metni: müşteri + proje
+        self._search_text = (_text_column(df, 'CARİ İSMİ') + '\u0000' + _text_column(df, 'PROJE')).str.casefold()
+
+        # Sıralama sıraları: metinler için sıralı kategori kodu, sayılar için değer
+        self._sort_keys = {}
+        for col in SORTABLE_COLUMNS:
+            if col in NUMERIC_FIELDS:
+                if col in df.columns:
+                    vals = pd.to_numeric(df[col], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+                else:
+                    vals = np.zeros(n)
+                self._sort_keys[col] = vals
+            else:
+                text = _text_column(df, col) if col != 'date' else dates.fillna('').astype(str)
+                cat = pd.Categorical(text.str.casefold(), ordered=True)
+                self._sort_keys[col] = np.asarray(cat.codes, dtype=np.int64)
+
+    def _date_range_positions(self, start=None, end=None):
+        lo = np.searchsorted(self._date_sorted, start, side='left') if start else 0
+        hi = np.searchsorted(self._date_sorted, end, side='right') if end else len(self._date_sorted)
+        return self._date_positions[lo:hi]
+
+    def query(self, start=None, end=None, search=None, filters=None, min_amount=None, sort=None,
+              offset=0, limit=None):
+        """
+        start/end: inclusive ISO date bounds; search: substring on customer/project;
+        filters: {'currency'|'status'|'center': [values]}; min_amount: lower bound on
+        the remaining net amount; sort: ['-date', 'customer', ...];
+        Returns (total_matches, records_page).
+        """
+        mask = np.ones(self.size, dtype=bool)
+        if start or end:
+            mask[:] = False
+            mask[self._date_range_positions(start, end)] = True
+
+        for name, values in (filters or {}).items():
+            if name not in self._categories or not values:
+                continue
+            key, lookup, codes = self._categories[name]
+            wanted = [i for v in values for i in lookup.get(key(v), ())]
+            mask &= np.isin(codes, wanted)
+
+        if min_amount is not None:
+            mask &= self._sort_keys['KALAN SİPARİŞ NET TUTAR'] >= min_amount
+
+        if search:
+            needle = search.strip().casefold()
+            if needle:
+                mask &= self._search_text.str.contains(needle, regex=False).to_numpy()
+
+        positions = np.flatnonzero(mask)
+
+        if sort:
+            keys = []
+            for col, desc in reversed(parse_sort(sort)):
+                vals = self._sort_keys[col][positions]
+                keys.append(-vals if desc else vals)
+            positions = positions[np.lexsort(keys)]
+
+        total = int(len(positions))
+        offset = max(int(offset or 0), 0)
+        page = positions[offset:offset + limit] if limit is not None else positions[offset:]
+        if isinstance(self.records, OrderTable):
+            return total, self.records.take(page)
+        return total, [self.records[i] for i in page]
@@ -0,0 +1,149 @@
+"""
+Server-side aggregates over normalized order records (process_data() output).
+
+Amounts are never summed across currencies: every grouping other than the
+currency one is keyed by (group value, DOVİZ CİNSİ). With a target currency
+(records converted by fx_rates.convert_table) the groups are keyed by value
+only and amounts are the converted ones, so each report is computed once.
+"""
+
+from fx_rates import converted_column, rate_column
+from lazy_imports import lazy_module
+from order_table import OrderTable
+
+pd = lazy_module('pandas')
+
+# Özet tablolarının grup adı -> kayıt kolonu
+GROUP_COLUMNS = {
+    'customer': 'CARİ İSMİ',
+    'center': 'Sorumluluk Merkezi Adı',
+    'project': 'PROJE',
+    'status': 'DURUM',
+    'day': 'date',
+    'month': 'month',
+}
+
+# Kayıt kolonu -> özet alan adı
+MEASURES = {
+    'MİKTAR': 'quantity',
+    'TAMAMLANAN MİKTAR': 'delivered_quantity',
+    'KALAN MİKTAR': 'remaining_quantity',
+    'NET TUTAR': 'net_amount',
+    'KALAN SİPARİŞ NET TUTAR': 'remaining_net_amount',
+}
+
+CURRENCY_COLUMN = 'DOVİZ CİNSİ'
+
+# Kur dönüşümü yapılan ölçüler
+CONVERTED_MEASURES = ['NET TUTAR', 'KALAN SİPARİŞ NET TUTAR']
+
+
+def records_to_frame(records):
+    """DataFrame with the columns the aggregations need (missing ones filled)."""
+    if isinstance(records, OrderTable):
+        df = records.to_frame()
+    else:
+        df = pd.DataFrame.from_records(records) if records else pd.DataFrame()
+    for col in MEASURES:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
+        else:
+            df[col] = 0.0
+    for col in (CURRENCY_COLUMN, 'CARİ İSMİ', 'Sorumluluk Merkezi Adı', 'PROJE', 'DURUM'):
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str).str.strip()
+        else:
+            df[col] = ''
+    if 'date' not in df.columns:
+        df['date'] = None
+    df['month'] = df['date'].where(df['date'].notna(), None).str.slice(0, 7)
+    return df
+
+
+def aggregate_frame(df, keys):
+    """Sum every measure (renamed to its summary field) plus a row count per keys group."""
+    grouped = df.groupby(keys, sort=False, dropna=True)
+    agg = grouped[list(MEASURES)].sum()
+    agg['count'] = grouped.size()
+    agg = agg.rename(columns=MEASURES).reset_index()
+    return agg
+
+
+def _round_records(agg):
+    for col in MEASURES.values():
+        agg[col] = agg[col].round(2)
+    return agg.to_dict('records')
+
+
+def _converted_frame(df, currency):
+    """df with amount measures replaced by their converted columns (0 where no rate) and one currency."""
+    replaced = {CURRENCY_COLUMN: currency}
+    for col in CONVERTED_MEASURES:
+        source = converted_column(col, currency)
+        replaced[col] = pd.to_numeric(df[source], errors='coerce').fillna(0.0) if source in df.columns else 0.0
+    return df.assign(**replaced)
+
+
+def _converted_totals(df, converted, currency):
+    rate = rate_column(currency)
+    unconverted = int(df[rate].isna().sum()) if rate in df.columns else int(len(df))
+    totals = {'currency': currency, 'unconverted': unconverted}
+    for col in CONVERTED_MEASURES:
+        totals[MEASURES[col]] = round(float(converted[col].sum()), 2)
+    return totals
+
+
+def summarize_frame(df, groups=None, limit=None, currency=None):
+    """
+    Aggregate a frame from records_to_frame().
+    groups: iterable of GROUP_COLUMNS keys (None: all, empty: totals and by_currency
+    only); limit: top-N rows per group (by remaining_net_amount; time groups keep
+    the latest N, in date order).
+    group_rows reports each group's row count before the limit.
+    currency: target of a prior convert_table(); totals and groups are then in that
+    currency, by_currency keeps native sums plus converted_* amounts.
+    """
+    groups = [g for g in (GROUP_COLUMNS if groups is None else groups) if g in GROUP_COLUMNS]
+
+    totals = {
+        'count': int(len(df)),
+        'customers': int(df.loc[df['CARİ İSMİ'] != '', 'CARİ İSMİ'].nunique()),
+        'quantity': round(float(df['MİKTAR'].sum()), 2),
+        'delivered_quantity': round(float(df['TAMAMLANAN MİKTAR'].sum()), 2),
+        'remaining_quantity': round(float(df['KALAN MİKTAR'].sum()), 2),
+    }
+
+    by_currency = aggregate_frame(df, [CURRENCY_COLUMN]).rename(columns={CURRENCY_COLUMN: 'currency'})
+    if currency:
+        converted = _converted_frame(df, currency)
+        totals.update(_converted_totals(df, converted, currency))
+        sums = converted.groupby(df[CURRENCY_COLUMN], sort=False)[CONVERTED_MEASURES].sum()
+        for col in CONVERTED_MEASURES:
+            by_currency[f'converted_{MEASURES[col]}'] = (
+                by_currency['currency'].map(sums[col]).fillna(0.0).round(2))
+        by_currency = by_currency.sort_values('converted_remaining_net_amount', ascending=False)
+        df = converted
+    else:
+        by_currency = by_currency.sort_values('remaining_net_amount', ascending=False)
+
+    result = {'totals': totals, 'by_currency': _round_records(by_currency), 'group_rows': {}}
+    for name in groups:
+        col = GROUP_COLUMNS[name]
+        sub = df[df[col].notna()] if name in ('day', 'month') else df
+        agg = aggregate_frame(sub, [col, CURRENCY_COLUMN]).rename(columns={col: 'key', CURRENCY_COLUMN: 'currency'})
+        result['group_rows'][name] = int(len(agg))
+        if name in ('day', 'month'):
+            agg = agg.sort_values(['key', 'currency'])
+            if limit:
+                agg = agg.tail(limit)
+        else:
+            agg = agg.sort_values(['remaining_net_amount', 'key'], ascending=[False, True])
+            if limit:
+                agg = agg.head(limit)
+        result[f'by_{name}'] = _round_records(agg)
+    return result
+
+
+def summarize_records(records, groups=None, limit=None, currency=None):
+    """Convenience wrapper: records (list of dicts or OrderTable) -> summary dict."""
+    return summarize_frame(records_to_frame(records), groups=groups, limit=limit, currency=currency)
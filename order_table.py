@@ -0,0 +1,259 @@
+"""
+Columnar in-memory order table (the internal form of a processed dataset).
+
+Holding orders as a list of dicts repeats every long Turkish header key
+('KALAN SİPARİŞ NET TUTAR', ...) and every customer/project string per
+row. OrderTable stores one NumPy array per column instead:
+
+- numeric columns (quantities, amounts) as float/int arrays,
+- ISO 'date' as datetime64[D] (NaT for missing),
+- text columns (currency, customer, project, status, center, ...) dictionary
+  encoded: int32 codes plus one array of distinct values.
+
+It behaves like a read-only sequence of records: table[i] is an OrderRow
+(a __slots__ Mapping view, so rec['CARİ İSMİ'] / rec.get() keep working),
+table[a:b] and take(positions) return tables sharing the dictionaries, and
+to_records() produces the same list of dicts process_data() returns, for
+the JSON layer.
+"""
+
+import sys
+import hashlib
+from collections.abc import Mapping
+
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+_NUMERIC = 'num'
+_CATEGORY = 'cat'
+_DATE = 'date'
+
+
+class _Column:
+    __slots__ = ('kind', 'data', 'values')
+
+    def __init__(self, kind, data, values=None):
+        self.kind = kind
+        self.data = data      # num: values; cat: int32 codes (-1 = missing); date: datetime64[D]
+        self.values = values  # cat: distinct values (object array, missing appended last)
+
+    def take(self, positions):
+        return _Column(self.kind, self.data[positions], self.values)
+
+    def decode(self):
+        """Column values as a NumPy array of Python-level values (object for text/dates)."""
+        if self.kind == _NUMERIC:
+            return self.data
+        if self.kind == _CATEGORY:
+            # -1 kodu son elemana (eksik değer) düşer
+            return self.values[self.data]
+        out = np.datetime_as_string(self.data, unit='D').astype(object)
+        out[np.isnat(self.data)] = None
+        return out
+
+    def value(self, i):
+        if self.kind == _NUMERIC:
+            return self.data[i].item()
+        if self.kind == _CATEGORY:
+            return self.values[self.data[i]]
+        d = self.data[i]
+        return None if np.isnat(d) else str(d)
+
+    def nbytes(self):
+        size = self.data.nbytes
+        if self.values is not None:
+            size += self.values.nbytes + sum(sys.getsizeof(v) for v in self.values if v is not None)
+        return size
+
+
+def _is_iso_date_column(series):
+    """True when every value is None or a 'YYYY-MM-DD' string (safe to store as datetime64)."""
+    present = series[series.notna()]
+    if len(present) != int((series.map(lambda v: v is not None)).sum()):
+        return False  # NaN ile None ayrımı korunmalı
+    if not len(present) or not present.map(lambda v: isinstance(v, str)).all():
+        return False
+    return bool(present.str.fullmatch(r'\d{4}-\d{2}-\d{2}').all())
+
+
+def _encode(series):
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+        return _Column(_NUMERIC, series.to_numpy())
+    if series.name == 'date' and _is_iso_date_column(series):
+        return _Column(_DATE, series.to_numpy(dtype=object).astype('datetime64[D]'))
+    values = series.to_numpy(dtype=object)
+    missing = pd.isna(values)
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    lookup = np.empty(len(uniques) + 1, dtype=object)
+    lookup[:len(uniques)] = uniques
+    # Eksik değer tipini koru (None / NaN), kayıtlar process_data() çıktısıyla aynı kalsın
+    lookup[-1] = values[missing][0] if missing.any() else None
+    return _Column(_CATEGORY, codes.astype(np.int32), lookup)
+
+
+class OrderRow(Mapping):
+    """Read-only record view over one table row."""
+
+    __slots__ = ('_table', '_i')
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, key):
+        try:
+            column = self._table._columns[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return column.value(self._i)
+
+    def __iter__(self):
+        return iter(self._table.columns)
+
+    def __len__(self):
+        return len(self._table.columns)
+
+    def to_dict(self):
+        return {name: self[name] for name in self._table.columns}
+
+    def __repr__(self):
+        return f"OrderRow({self.to_dict()!r})"
+
+
+class OrderTable:
+    """Immutable column store of normalized order records."""
+
+    __slots__ = ('columns', '_columns', '_length')
+
+    def __init__(self, columns, encoded, length):
+        self.columns = list(columns)
+        self._columns = encoded
+        self._length = int(length)
+
+    @classmethod
+    def from_frame(cls, df):
+        df = df.reset_index(drop=True)
+        return cls(df.columns, {name: _encode(df[name]) for name in df.columns}, len(df))
+
+    @classmethod
+    def from_records(cls, records):
+        if isinstance(records, OrderTable):
+            return records
+        records = list(records)
+        if not records:
+            return cls([], {}, 0)
+        return cls.from_frame(pd.DataFrame.from_records(records))
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.take(np.arange(self._length)[item])
+        i = int(item)
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError('OrderTable index out of range')
+        return OrderRow(self, i)
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield OrderRow(self, i)
+
+    def take(self, positions):
+        """Rows at positions (array of ints) as a new table sharing the dictionaries."""
+        positions = np.asarray(positions, dtype=np.intp)
+        return OrderTable(self.columns, {n: c.take(positions) for n, c in self._columns.items()}, len(positions))
+
+    def with_columns(self, arrays):
+        """New table with extra (or replaced) numeric columns {name: array}; shares the rest."""
+        encoded = dict(self._columns)
+        names = list(self.columns)
+        for name, data in arrays.items():
+            data = np.asarray(data)
+            if len(data) != self._length:
+                raise ValueError(f"column {name!r} has {len(data)} values, table has {self._length}")
+            if name not in encoded:
+                names.append(name)
+            encoded[name] = _Column(_NUMERIC, data)
+        return OrderTable(names, encoded, self._length)
+
+    def encoded(self):
+        """[(name, kind, data, values)]: the raw column encoding, for serializers (shared_cache)."""
+        return [(name, self._columns[name].kind, self._columns[name].data, self._columns[name].values)
+                for name in self.columns]
+
+    @classmethod
+    def from_encoded(cls, columns, length):
+        """Inverse of encoded(); arrays are used as given (they may be read-only memory maps)."""
+        return cls([c[0] for c in columns],
+                   {name: _Column(kind, data, values) for name, kind, data, values in columns}, length)
+
+    def column(self, name):
+        """Decoded column as a NumPy array (numeric dtype or object)."""
+        return self._columns[name].decode()
+
+    def codes(self, name):
+        """(codes, values) for a dictionary-encoded column, or None."""
+        column = self._columns.get(name)
+        if column is None or column.kind != _CATEGORY:
+            return None
+        return column.data, column.values
+
+    def to_frame(self):
+        return pd.DataFrame({name: self.column(name) for name in self.columns},
+                            index=pd.RangeIndex(self._length))
+
+    def to_records(self):
+        """List of plain dicts (same shape and value types as process_data())."""
+        if not self._length:
+            return []
+        values = [self.column(name).tolist() for name in self.columns]
+        names = self.columns
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def digest(self):
+        """Content hash over every column (row order sensitive)."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(self._length).encode('ascii'))
+        for name in self.columns:
+            column = self._columns[name]
+            h.update(name.encode('utf-8'))
+            h.update(column.kind.encode('ascii'))
+            h.update(np.ascontiguousarray(column.data).tobytes())
+            if column.values is not None:
+                h.update(repr(column.values.tolist()).encode('utf-8'))
+        return h.hexdigest()
+
+    def nbytes(self):
+        """Approximate memory held by the columns (arrays + distinct strings)."""
+        seen = set()
+        total = 0
+        for column in self._columns.values():
+            total += column.data.nbytes
+            if column.values is not None and id(column.values) not in seen:
+                seen.add(id(column.values))
+                total += column.nbytes() - column.data.nbytes
+        return total
+
+    def stats(self):
+        return {
+            'rows': self._length,
+            'bytes': self.nbytes(),
+            'columns': {name: c.kind if c.kind != _CATEGORY else f"cat({len(c.values) - 1})"
+                        for name, c in self._columns.items()},
+        }
+
+
+def as_records(rows):
+    """JSON-layer boundary: list of plain dicts from an OrderTable, row views or dicts."""
+    if isinstance(rows, OrderTable):
+        return rows.to_records()
+    return [r.to_dict() if isinstance(r, OrderRow) else r for r in rows]
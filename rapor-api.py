@@ -2,7 +2,7 @@
 # pip install requests pandas
 
 import os
-import requests
+import argparse
 import pandas as pd
 
 # Basit .env yükleyici: .env dosyası varsa key=value satırlarını ortam değişkenlerine ekler
@@ -26,25 +26,46 @@ def _load_dotenv_if_present(path: str = ".env"):
 
 _load_dotenv_if_present()
 
-# Ortam değişkenleri (repo genelinde aynı isimler kullanılıyor)
-REMOTE_API_BASE = os.getenv("REMOTE_API_BASE", "http://85.153.155.153:5047").strip()
-REMOTE_ORDERS_PATH = os.getenv("REMOTE_ORDERS_PATH", "/api/Listeler/listeSIPARISLERCVS").strip()
-REMOTE_BEARER_TOKEN = os.getenv("REMOTE_BEARER_TOKEN", "").strip()
+# .env yüklendikten sonra içe aktar: istemci ayarlarını ortamdan okur
+from remote_client import client_from_env
+from report_exports import FORMATS, write_export
 
 # Paginasyon parametreleri (env ile yönetilebilir)
 PAGE_INDEX = int(os.getenv("PAGE_INDEX", "0") or 0)
 PAGE_SIZE  = int(os.getenv("PAGE_SIZE", "500") or 500)
 
 def get_siparisler():
-    url = f"{REMOTE_API_BASE}{REMOTE_ORDERS_PATH}"
-    headers = {"Authorization": f"Bearer {REMOTE_BEARER_TOKEN}"} if REMOTE_BEARER_TOKEN else {}
+    client = client_from_env()
     params = {"pageIndex": PAGE_INDEX, "pageSize": PAGE_SIZE}
+    return client.get_orders(params)   # list[dict]
 
-    resp = requests.get(url, headers=headers, params=params, timeout=30)
-    resp.raise_for_status()
-    return resp.json()          # list[dict]
+def add_remaining_columns(df):
+    """
+    11-12. sütunlar: kalan_miktar = miktar - tamamlanan_miktar,
+    kalan_net_tutar = tutar_net * kalan_miktar / miktar (2 hane; miktar 0 ya da sayı değilse 0).
+    Satır satır apply yerine kolon işlemleri.
+    """
+    if "miktar" in df.columns and "tamamlanan_miktar" in df.columns:
+        df["kalan_miktar"] = (pd.to_numeric(df["miktar"], errors="coerce").fillna(0)
+                              - pd.to_numeric(df["tamamlanan_miktar"], errors="coerce").fillna(0))
+    else:
+        df["kalan_miktar"] = 0
+    if all(col in df.columns for col in ["tutar_net", "kalan_miktar", "miktar"]):
+        miktar = pd.to_numeric(df["miktar"], errors="coerce")
+        net = pd.to_numeric(df["tutar_net"], errors="coerce")
+        # 0'a bölme NaN üretir (mask), sonra 0.0
+        oran = df["kalan_miktar"] / miktar.where(miktar != 0)
+        df["kalan_net_tutar"] = (net * oran).round(2).fillna(0.0)
+    else:
+        df["kalan_net_tutar"] = 0.0
+    return df
 
 def main():
+    ap = argparse.ArgumentParser(description="ERP sipariş raporu")
+    ap.add_argument("--format", choices=sorted(FORMATS), help="stdout yerine dosyaya yaz (xlsx, csv, parquet)")
+    ap.add_argument("--output", help="çıktı dosyası (varsayılan siparis_raporu.<format>)")
+    args = ap.parse_args()
+
     raw = get_siparisler()
     df  = pd.DataFrame(raw)
 
@@ -68,23 +89,14 @@ def main():
         print(df.to_string(index=False))
         return
 
-    # 11-12. sütunlar
-    if "miktar" in df.columns and "tamamlanan_miktar" in df.columns:
-        df["kalan_miktar"] = df["miktar"].fillna(0) - df["tamamlanan_miktar"].fillna(0)
-    else:
-        df["kalan_miktar"] = 0
-    if all(col in df.columns for col in ["tutar_net","kalan_miktar","miktar"]):
-        def _calc(r):
-            try:
-                return round(float(r["tutar_net"]) * float(r["kalan_miktar"]) / float(r["miktar"]) , 2) if float(r["miktar"]) else 0.0
-            except Exception:
-                return 0.0
-        df["kalan_net_tutar"] = df.apply(_calc, axis=1)
-    else:
-        df["kalan_net_tutar"] = 0.0
+    df = add_remaining_columns(df)
 
-    print(df.to_string(index=False))
-    # df.to_excel("siparis_raporu.xlsx", index=False)  # istersen
+    if args.format:
+        output = args.output or f"siparis_raporu{FORMATS[args.format][1]}"
+        rows = write_export(df, args.format, output)
+        print(f"{rows} satır yazıldı: {output}")
+    else:
+        print(df.to_string(index=False))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
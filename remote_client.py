@@ -0,0 +1,285 @@
+"""
+Shared HTTP client for the remote ERP orders API.
+
+Used by api_server.py and rapor-api.py. Provides a pooled keep-alive
+requests.Session, split connect/read timeouts, retry/backoff on connection
+errors and 5xx responses, and a circuit breaker so callers can skip the
+upstream entirely (and go straight to the CSV fallback) while it is down.
+
+Read timeouts are never retried (a hung ERP would otherwise cost a full
+read timeout per attempt), all attempts of one call share a single
+deadline, and a call counts as one breaker failure only once its last
+attempt has failed, so a single transient error can't open the breaker.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the upstream while the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Minimal closed -> open -> half-open breaker.
+    Opens after `failure_threshold` consecutive failures; after `reset_timeout`
+    seconds a single trial call is let through (half-open).
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = 'closed'
+        self._failures = 0
+        self._opened_at = None
+        self._trial_inflight = False
+        self._last_error = None
+        self._open_count = 0
+
+    def allow(self):
+        with self._lock:
+            if self._state == 'closed':
+                return True
+            if self._state == 'open' and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = 'half_open'
+                self._trial_inflight = False
+            if self._state == 'half_open' and not self._trial_inflight:
+                self._trial_inflight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != 'closed':
+                logger.info('Circuit breaker closed; upstream recovered')
+            self._state = 'closed'
+            self._failures = 0
+            self._opened_at = None
+            self._trial_inflight = False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error) if error is not None else None
+            if self._state == 'half_open' or self._failures >= self.failure_threshold:
+                if self._state != 'open':
+                    self._open_count += 1
+                    logger.warning(f"Circuit breaker opened after {self._failures} failures: {self._last_error}")
+                self._state = 'open'
+                self._opened_at = self._clock()
+                self._trial_inflight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = None
+            if self._state == 'open':
+                retry_in = round(max(self.reset_timeout - (self._clock() - self._opened_at), 0.0), 3)
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_in': retry_in,
+                'times_opened': self._open_count,
+                'last_error': self._last_error,
+            }
+
+
+def build_session(pool_size=8):
+    """
+    requests.Session with a sized keep-alive pool. urllib3 retries are off:
+    RemoteClient.get_orders retries itself (deadline, breaker-aware backoff).
+    """
+    # pool_connections = number of distinct hosts kept (REMOTE_API_BASE + baseUrl override)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=Retry(total=0, read=False),
+                          pool_block=False)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class RemoteClient:
+    """GET JSON from the remote ERP through a shared session and circuit breaker."""
+
+    def __init__(self, base_url, orders_path, bearer_token='', connect_timeout=3.05,
+                 read_timeout=30.0, pool_size=8, retries=2, backoff=0.5, breaker=None, deadline=None):
+        self.base_url = base_url
+        self.orders_path = orders_path
+        self.bearer_token = bearer_token
+        self.timeout = (float(connect_timeout), float(read_timeout))
+        self.pool_size = int(pool_size)
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+        # Bir çağrının tüm denemeleri için toplam süre; varsayılan tek okuma zaman aşımı
+        self.deadline = float(deadline) if deadline else float(read_timeout)
+        self.session = build_session(pool_size=self.pool_size)
+        self.breaker = breaker or CircuitBreaker()
+
+    def headers(self):
+        return {"Authorization": f"Bearer {self.bearer_token}"} if self.bearer_token else {}
+
+    def retry_delay(self, attempt, started, retryable):
+        """
+        Backoff before the next attempt, or None to give up: not retryable,
+        retries used up, breaker no longer closed, or the deadline would pass.
+        """
+        if not retryable or attempt >= self.retries or self.breaker.state != 'closed':
+            return None
+        delay = self.backoff * (2 ** attempt)
+        if time.monotonic() - started + delay >= self.deadline:
+            return None
+        return delay
+
+    def get_orders(self, params, base_url=None):
+        """GET the orders endpoint; returns parsed JSON or raises."""
+        url = f"{base_url or self.base_url}{self.orders_path}"
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Remote API circuit open; skipping {url}")
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                resp = self.session.get(url, headers=self.headers(), params=params, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                # ConnectionError (ConnectTimeout dahil) yeniden denenir; ReadTimeout asla
+                delay = self.retry_delay(attempt, started, isinstance(e, requests.exceptions.ConnectionError))
+                if delay is None:
+                    # Kesiciye çağrı başına tek hata: son deneme de başarısız oldu
+                    self.breaker.record_failure(e)
+                    raise
+            else:
+                if resp.status_code < 500:
+                    # 4xx is a request/config problem, not an upstream outage
+                    self.breaker.record_success()
+                    break
+                delay = self.retry_delay(attempt, started, resp.status_code in RETRY_STATUSES)
+                if delay is None:
+                    self.breaker.record_failure(f"HTTP {resp.status_code}")
+                    break
+            attempt += 1
+            logger.warning(f"Retrying {url} in {delay:.2f}s (attempt {attempt + 1} of {self.retries + 1})")
+            time.sleep(delay)
+        logger.info(f"External API response status: {resp.status_code}")
+        if resp.status_code == 404:
+            # Content could be HTML; avoid log flooding
+            logger.error(f"External API 404 Not Found: {resp.url}")
+        resp.raise_for_status()
+        return resp.json()
+
+    def status(self):
+        return {
+            'connect_timeout': self.timeout[0],
+            'read_timeout': self.timeout[1],
+            'pool_size': self.pool_size,
+            'retries': self.retries,
+            'deadline': self.deadline,
+            'breaker': self.breaker.snapshot(),
+        }
+
+
+class AsyncRemoteClient:
+    """
+    asyncio counterpart of RemoteClient (httpx.AsyncClient, pooled keep-alive
+    connections). Shares the sync client's breaker so both serving modes see
+    the same upstream state. httpx is imported lazily (ASGI mode only).
+    """
+
+    def __init__(self, sync_client, max_connections=None):
+        import httpx
+        self._httpx = httpx
+        self.base_url = sync_client.base_url
+        self.orders_path = sync_client.orders_path
+        self.headers = sync_client.headers
+        self.breaker = sync_client.breaker
+        self.retry_delay = sync_client.retry_delay
+        connect_timeout, read_timeout = sync_client.timeout
+        max_connections = int(max_connections or sync_client.pool_size)
+        self.max_connections = max_connections
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            # transport verildiğinde havuz limitleri transport üzerinden ayarlanır
+            # Yeniden denemeler get_orders'ta (her deneme kesiciye sayılır)
+            transport=httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections),
+            ),
+        )
+
+    async def get_orders(self, params, base_url=None):
+        """GET the orders endpoint without blocking the event loop; same retry policy as RemoteClient."""
+        url = f"{base_url or self.base_url}{self.orders_path}"
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Remote API circuit open; skipping {url}")
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                resp = await self.client.get(url, headers=self.headers(), params=params)
+            except self._httpx.HTTPError as e:
+                retryable = isinstance(e, (self._httpx.ConnectError, self._httpx.ConnectTimeout))
+                delay = self.retry_delay(attempt, started, retryable)
+                if delay is None:
+                    self.breaker.record_failure(e)
+                    raise
+            else:
+                if resp.status_code < 500:
+                    self.breaker.record_success()
+                    break
+                delay = self.retry_delay(attempt, started, resp.status_code in RETRY_STATUSES)
+                if delay is None:
+                    self.breaker.record_failure(f"HTTP {resp.status_code}")
+                    break
+            attempt += 1
+            await asyncio.sleep(delay)
+        logger.info(f"External API response status: {resp.status_code}")
+        resp.raise_for_status()
+        return resp.json()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def client_from_env():
+    """Build a RemoteClient from the REMOTE_* / BREAKER_* environment variables."""
+    def env_float(name, default):
+        try:
+            return float(os.getenv(name, '') or default)
+        except ValueError:
+            return float(default)
+
+    breaker = CircuitBreaker(
+        failure_threshold=int(env_float('BREAKER_FAILURE_THRESHOLD', 3)),
+        reset_timeout=env_float('BREAKER_RESET_TIMEOUT', 30),
+    )
+    return RemoteClient(
+        base_url=os.getenv('REMOTE_API_BASE', 'http://85.153.155.153:5047').strip(),
+        orders_path=os.getenv('REMOTE_ORDERS_PATH', '/api/Listeler/listeSIPARISLERCVS').strip(),
+        bearer_token=os.getenv('REMOTE_BEARER_TOKEN', '').strip(),
+        connect_timeout=env_float('REMOTE_CONNECT_TIMEOUT', 3.05),
+        read_timeout=env_float('REMOTE_READ_TIMEOUT', 30),
+        pool_size=int(env_float('REMOTE_POOL_SIZE', 8)),
+        retries=int(env_float('REMOTE_RETRIES', 2)),
+        backoff=env_float('REMOTE_BACKOFF', 0.5),
+        breaker=breaker,
+        deadline=env_float('REMOTE_CALL_DEADLINE', 0) or None,
+    )
@@ -0,0 +1,291 @@
+"""
+Precomputed monthly report cubes (/api/reports/monthly, aylik-rapor.html).
+
+A cube cell is month × customer × project × currency with the summary
+measures (ordered/delivered/remaining quantity, net/remaining amount) and a
+row count; a small day × currency cube feeds the daily comparison cards.
+
+Cubes are materialized incrementally: every month carries a digest of its
+rows, and only months whose digest changed are re-aggregated and rewritten
+in SQLite, so a sync that touches the current month leaves the older months
+alone (also across restarts). Requests slice the in-memory cube by month.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+
+from lazy_imports import lazy_module
+from order_summary import CURRENCY_COLUMN, MEASURES, aggregate_frame, records_to_frame
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Kayıt kolonu -> küp alanı
+CELL_KEYS = {'month': 'month', 'CARİ İSMİ': 'customer', 'PROJE': 'project', CURRENCY_COLUMN: 'currency'}
+DAY_KEYS = {'date': 'day', CURRENCY_COLUMN: 'currency'}
+FIELDS = list(MEASURES.values()) + ['count']
+
+_MEASURE_SQL = ', '.join(f"{f} {'INTEGER' if f == 'count' else 'REAL'} NOT NULL" for f in FIELDS)
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS cube_months (
+    dataset  TEXT NOT NULL,
+    month    TEXT NOT NULL,
+    digest   TEXT NOT NULL,
+    rows     INTEGER NOT NULL,
+    built_at REAL NOT NULL,
+    PRIMARY KEY (dataset, month)
+);
+CREATE TABLE IF NOT EXISTS cube_cells (
+    dataset  TEXT NOT NULL,
+    month    TEXT NOT NULL,
+    customer TEXT NOT NULL,
+    project  TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    {_MEASURE_SQL}
+);
+CREATE INDEX IF NOT EXISTS cube_cells_month ON cube_cells (dataset, month);
+CREATE TABLE IF NOT EXISTS cube_days (
+    dataset  TEXT NOT NULL,
+    month    TEXT NOT NULL,
+    day      TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    {_MEASURE_SQL}
+);
+CREATE INDEX IF NOT EXISTS cube_days_month ON cube_days (dataset, month);
+"""
+
+CELL_COLUMNS = list(CELL_KEYS.values()) + FIELDS
+DAY_COLUMNS = ['month'] + list(DAY_KEYS.values()) + FIELDS
+CELL_ORDER = ['month', 'currency', 'customer', 'project']
+DAY_ORDER = ['day', 'currency']
+
+
+def _empty(columns):
+    return pd.DataFrame({c: pd.Series(dtype=float if c in FIELDS else object) for c in columns})
+
+
+def _merge(frames, columns, order):
+    """Concatenate cube parts in a canonical row order (same result for full, incremental and stored builds)."""
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return _empty(columns)
+    merged = pd.concat(frames, ignore_index=True)
+    merged['count'] = merged['count'].astype(np.int64)
+    return merged.sort_values(order, ignore_index=True)[columns]
+
+
+def month_digests(df):
+    """{month: 'rows:hash'} over the dated rows of a records_to_frame() frame (row order insensitive)."""
+    dated = df[df['month'].notna()]
+    if not len(dated):
+        return {}
+    hashes = pd.util.hash_pandas_object(dated[list(CELL_KEYS) + ['date'] + list(MEASURES)],
+                                        index=False).to_numpy()
+    codes, months = pd.factorize(dated['month'])
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=len(months))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    # uint64 toplamı taşarak sarar; satır sırasından bağımsız bir özet verir
+    sums = np.add.reduceat(hashes[order], starts)
+    return {m: f"{int(n)}:{int(h):016x}" for m, n, h in zip(months, counts, sums)}
+
+
+def build_month_cubes(df, months):
+    """(cells, days) frames for the given months of a records_to_frame() frame."""
+    sub = df[df['month'].isin(list(months))]
+    if not len(sub):
+        return _empty(CELL_COLUMNS), _empty(DAY_COLUMNS)
+    cells = aggregate_frame(sub, list(CELL_KEYS)).rename(columns=CELL_KEYS)
+    days = aggregate_frame(sub, list(DAY_KEYS)).rename(columns=DAY_KEYS)
+    days['month'] = days['day'].str.slice(0, 7)
+    return _merge([cells], CELL_COLUMNS, CELL_ORDER), _merge([days], DAY_COLUMNS, DAY_ORDER)
+
+
+class ReportCubeStore:
+    """SQLite persistence of cube months (same connection settings as OrderSnapshotStore)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self, dataset):
+        """(digests, cells, days, built_at) for dataset, or None if never saved."""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT month, digest, built_at FROM cube_months WHERE dataset = ?',
+                                (dataset,)).fetchall()
+            if not rows:
+                return None
+            cells = pd.read_sql_query(f"SELECT {', '.join(CELL_COLUMNS)} FROM cube_cells WHERE dataset = ?",
+                                      conn, params=(dataset,))
+            days = pd.read_sql_query(f"SELECT {', '.join(DAY_COLUMNS)} FROM cube_days WHERE dataset = ?",
+                                     conn, params=(dataset,))
+        return ({m: d for m, d, _ in rows}, _merge([cells], CELL_COLUMNS, CELL_ORDER),
+                _merge([days], DAY_COLUMNS, DAY_ORDER), max(t for _, _, t in rows))
+
+    def save(self, dataset, digests, rows, removed, cells, days, built_at):
+        """Replace the given months (digests: {month: digest}) and drop removed ones."""
+        months = list(digests) + list(removed)
+        with self._lock, self._connect() as conn:
+            for table in ('cube_months', 'cube_cells', 'cube_days'):
+                conn.executemany(f'DELETE FROM {table} WHERE dataset = ? AND month = ?',
+                                 [(dataset, m) for m in months])
+            conn.executemany('INSERT INTO cube_months (dataset, month, digest, rows, built_at) VALUES (?, ?, ?, ?, ?)',
+                             [(dataset, m, d, rows[m], built_at) for m, d in digests.items()])
+            for table, frame, columns in (('cube_cells', cells, CELL_COLUMNS), ('cube_days', days, DAY_COLUMNS)):
+                conn.executemany(
+                    f"INSERT INTO {table} (dataset, {', '.join(columns)}) VALUES ({', '.join('?' * (len(columns) + 1))})",
+                    [(dataset, *row) for row in frame[columns].itertuples(index=False, name=None)])
+
+    def stats(self):
+        try:
+            with self._connect() as conn:
+                datasets = [{'dataset': d, 'months': n, 'built_at': t} for d, n, t in conn.execute(
+                    'SELECT dataset, COUNT(*), MAX(built_at) FROM cube_months GROUP BY dataset')]
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        except sqlite3.Error as e:
+            return {'path': self.path, 'error': str(e)}
+        return {'path': self.path, 'bytes': size, 'datasets': datasets}
+
+
+class MonthlyCubes:
+    """In-memory cubes per dataset name, updated month by month and persisted to an optional store."""
+
+    def __init__(self, store=None, clock=time.time):
+        self.store = store
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._states = {}
+        self._last_update = None
+
+    @staticmethod
+    def _state(digests, cells, days, built_at):
+        return {'digests': digests, 'cells': cells, 'days': days, 'built_at': built_at}
+
+    def _load_locked(self, dataset):
+        state = self._states.get(dataset)
+        if state is None and self.store is not None:
+            try:
+                loaded = self.store.load(dataset)
+            except Exception as e:
+                logger.warning(f"Report cube load failed: {e}")
+                loaded = None
+            if loaded is not None:
+                state = self._state(*loaded)
+                self._states[dataset] = state
+        return state
+
+    def get(self, dataset):
+        """Current cube state for dataset (loaded from disk on first use), or None."""
+        with self._lock:
+            return self._load_locked(dataset)
+
+    def build(self, records):
+        """Standalone cube state for records (not stored); used for fallback/partial data."""
+        df = records_to_frame(records)
+        digests = month_digests(df)
+        cells, days = build_month_cubes(df, digests)
+        return self._state(digests, cells, days, self._clock())
+
+    def update(self, dataset, records):
+        """
+        Re-aggregate only the months of records whose digest changed since the
+        last update and persist them. Returns (state, {'rebuilt','removed','unchanged'}).
+        """
+        df = records_to_frame(records)
+        digests = month_digests(df)
+        with self._lock:
+            previous = self._load_locked(dataset) or self._state({}, _empty(CELL_COLUMNS), _empty(DAY_COLUMNS), None)
+            old = previous['digests']
+            changed = {m: d for m, d in digests.items() if old.get(m) != d}
+            removed = [m for m in old if m not in digests]
+            counts = {'rebuilt': len(changed), 'removed': len(removed), 'unchanged': len(digests) - len(changed)}
+            if not changed and not removed:
+                return previous, counts
+            cells, days = build_month_cubes(df, changed)
+            stale = set(changed) | set(removed)
+            now = self._clock()
+            state = self._state(
+                digests,
+                _merge([previous['cells'][~previous['cells']['month'].isin(stale)], cells], CELL_COLUMNS, CELL_ORDER),
+                _merge([previous['days'][~previous['days']['month'].isin(stale)], days], DAY_COLUMNS, DAY_ORDER),
+                now)
+            self._states[dataset] = state
+            self._last_update = {'dataset': dataset, 'at': now, **counts}
+        if self.store is not None:
+            try:
+                rows = dict(zip(*np.unique(df['month'].dropna().to_numpy(dtype=object), return_counts=True)))
+                self.store.save(dataset, changed, {m: int(rows[m]) for m in changed}, removed, cells, days, now)
+            except Exception as e:
+                logger.warning(f"Report cube save failed: {e}")
+        logger.info(f"Report cubes {dataset}: {counts}")
+        return state, counts
+
+    def stats(self):
+        with self._lock:
+            datasets = {name: {'months': len(s['digests']), 'cells': len(s['cells']), 'built_at': s['built_at']}
+                        for name, s in self._states.items()}
+            last_update = self._last_update
+        return {'datasets': datasets, 'last_update': last_update,
+                'store': self.store.stats() if self.store is not None else None}
+
+
+def _round(frame):
+    frame = frame.copy()
+    for col in MEASURES.values():
+        frame[col] = frame[col].astype(float).round(2)
+    frame['count'] = frame['count'].astype(int)
+    return frame.to_dict('records')
+
+
+def monthly_report(state, start=None, end=None, cells=True):
+    """
+    /api/reports/monthly body for a cube state sliced to [start, end] ('YYYY-MM',
+    inclusive): by_month (month × currency), cells (month × customer × project
+    × currency) when requested, and the latest day vs the previous calendar day.
+    """
+    all_months = sorted(state['digests'])
+    cube = state['cells']
+    days = state['days']
+    if start:
+        cube, days = cube[cube['month'] >= start], days[days['month'] >= start]
+    if end:
+        cube, days = cube[cube['month'] <= end], days[days['month'] <= end]
+    by_month = cube.groupby(['month', 'currency'], sort=True)[FIELDS].sum().reset_index()
+    report = {
+        'months': sorted(by_month['month'].unique().tolist()),
+        'available': {'from': all_months[0], 'to': all_months[-1]} if all_months else None,
+        'by_month': _round(by_month),
+        'built_at': state['built_at'],
+    }
+    if cells:
+        report['cells'] = _round(cube)
+    latest = days['day'].max() if len(days) else None
+    if latest:
+        previous = (pd.Timestamp(latest) - pd.Timedelta(days=1)).date().isoformat()
+        report['days'] = {
+            'latest': latest,
+            'previous': previous,
+            'by_currency': _round(days[days['day'].isin([latest, previous])][['day', 'currency'] + FIELDS]),
+        }
+    else:
+        report['days'] = None
+    return report
@@ -0,0 +1,323 @@
+"""
+Background report exports (xlsx / CSV / Parquet) for /api/exports.
+
+A job is queued with a build() callable returning the rows to export (an
+OrderTable or list of dicts) and runs on a small per-process thread pool,
+so request workers only enqueue and poll. Rows are written in chunks of
+chunk_rows straight to a temp file in the export directory (CSV appends,
+openpyxl write-only sheets, Parquet row groups), then renamed into place,
+so memory stays bounded by one chunk and readers never see partial files.
+
+Job state is mirrored to <id>.json in the same directory, so any gunicorn
+worker on the host can answer status polls and downloads, not only the one
+that ran the job. Finished jobs and their files expire after ttl seconds.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import tempfile
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from lazy_imports import is_installed, lazy_module
+from order_table import OrderTable
+
+logger = logging.getLogger(__name__)
+
+pd = lazy_module('pandas')
+pa = lazy_module('pyarrow') if is_installed('pyarrow') else None
+pq = lazy_module('pyarrow.parquet') if is_installed('pyarrow') else None
+openpyxl = lazy_module('openpyxl') if is_installed('openpyxl') else None
+
+# format -> (mimetype, uzantı)
+FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+ACTIVE = ('queued', 'running')
+
+
+class ExportError(ValueError):
+    """Unknown or unavailable export format (reported as HTTP 400)."""
+
+
+class ExportQueueFull(ExportError):
+    """Too many queued/running jobs in this process (reported as HTTP 429)."""
+
+
+def available_formats():
+    out = ['csv']
+    if openpyxl is not None:
+        out.append('xlsx')
+    if pa is not None:
+        out.append('parquet')
+    return out
+
+
+def _chunks(table, chunk_rows):
+    for start in range(0, len(table), chunk_rows):
+        yield table[start:start + chunk_rows]
+
+
+def _write_csv(table, f, chunk_rows, progress):
+    # utf-8-sig: Excel Türkçe karakterleri doğru açsın
+    with open(f, 'w', encoding='utf-8-sig', newline='') as out:
+        if not len(table):
+            out.write(','.join(table.columns) + '\n')
+        for i, chunk in enumerate(_chunks(table, chunk_rows)):
+            chunk.to_frame().to_csv(out, index=False, header=(i == 0))
+            progress(len(chunk))
+
+
+def _write_xlsx(table, f, chunk_rows, progress):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Siparişler')
+    ws.append(list(table.columns))
+    for chunk in _chunks(table, chunk_rows):
+        frame = chunk.to_frame().astype(object)
+        # NaN/NaT Excel'de geçersiz; boş hücre yazılır
+        frame = frame.where(frame.notna(), None)
+        for row in frame.itertuples(index=False, name=None):
+            ws.append(row)
+        progress(len(chunk))
+    wb.save(f)
+
+
+def _arrow_chunk(table):
+    """pa.Table for an OrderTable slice: numbers as is, dates as date32, text dictionary-encoded strings."""
+    arrays = []
+    for name, kind, data, values in table.encoded():
+        if kind == 'cat':
+            dictionary = pa.array([None if v is None or v != v else str(v) for v in values[:-1]], type=pa.string())
+            indices = pa.array(data, type=pa.int32(), mask=data < 0)
+            arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+        elif kind == 'date':
+            arrays.append(pa.array(data, type=pa.date32()))
+        else:
+            arrays.append(pa.array(data))
+    return pa.Table.from_arrays(arrays, names=list(table.columns))
+
+
+def _write_parquet(table, f, chunk_rows, progress):
+    writer = None
+    try:
+        for chunk in _chunks(table, chunk_rows):
+            part = _arrow_chunk(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(f, part.schema, compression='zstd')
+            writer.write_table(part)  # her parça ayrı row group
+            progress(len(chunk))
+        if writer is None:
+            pq.write_table(_arrow_chunk(table), f)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx, 'parquet': _write_parquet}
+
+
+def write_export(records, fmt, path, chunk_rows=5000, progress=None):
+    """
+    Write records (OrderTable, DataFrame or list of dicts) to path in fmt,
+    chunk by chunk, via a temp file renamed into place. Returns the row count.
+    """
+    if fmt not in available_formats():
+        raise ExportError(f"Unsupported export format '{fmt}' (available: {', '.join(available_formats())})")
+    if isinstance(records, pd.DataFrame):
+        table = OrderTable.from_frame(records)
+    else:
+        table = OrderTable.from_records(records)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.export-', suffix=FORMATS[fmt][1] + '.part', dir=directory)
+    os.close(fd)
+    try:
+        WRITERS[fmt](table, tmp_path, max(int(chunk_rows), 1), progress or (lambda n: None))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(table)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # başka kullanıcının süreci; yaşıyor say
+    return True
+
+
+class ExportJobs:
+    """Export job queue: per-process worker pool, state shared through the export directory."""
+
+    def __init__(self, directory, workers=2, ttl=3600, max_pending=10, chunk_rows=5000, clock=time.time):
+        self.directory = directory
+        self.workers = int(workers)
+        self.ttl = float(ttl)
+        self.max_pending = int(max_pending)
+        self.chunk_rows = int(chunk_rows)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pool = None
+        self._stats = {'submitted': 0, 'done': 0, 'failed': 0, 'expired': 0}
+
+    def _executor(self):
+        # Havuz ilk işte kurulur (gunicorn preload fork'u thread'leri taşımaz)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='export')
+            return self._pool
+
+    def _state_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _save(self, job):
+        tmp = f"{self._state_path(job['id'])}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp, self._state_path(job['id']))
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(changes)
+            snapshot = dict(job)
+        self._save(snapshot)
+        return snapshot
+
+    def submit(self, fmt, build, params=None):
+        """Queue an export of build() in fmt; returns the job dict. ExportError / ExportQueueFull when refused."""
+        if fmt not in available_formats():
+            raise ExportError(f"Unsupported export format '{fmt}' (available: {', '.join(available_formats())})")
+        os.makedirs(self.directory, exist_ok=True)
+        self.cleanup()
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j['status'] in ACTIVE)
+            if pending >= self.max_pending:
+                raise ExportQueueFull(f"Too many pending export jobs ({pending}); try again later")
+            job_id = uuid.uuid4().hex
+            now = self._clock()
+            job = {
+                'id': job_id,
+                'format': fmt,
+                'status': 'queued',
+                'params': params or {},
+                'pid': os.getpid(),
+                'created_at': now,
+                'started_at': None,
+                'finished_at': None,
+                'rows': None,
+                'rows_written': 0,
+                'bytes': None,
+                'error': None,
+                'filename': f"siparisler-{datetime.fromtimestamp(now).strftime('%Y%m%d-%H%M%S')}{FORMATS[fmt][1]}",
+            }
+            self._jobs[job_id] = job
+            self._stats['submitted'] += 1
+            snapshot = dict(job)
+        self._save(snapshot)
+        self._executor().submit(self._run, job_id, build)
+        return snapshot
+
+    def _run(self, job_id, build):
+        job = self._update(job_id, status='running', started_at=self._clock())
+        path = self.output_path(job)
+        written = [0]
+
+        def progress(n):
+            written[0] += n
+            self._update(job_id, rows_written=written[0])
+
+        try:
+            records = build()
+            self._update(job_id, rows=len(records))
+            rows = write_export(records, job['format'], path, self.chunk_rows, progress)
+        except Exception as e:
+            logger.warning(f"Export {job_id} ({job['format']}) failed: {e}")
+            with self._lock:
+                self._stats['failed'] += 1
+            self._update(job_id, status='failed', error=str(e), finished_at=self._clock())
+            return
+        with self._lock:
+            self._stats['done'] += 1
+        done = self._update(job_id, status='done', rows=rows, bytes=os.path.getsize(path),
+                            finished_at=self._clock())
+        logger.info(f"Export {job_id} done: {rows} rows, {done['bytes']} bytes in "
+                    f"{done['finished_at'] - done['started_at']:.2f}s ({job['format']})")
+
+    def output_path(self, job):
+        return os.path.join(self.directory, f"{job['id']}{FORMATS[job['format']][1]}")
+
+    def get(self, job_id):
+        """Job dict (from this process or the shared directory), or None."""
+        if not JOB_ID_PATTERN.fullmatch(job_id or ''):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        try:
+            with open(self._state_path(job_id), encoding='utf-8') as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if job['status'] in ACTIVE and job['pid'] != os.getpid() and not _pid_alive(job['pid']):
+            # İşi çalıştıran işçi öldü
+            job.update(status='failed', error='export worker exited before finishing')
+        return job
+
+    def list(self, limit=50):
+        """Most recent jobs in the export directory (newest first)."""
+        self.cleanup()
+        try:
+            names = [n[:-5] for n in os.listdir(self.directory) if n.endswith('.json')]
+        except OSError:
+            return []
+        jobs = [job for job in (self.get(n) for n in names) if job is not None]
+        jobs.sort(key=lambda j: j['created_at'], reverse=True)
+        return jobs[:limit]
+
+    def cleanup(self):
+        """Delete finished jobs (state + file) older than ttl; returns how many were removed."""
+        if self.ttl <= 0:
+            return 0
+        try:
+            names = [n[:-5] for n in os.listdir(self.directory) if n.endswith('.json')]
+        except OSError:
+            return 0
+        cutoff = self._clock() - self.ttl
+        removed = 0
+        for job_id in names:
+            job = self.get(job_id)
+            if job is None or job['status'] in ACTIVE or (job['finished_at'] or job['created_at']) > cutoff:
+                continue
+            for path in (self.output_path(job), self._state_path(job_id)):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self._stats['expired'] += 1
+            removed += 1
+        return removed
+
+    def stats(self):
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if j['status'] in ACTIVE)
+            return {'directory': self.directory, 'workers': self.workers, 'active': active,
+                    'formats': available_formats(), **self._stats}
@@ -0,0 +1,246 @@
+"""
+Request timing spans, process metrics (Prometheus text format) and opt-in
+cProfile dumps for the orders pipeline.
+
+StageTimings.span('upstream' | 'normalize' | 'filter' | 'serialize' | ...)
+adds the elapsed time to the current request's RequestTimer (exposed as a
+Server-Timing header) and to a per-stage latency histogram. The current
+timer lives in a ContextVar, so spans opened in helper functions need no
+plumbing; work on other threads (page fetch pool, background refresh)
+only feeds the histograms.
+"""
+
+import os
+import io
+import time
+import bisect
+import pstats
+import cProfile
+import threading
+import contextvars
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.kind = 'counter'
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels.get(n, '')) for n in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.kind = 'histogram'
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}"
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, [('le', '+Inf')])} {series[-1]}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(float(series[-2]))}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}"
+
+
+class Callback:
+    """Gauge/counter read at scrape time: fn() -> number, None or {label tuple: number}."""
+
+    def __init__(self, name, help_text, fn, labelnames=(), kind='gauge'):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._fn = fn
+
+    def samples(self):
+        try:
+            value = self._fn()
+        except Exception as e:
+            logger.warning(f"Metric {self.name} failed: {e}")
+            return
+        if value is None:
+            return
+        if not isinstance(value, dict):
+            value = {(): value}
+        for key, v in sorted(value.items()):
+            if v is not None:
+                yield f"{self.name}{_labels(self.labelnames, key)} {_number(v)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name, help_text, fn, labelnames=(), kind='gauge'):
+        return self._add(Callback(name, help_text, fn, labelnames, kind))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+class RequestTimer:
+    """Stage durations (and short notes such as the cache status) for one request."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self.spans = {}
+        self.notes = {}
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def note(self, name, value):
+        self.notes[name] = value
+
+    def elapsed(self):
+        return self._clock() - self.started
+
+    def server_timing(self):
+        """Server-Timing header value, e.g. 'upstream;dur=812.4, serialize;dur=35.0, total;dur=861.2'."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.spans.items()]
+        parts.extend(f'{name};desc="{_escape(value)}"' for name, value in self.notes.items())
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ', '.join(parts)
+
+
+class StageTimings:
+    """ContextVar-scoped RequestTimer plus a histogram of every span."""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self._current = contextvars.ContextVar('request_timer', default=None)
+
+    def begin(self):
+        """Start timing a request; returns (timer, token) for end()."""
+        timer = RequestTimer()
+        return timer, self._current.set(timer)
+
+    def end(self, token):
+        self._current.reset(token)
+
+    def current(self):
+        return self._current.get()
+
+    def note(self, name, value):
+        timer = self._current.get()
+        if timer is not None:
+            timer.note(name, value)
+
+    @contextmanager
+    def span(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            self.histogram.observe(seconds, stage=name)
+            timer = self._current.get()
+            if timer is not None:
+                timer.add(name, seconds)
+
+
+class RequestProfiler:
+    """Opt-in cProfile of single requests, dumped as .prof files (snakeviz / pstats)."""
+
+    def __init__(self, directory, top=25):
+        self.directory = directory
+        self.top = int(top)
+
+    def start(self):
+        """Enabled cProfile.Profile for the calling thread, or None if another profiler is active."""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            logger.warning(f"Request profiling skipped: {e}")
+            return None
+        return profile
+
+    def stop(self, profile, label):
+        """Disable profile, write it under directory and log the top cumulative entries. Returns the path."""
+        profile.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        safe = ''.join(c if c.isalnum() else '_' for c in label).strip('_') or 'request'
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe}-{os.getpid()}.prof")
+        profile.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(self.top)
+        logger.info(f"Request profile written to {path}\n{out.getvalue()}")
+        return path
@@ -0,0 +1,162 @@
+"""
+Response serialization and compression helpers.
+
+- dumps(): orjson when installed (several times faster than json.dumps for
+  the order payloads), stdlib json otherwise. Keys are sorted like Flask's
+  default provider so responses stay byte-stable.
+- FastJSONProvider: Flask JSON provider built on dumps(); jsonify() then
+  writes bytes straight into the response.
+- choose_encoding() / compress_bytes() / compress_chunks(): br (when the
+  brotli module is installed) or gzip, negotiated from Accept-Encoding.
+  compress_chunks() compresses a streamed body incrementally.
+- ndjson_chunks() / json_array_chunks(): encoders for streamed record lists.
+"""
+
+import json
+import zlib
+import datetime
+import decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/html', 'text/css',
+                          'text/plain', 'text/csv', 'application/javascript', 'text/javascript')
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # dinamik yanıtlar için hız/oran dengesi
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if hasattr(value, 'item'):  # numpy/pandas skalerleri
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj, sort_keys=True):
+    """Serialize obj to UTF-8 JSON bytes."""
+    if orjson is not None:
+        options = _ORJSON_OPTIONS if sort_keys else _ORJSON_OPTIONS & ~orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=options)
+    return json.dumps(obj, default=_default, ensure_ascii=False, sort_keys=sort_keys,
+                      separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider using dumps(); keeps Flask's loads()."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys) + b'\n',
+                                        mimetype=self.mimetype)
+
+
+def _accepted(accept_encoding):
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding):
+    """'br', 'gzip' or None for an Accept-Encoding header value."""
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get('*', 0.0)
+    if brotli is not None and accepted.get('br', wildcard) > 0:
+        return 'br'
+    if accepted.get('gzip', wildcard) > 0:
+        return 'gzip'
+    return None
+
+
+def compress_bytes(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    return data
+
+
+def compress_chunks(chunks, encoding):
+    """Incrementally compress an iterable of byte chunks (each chunk is flushed)."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            out = compressor.process(chunk) + compressor.flush()
+            if out:
+                yield out
+        yield compressor.finish()
+    elif encoding == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if out:
+                yield out
+        yield compressor.flush()
+    else:
+        yield from chunks
+
+
+def is_compressible(mimetype):
+    return (mimetype or '').split(';')[0].strip().lower() in COMPRESSIBLE_MIMETYPES
+
+
+def ndjson_chunks(batches, trailer=None):
+    """One JSON object per line for every record in every batch; optional trailer line."""
+    for batch in batches:
+        if batch:
+            yield b'\n'.join(dumps(r) for r in batch) + b'\n'
+    if trailer is not None:
+        yield dumps(trailer() if callable(trailer) else trailer) + b'\n'
+
+
+def json_array_chunks(batches, trailer=None):
+    """
+    Streamed {"data": [...], **trailer} object. trailer (dict or callable
+    returning a dict) is written after the rows, once counts are known.
+    """
+    yield b'{"data":['
+    first = True
+    for batch in batches:
+        if not batch:
+            continue
+        body = b','.join(dumps(r) for r in batch)
+        yield body if first else b',' + body
+        first = False
+    yield b']'
+    extra = trailer() if callable(trailer) else (trailer or {})
+    for key, value in extra.items():
+        yield b',' + dumps(key) + b':' + dumps(value)
+    yield b'}\n'
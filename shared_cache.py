@@ -0,0 +1,366 @@
+"""
+Cross-worker shared copy of processed order datasets.
+
+Under gunicorn every worker has its own OrderCache, so each worker would call
+the ERP and hold its own copy of the data. A shared cache backend keeps the
+latest complete dataset per cache key where every worker can read it, plus a
+refresh lease: one worker at a time loads a key from the ERP while the
+others wait for its result instead of issuing the same calls.
+
+- FileSharedCache: one Arrow IPC file per key in a local directory, written
+  to a temp file and swapped in with os.replace() under an flock, read
+  memory-mapped, so the numeric, date and code arrays are views of the shared
+  page cache rather than per-worker copies. The lease is a non-blocking
+  flock; the kernel releases it if the worker dies.
+- RedisSharedCache: the same IPC bytes and a SET NX PX lease in a
+  Redis-compatible server (optional 'redis' package), for workers spread over
+  several hosts.
+
+Datasets are stored in OrderTable's own column encoding (numeric arrays,
+int64 day numbers for dates, int32 dictionary codes with the distinct values
+in the schema metadata), so readers do not normalize anything again.
+Small derived values (summary, etag) travel along as 'memos'.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+
+from csv_source import file_signature
+from lazy_imports import is_installed, lazy_module
+from order_table import OrderTable
+
+logger = logging.getLogger(__name__)
+
+np = lazy_module('numpy')
+# pyarrow ilk kullanımda yüklenir
+AVAILABLE = is_installed('pyarrow')
+pa = lazy_module('pyarrow') if AVAILABLE else None
+pa_ipc = lazy_module('pyarrow.ipc') if AVAILABLE else None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional backend
+    redis = None
+
+COLUMNS_META_KEY = b'cvsair.columns'
+DATASET_META_KEY = b'cvsair.dataset'
+
+
+def encode_dataset(dataset, memos=None, published_at=None):
+    """Arrow IPC file bytes (pa.Buffer) for {'records': OrderTable, 'fetch': {...}}."""
+    table = OrderTable.from_records(dataset['records'])
+    names, arrays, columns = [], [], []
+    for name, kind, data, values in table.encoded():
+        if kind == 'date':
+            data = data.view(np.int64)  # datetime64[D] -> gün sayısı, okurken tekrar view
+        names.append(name)
+        arrays.append(pa.array(data))
+        spec = {'name': name, 'kind': kind}
+        if values is not None:
+            spec['values'] = values.tolist()
+        columns.append(spec)
+    info = {
+        'rows': len(table),
+        'fetch': dataset.get('fetch') or {},
+        'published_at': time.time() if published_at is None else published_at,
+        'memos': memos or {},
+    }
+    batch = pa.record_batch(arrays, names=names) if arrays else pa.record_batch([], schema=pa.schema([]))
+    schema = batch.schema.with_metadata({
+        COLUMNS_META_KEY: json.dumps(columns, ensure_ascii=False, default=str).encode('utf-8'),
+        DATASET_META_KEY: json.dumps(info, ensure_ascii=False, default=str).encode('utf-8'),
+    })
+    sink = pa.BufferOutputStream()
+    with pa_ipc.new_file(sink, schema) as writer:
+        writer.write_batch(batch.replace_schema_metadata(schema.metadata))
+    return sink.getvalue()
+
+
+def decode_dataset(source):
+    """(dataset, info) from an IPC file (memory map or buffer); arrays are zero-copy where Arrow allows."""
+    reader = pa_ipc.open_file(source)
+    meta = reader.schema.metadata or {}
+    columns = json.loads(meta[COLUMNS_META_KEY].decode('utf-8'))
+    info = json.loads(meta[DATASET_META_KEY].decode('utf-8'))
+    batch = reader.get_batch(0) if reader.num_record_batches else None
+    encoded = []
+    for i, spec in enumerate(columns):
+        data = batch.column(i).to_numpy(zero_copy_only=False)
+        values = None
+        if spec['kind'] == 'date':
+            data = data.view('datetime64[D]')
+        elif spec['kind'] == 'cat':
+            values = np.empty(len(spec['values']), dtype=object)
+            values[:] = spec['values']
+        encoded.append((spec['name'], spec['kind'], data, values))
+    dataset = {'records': OrderTable.from_encoded(encoded, info['rows']), 'fetch': info['fetch']}
+    dataset.update(info.get('memos') or {})
+    return dataset, info
+
+
+def _slug(name):
+    return hashlib.blake2b(name.encode('utf-8'), digest_size=10).hexdigest()
+
+
+class FileSharedCache:
+    """Memory-mapped Arrow snapshots in a directory shared by the workers of one host."""
+
+    kind = 'file'
+
+    def __init__(self, directory, poll_interval=0.2):
+        self.directory = directory
+        self.poll_interval = float(poll_interval)
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._loaded = {}  # name -> (file signature, dataset, info)
+        self._stats = {'reads': 0, 'loads': 0, 'publishes': 0, 'leads': 0, 'waits': 0, 'errors': 0}
+        if fcntl is None:
+            logger.warning("fcntl unavailable: shared cache works without refresh leases")
+
+    def _path(self, name, suffix):
+        return os.path.join(self.directory, f"orders-{_slug(name)}{suffix}")
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def read(self, name):
+        """(dataset, info) last published for name, or None. The same objects are returned until it changes."""
+        path = self._path(name, '.arrow')
+        try:
+            signature = file_signature(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._stats['reads'] += 1
+            cached = self._loaded.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+        try:
+            dataset, info = decode_dataset(pa.memory_map(path, 'r'))
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"Shared cache read failed ({path}): {e}")
+            return None
+        with self._lock:
+            self._stats['loads'] += 1
+            self._loaded[name] = (signature, dataset, info)
+        return dataset, info
+
+    def age(self, name):
+        """Seconds since name was last published, or None."""
+        try:
+            return max(time.time() - os.stat(self._path(name, '.arrow')).st_mtime, 0.0)
+        except FileNotFoundError:
+            return None
+
+    def publish(self, name, dataset, memos=None):
+        """
+        Atomically replace the shared copy of name (temp file + os.replace under
+        the swap lock). Returns (dataset, info) read back from the shared file.
+        """
+        data = encode_dataset(dataset, memos)
+        path = self._path(name, '.arrow')
+        with self._flock(self._path(name, '.swap'), blocking=True):
+            fd, tmp_path = tempfile.mkstemp(prefix='.orders-', suffix='.arrow.tmp', dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(memoryview(data))
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            signature = file_signature(path)
+            # Yayımlayan işçi de bellek eşlemli ortak kopyayı kullanır
+            dataset, info = decode_dataset(pa.memory_map(path, 'r'))
+        with self._lock:
+            self._stats['publishes'] += 1
+            self._loaded[name] = (signature, dataset, info)
+        return dataset, info
+
+    @contextmanager
+    def _flock(self, path, blocking):
+        if fcntl is None:
+            yield True
+            return
+        with open(path, 'a+b') as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def lease(self, name, wait):
+        """
+        Refresh lease for name. Yields True once held (immediately, or after the
+        current holder finished), False if still held by another worker after
+        wait seconds.
+        """
+        deadline = time.monotonic() + max(float(wait), 0.0)
+        waited = False
+        while True:
+            with self._flock(self._path(name, '.lease'), blocking=False) as held:
+                if held:
+                    self._count('leads')
+                if held or time.monotonic() >= deadline:
+                    yield held
+                    return
+            if not waited:
+                waited = True
+                self._count('waits')
+            time.sleep(self.poll_interval)
+
+    def stats(self):
+        with self._lock:
+            loaded = {name: {'rows': info['rows'], 'published_at': info['published_at']}
+                      for name, (_, _, info) in self._loaded.items()}
+            return {'backend': self.kind, 'directory': self.directory, 'datasets': loaded, **self._stats}
+
+
+class RedisSharedCache:
+    """Same protocol on a Redis-compatible server: IPC bytes + version key, SET NX PX lease."""
+
+    kind = 'redis'
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url, prefix='cvsair:orders', lease_seconds=120, poll_interval=0.2):
+        self.url = url
+        self.prefix = prefix
+        self.lease_seconds = float(lease_seconds)
+        self.poll_interval = float(poll_interval)
+        self._client = redis.Redis.from_url(url)
+        self._lock = threading.Lock()
+        self._loaded = {}  # name -> (version, dataset, info)
+        self._stats = {'reads': 0, 'loads': 0, 'publishes': 0, 'leads': 0, 'waits': 0, 'errors': 0}
+
+    def _key(self, name, part):
+        return f"{self.prefix}:{_slug(name)}:{part}"
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def read(self, name):
+        try:
+            version = self._client.get(self._key(name, 'version'))
+            if version is None:
+                return None
+            with self._lock:
+                self._stats['reads'] += 1
+                cached = self._loaded.get(name)
+            if cached is not None and cached[0] == version:
+                return cached[1], cached[2]
+            data = self._client.get(self._key(name, f"data:{version.decode('ascii')}"))
+            if data is None:
+                return None  # sürüm az önce değişti; bir sonraki okuma yakalar
+            dataset, info = decode_dataset(pa.py_buffer(data))
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"Shared cache read failed ({self.url}): {e}")
+            return None
+        with self._lock:
+            self._stats['loads'] += 1
+            self._loaded[name] = (version, dataset, info)
+        return dataset, info
+
+    def age(self, name):
+        try:
+            version = self._client.get(self._key(name, 'version'))
+        except Exception as e:
+            logger.warning(f"Shared cache age check failed ({self.url}): {e}")
+            return None
+        if version is None:
+            return None
+        return max(time.time() - float(version.decode('ascii').split('-')[0]), 0.0)
+
+    def publish(self, name, dataset, memos=None):
+        published_at = time.time()
+        data = encode_dataset(dataset, memos, published_at=published_at)
+        version = f"{published_at:.6f}-{uuid.uuid4().hex[:8]}"
+        old = self._client.get(self._key(name, 'version'))
+        # Veri anahtarı önce yazılır, sürüm anahtarı sonra: okuyucular yarım veri görmez
+        pipe = self._client.pipeline(transaction=True)
+        pipe.set(self._key(name, f"data:{version}"), data.to_pybytes())
+        pipe.set(self._key(name, 'version'), version)
+        if old is not None:
+            pipe.expire(self._key(name, f"data:{old.decode('ascii')}"), 60)
+        pipe.execute()
+        dataset, info = decode_dataset(data)
+        with self._lock:
+            self._stats['publishes'] += 1
+            self._loaded[name] = (version.encode('ascii'), dataset, info)
+        return dataset, info
+
+    @contextmanager
+    def lease(self, name, wait):
+        key = self._key(name, 'lease')
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + max(float(wait), 0.0)
+        held = waited = False
+        while True:
+            try:
+                held = bool(self._client.set(key, token, nx=True, px=int(self.lease_seconds * 1000)))
+            except Exception as e:
+                logger.warning(f"Shared cache lease failed ({self.url}): {e}")
+                break
+            if held or time.monotonic() >= deadline:
+                break
+            if not waited:
+                waited = True
+                self._count('waits')
+            time.sleep(self.poll_interval)
+        if held:
+            self._count('leads')
+        try:
+            yield held
+        finally:
+            if held:
+                try:
+                    self._client.eval(self.RELEASE_SCRIPT, 1, key, token)
+                except Exception as e:
+                    logger.warning(f"Shared cache lease release failed ({self.url}): {e}")
+
+    def stats(self):
+        with self._lock:
+            loaded = {name: {'rows': info['rows'], 'published_at': info['published_at']}
+                      for name, (_, _, info) in self._loaded.items()}
+            return {'backend': self.kind, 'url': self.url.split('@')[-1], 'datasets': loaded, **self._stats}
+
+
+def open_shared_cache(spec, directory):
+    """
+    Backend for the SHARED_CACHE setting: '' -> None, 'file' -> FileSharedCache
+    in directory, 'redis://...' / 'rediss://...' -> RedisSharedCache.
+    """
+    spec = (spec or '').strip()
+    if not spec or spec.lower() in ('0', 'off', 'false', 'no'):
+        return None
+    if not AVAILABLE:
+        raise RuntimeError('pyarrow is required for the shared cache')
+    if spec.lower() in ('1', 'on', 'file'):
+        return FileSharedCache(directory)
+    if spec.startswith(('redis://', 'rediss://', 'unix://')):
+        if redis is None:
+            raise RuntimeError("SHARED_CACHE points at Redis but the 'redis' package is not installed")
+        return RedisSharedCache(spec)
+    raise ValueError(f"Unknown SHARED_CACHE backend: {spec!r} (use 'file' or a redis:// URL)")
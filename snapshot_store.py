@@ -0,0 +1,149 @@
+"""
+Persistent local store for the last good normalized order set (SQLite).
+
+Lets a cold worker answer /api/orders from disk before the remote ERP has
+been reached, and keeps an offline copy that is fresher than orders.csv.
+Saves are delta syncs: rows are identified by order_identity() and only
+new/changed rows are written, vanished rows are deleted.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Sipariş kimliği: uzak API'de sipariş numarası yok; değişmeyen alanlardan türetilir
+IDENTITY_FIELDS = ('date', 'CARİ İSMİ', 'Sorumluluk Merkezi Kodu', 'Sorumluluk Merkezi Adı',
+                   'PROJE', 'DOVİZ CİNSİ', 'MİKTAR', 'NET TUTAR')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    dataset   TEXT NOT NULL,
+    order_key TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    row_hash  TEXT NOT NULL,
+    payload   TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (dataset, order_key)
+);
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset   TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    row_count INTEGER NOT NULL,
+    meta      TEXT
+);
+"""
+
+
+def _digest(value):
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def order_identity(records):
+    """
+    Stable per-row keys: hash of IDENTITY_FIELDS plus an occurrence counter,
+    so identical-looking rows stay distinct. Returns a list aligned with records.
+    """
+    seen = {}
+    keys = []
+    for rec in records:
+        base = _digest(json.dumps([rec.get(f) for f in IDENTITY_FIELDS], ensure_ascii=False, default=str))
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        keys.append(f"{base}#{n}")
+    return keys
+
+
+def row_hash(payload):
+    return _digest(payload)
+
+
+class OrderSnapshotStore:
+    """SQLite-backed store of normalized record sets, one per dataset key."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_sync = None
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, dataset, records, meta=None):
+        """Delta-sync records into dataset. Returns {'inserted','updated','deleted','unchanged'}."""
+        keys = order_identity(records)
+        payloads = [json.dumps(r, ensure_ascii=False, default=str) for r in records]
+        now = time.time()
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        with self._lock, self._connect() as conn:
+            existing = {k: (h, p) for k, h, p in conn.execute(
+                'SELECT order_key, row_hash, position FROM orders WHERE dataset = ?', (dataset,))}
+            upserts = []
+            moves = []
+            for pos, (key, payload) in enumerate(zip(keys, payloads)):
+                h = row_hash(payload)
+                old = existing.pop(key, None)
+                if old is None:
+                    counts['inserted'] += 1
+                    upserts.append((dataset, key, pos, h, payload, now))
+                elif old[0] != h:
+                    counts['updated'] += 1
+                    upserts.append((dataset, key, pos, h, payload, now))
+                else:
+                    counts['unchanged'] += 1
+                    if old[1] != pos:
+                        moves.append((pos, dataset, key))
+            if upserts:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO orders (dataset, order_key, position, row_hash, payload, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', upserts)
+            if moves:
+                conn.executemany('UPDATE orders SET position = ? WHERE dataset = ? AND order_key = ?', moves)
+            if existing:
+                counts['deleted'] = len(existing)
+                conn.executemany('DELETE FROM orders WHERE dataset = ? AND order_key = ?',
+                                 [(dataset, k) for k in existing])
+            conn.execute(
+                'INSERT OR REPLACE INTO datasets (dataset, synced_at, row_count, meta) VALUES (?, ?, ?, ?)',
+                (dataset, now, len(records), json.dumps(meta or {}, default=str)))
+        self._last_sync = {'dataset': dataset, 'at': now, **counts}
+        logger.info(f"Snapshot store sync {dataset}: {counts}")
+        return counts
+
+    def load(self, dataset):
+        """(records, info) for dataset, or (None, None) if never saved."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT synced_at, row_count, meta FROM datasets WHERE dataset = ?',
+                               (dataset,)).fetchone()
+            if row is None:
+                return None, None
+            records = [json.loads(p) for (p,) in conn.execute(
+                'SELECT payload FROM orders WHERE dataset = ? ORDER BY position', (dataset,))]
+        synced_at, row_count, meta = row
+        return records, {'synced_at': synced_at, 'rows': row_count, 'meta': json.loads(meta or '{}')}
+
+    def stats(self):
+        try:
+            with self._connect() as conn:
+                datasets = [{'dataset': d, 'synced_at': t, 'rows': n} for d, t, n in conn.execute(
+                    'SELECT dataset, synced_at, row_count FROM datasets ORDER BY synced_at DESC')]
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        except sqlite3.Error as e:
+            return {'path': self.path, 'error': str(e)}
+        return {'path': self.path, 'bytes': size, 'datasets': datasets, 'last_sync': self._last_sync}
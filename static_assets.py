@@ -0,0 +1,85 @@
+"""
+Static dashboard assets with validators and precompressed variants.
+
+Each compressible file (HTML/CSS/JS/CSV/JSON) is compressed once per file
+version (path, mtime_ns, size) at maximum gzip/brotli level and kept in
+memory, so repeated requests serve the precompressed bytes. Variants get
+their own ETag (base ETag + encoding) and share Last-Modified, so
+If-None-Match / If-Modified-Since revalidation works for every encoding.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+
+from csv_source import file_signature
+import response_encoding
+
+PRECOMPRESS_GZIP_LEVEL = 9
+PRECOMPRESS_BROTLI_QUALITY = 11
+MIN_BYTES = 1024
+
+
+def asset_etag(signature):
+    """Strong ETag from a file signature (changes whenever mtime or size changes)."""
+    return hashlib.blake2b(repr(signature).encode('utf-8'), digest_size=10).hexdigest()
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return response_encoding.brotli.compress(data, quality=PRECOMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=PRECOMPRESS_GZIP_LEVEL, mtime=0)
+
+
+class StaticAssetCache:
+    """LRU of compressed file variants keyed by (signature, encoding)."""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def variant(self, path, encoding):
+        """
+        (body, signature) of path compressed with encoding, or None when the
+        file is not worth compressing (unknown type, too small, no gain).
+        Raises FileNotFoundError if path is missing.
+        """
+        signature = file_signature(path)
+        mimetype = mimetypes.guess_type(path)[0]
+        if not response_encoding.is_compressible(mimetype) or signature[2] < MIN_BYTES:
+            return None
+        key = (signature, encoding)
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+                self._hits += 1
+                return (body, signature) if body else None
+        with open(path, 'rb') as f:
+            data = f.read()
+        body = _compress(data, encoding)
+        if len(body) >= len(data):
+            body = b''  # sıkıştırma kazanç sağlamıyor; tekrar denenmesin
+        with self._lock:
+            self._misses += 1
+            # aynı dosyanın eski sürümlerini at
+            for old in [k for k in self._items if k[0][0] == signature[0] and k[0] != signature]:
+                self._bytes -= len(self._items.pop(old))
+            if key not in self._items:
+                self._items[key] = body
+                self._bytes += len(body)
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+        return (body, signature) if body else None
+
+    def stats(self):
+        with self._lock:
+            return {'variants': len(self._items), 'bytes': self._bytes,
+                    'hits': self._hits, 'misses': self._misses}
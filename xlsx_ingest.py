@@ -0,0 +1,127 @@
+"""
+Native ingestion of the "ALINAN SİPARİŞ LER *.xlsx" export.
+
+Replaces the Node excel-to-csv.js round trip for the server: the workbook is
+streamed with openpyxl's read-only reader, normalized by the caller and
+written to an Arrow IPC snapshot. The snapshot is written to a temp file and
+swapped in with os.replace(), so readers never observe a partial file, and
+it is memory-mapped on read.
+
+openpyxl and pyarrow are optional; callers should check AVAILABLE.
+"""
+
+import os
+import re
+import json
+import tempfile
+import logging
+
+from lazy_imports import is_installed, lazy_module
+
+logger = logging.getLogger(__name__)
+
+# openpyxl/pyarrow ilk kullanımda yüklenir (açılışı yavaşlatmasın)
+AVAILABLE = is_installed('openpyxl') and is_installed('pyarrow')
+if AVAILABLE:
+    openpyxl = lazy_module('openpyxl')
+    pa = lazy_module('pyarrow')
+    pa_ipc = lazy_module('pyarrow.ipc')
+else:  # pragma: no cover - depends on the deploy image
+    openpyxl = pa = pa_ipc = None
+
+# excel-to-csv.js ile aynı desen
+WORKBOOK_PATTERN = re.compile(r'ALINAN.*S[İI]PAR[İI][ŞS].*LER.*\.xlsx$', re.IGNORECASE)
+SNAPSHOT_META_KEY = b'cvsair.source'
+
+
+def find_order_workbook(directory):
+    """Newest (by mtime) workbook in directory matching WORKBOOK_PATTERN, or None."""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return None
+    candidates = [os.path.join(directory, n) for n in names
+                  if WORKBOOK_PATTERN.search(n) and not n.startswith('~$')]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def read_workbook_columns(path, sheet_index=0):
+    """
+    Stream the first sheet row by row into {header: [values...]}.
+    The first row is the header; completely empty rows are skipped.
+    """
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_index]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return {}
+        names = [str(h).strip() if h is not None else f'col{i}' for i, h in enumerate(header)]
+        columns = {name: [] for name in names}
+        lists = [columns[name] for name in names]
+        width = len(names)
+        for row in rows:
+            if row is None or all(v is None for v in row):
+                continue
+            for i in range(width):
+                lists[i].append(row[i] if i < len(row) else None)
+        return columns
+    finally:
+        wb.close()
+
+
+def write_snapshot(df, path, source=None):
+    """Write a DataFrame as an Arrow IPC file atomically (temp file + os.replace)."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[SNAPSHOT_META_KEY] = json.dumps(source or {}).encode('utf-8')
+    table = table.replace_schema_metadata(meta)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.orders-', suffix='.arrow.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            with pa_ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    logger.info(f"Snapshot written: {table.num_rows} rows -> {path}")
+    return table.num_rows
+
+
+def _open_snapshot(path):
+    return pa_ipc.open_file(pa.memory_map(path, 'r'))
+
+
+def read_snapshot_source(path):
+    """Source metadata stored by write_snapshot(), or None if missing/unreadable."""
+    if not AVAILABLE or not os.path.exists(path):
+        return None
+    try:
+        meta = _open_snapshot(path).schema.metadata or {}
+        raw = meta.get(SNAPSHOT_META_KEY)
+        return json.loads(raw.decode('utf-8')) if raw else None
+    except Exception as e:
+        logger.warning(f"Snapshot metadata unreadable ({path}): {e}")
+        return None
+
+
+def read_snapshot_records(path):
+    """Memory-map the snapshot and return its rows as a list of dicts."""
+    table = _open_snapshot(path).read_all()
+    return table.to_pylist()
+
+
+def read_snapshot_frame(path):
+    """Memory-map the snapshot and return it as a DataFrame."""
+    return _open_snapshot(path).read_all().to_pandas()